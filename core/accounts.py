@@ -0,0 +1,121 @@
+"""
+Account lookup and creation for OTP login/signup.
+
+Users are found through ``UserIdentity`` (unique index on the normalized
+phone/email) and new usernames are allocated with a single query, so login and
+signup cost a fixed number of queries regardless of how many users exist.
+A ``post_save`` handler on ``User`` keeps the identity in step with
+``User.email``, however the user was created or edited.
+"""
+import re
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+
+from .models import UserIdentity
+from .otp import normalize_identifier
+
+
+def identity_kind(phone_or_email):
+    return 'email' if '@' in phone_or_email else 'phone'
+
+
+def find_user_by_identifier(phone_or_email):
+    """Return the user owning this phone/email, or None"""
+    identity = UserIdentity.objects.select_related('user').filter(
+        value=normalize_identifier(phone_or_email)
+    ).first()
+    return identity.user if identity else None
+
+
+def default_username(phone_or_email):
+    """Generate username from phone/email"""
+    if identity_kind(phone_or_email) == 'email':
+        return phone_or_email.split('@')[0]
+    return f"user_{phone_or_email[-4:]}"
+
+
+def allocate_username(base_username):
+    """
+    Return ``base_username`` or the first free ``base_username<N>``.
+
+    All candidates are fetched in one prefix query (served by the username
+    index) instead of probing them one by one.
+    """
+    pattern = re.compile(rf'{re.escape(base_username)}[0-9]*')
+    taken = {
+        username for username in User.objects.filter(
+            username__startswith=base_username
+        ).values_list('username', flat=True)
+        if pattern.fullmatch(username)
+    }
+
+    if base_username not in taken:
+        return base_username
+    counter = 1
+    while f"{base_username}{counter}" in taken:
+        counter += 1
+    return f"{base_username}{counter}"
+
+
+def sync_identity(user):
+    """
+    Make ``user.email`` (where OTP signup keeps the phone/email) log the user in.
+
+    The user's identity of the same kind is replaced, so a changed email stops
+    matching the old address. Returns False when the value already belongs to
+    another user.
+    """
+    value = normalize_identifier(user.email)
+    if not value:
+        return True
+    owner = UserIdentity.objects.filter(value=value).values_list('user_id', flat=True).first()
+    if owner is not None:
+        return owner == user.pk
+
+    kind = identity_kind(value)
+    try:
+        with transaction.atomic():
+            if not UserIdentity.objects.filter(user=user, kind=kind).update(value=value):
+                UserIdentity.objects.create(user=user, kind=kind, value=value)
+    except IntegrityError:
+        # Claimed by another user in the meantime
+        return False
+    return True
+
+
+def user_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    """post_save handler for User: users from the admin, createsuperuser or a profile edit get their identity"""
+    if raw or (update_fields is not None and 'email' not in update_fields):
+        return
+    sync_identity(instance)
+
+
+def create_otp_user(phone_or_email, username=''):
+    """
+    Create a user and its identity for an OTP signup.
+
+    Returns ``(user, created)``; if another request registered the same
+    phone/email concurrently, that user is returned instead.
+    """
+    value = normalize_identifier(phone_or_email)
+    base_username = username or default_username(value)
+
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                user = User(username=allocate_username(base_username), email=value)
+                # No password for OTP-based auth
+                user.set_unusable_password()
+                # post_save creates the identity (user_saved)
+                user.save()
+                if not user.identities.filter(value=value).exists():
+                    raise IntegrityError(f"Identity {value} was claimed concurrently")
+            return user, True
+        except IntegrityError:
+            # Either the identity was just claimed or the username was taken
+            # between allocation and insert
+            existing = find_user_by_identifier(value)
+            if existing:
+                return existing, False
+    raise IntegrityError(f"Could not allocate a username for {base_username}")
@@ -1,21 +1,119 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from .models import CreditTransaction, GeneratedImage, Package, Order
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from .imaging import make_thumbnail
+from .media import IMMUTABLE_MAX_AGE
+from .models import (
+    CreditTransaction, GeneratedImage, Package, Order, UserIdentity, RequestProfile, ShareLink,
+    DailyGenerationStat, DailyCreditStat, DailyRevenueStat, RollupWatermark,
+)
+from .pagination import EstimatedCountPaginator
+from .profiling import render_flamegraph
 
 
-class CreditTransactionAdmin(admin.ModelAdmin):
+THUMBNAIL_SIZE = 160
+THUMBNAIL_CACHE_TIMEOUT = 7 * 24 * 3600
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist for tables with millions of rows: joined loading (set
+    ``list_select_related``), an estimated total, no second COUNT(*) for the
+    unfiltered total, and index-friendly search.
+
+    ``search_fields`` entries are exact (``=field``) or case-sensitive prefix
+    (``^field``) lookups, so they use the column's index instead of the
+    ``icontains`` scan Django runs by default. Terms that are not numbers skip
+    the ``id`` fields. Free-text columns such as ``description`` are not
+    searchable; narrow those lists with the filters and date hierarchy.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ['user']
+    
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        query = Q()
+        for field in self.get_search_fields(request):
+            if field.startswith('^'):
+                lookup = f'{field[1:]}__startswith'
+            else:
+                lookup = field.lstrip('=')
+            if lookup.split('__')[-1] in ('id', 'pk') and not term.isdigit():
+                continue
+            query |= Q(**{lookup: term})
+        if not query:
+            return queryset.none(), False
+        return queryset.filter(query), False
+
+
+class CreditTransactionAdmin(LargeTableAdmin):
     list_display = ['user', 'amount', 'transaction_type', 'description', 'created_at']
-    list_filter = ['transaction_type', 'created_at']
-    search_fields = ['user__username', 'description']
+    list_filter = ['transaction_type']
+    list_select_related = ['user']
+    date_hierarchy = 'created_at'
+    search_fields = ['=user__username', '=user__id']
+    search_help_text = 'Exact username or user id'
     readonly_fields = ['created_at']
 
 
-class GeneratedImageAdmin(admin.ModelAdmin):
-    list_display = ['user', 'style', 'created_at']
-    list_filter = ['style', 'created_at']
-    search_fields = ['user__username']
-    readonly_fields = ['created_at']
+class GeneratedImageAdmin(LargeTableAdmin):
+    list_display = ['thumbnail', 'user', 'style', 'output_format', 'created_at']
+    list_filter = ['style']
+    list_select_related = ['user']
+    date_hierarchy = 'created_at'
+    search_fields = ['=user__username', '=user__id', '=id']
+    search_help_text = 'Exact username, user id or image id'
+    readonly_fields = ['created_at', 'thumbnail']
+    
+    def get_urls(self):
+        return [
+            path('<int:pk>/thumbnail/', self.admin_site.admin_view(self.thumbnail_view, cacheable=True), name='core_generatedimage_thumbnail'),
+        ] + super().get_urls()
+    
+    @admin.display(description='Preview')
+    def thumbnail(self, obj):
+        if not obj.pk or not obj.generated_image:
+            return '-'
+        return format_html(
+            '<img src="{}" alt="" width="{}" loading="lazy" decoding="async">',
+            reverse('admin:core_generatedimage_thumbnail', args=[obj.pk]), THUMBNAIL_SIZE // 2,
+        )
+    
+    def thumbnail_view(self, request, pk):
+        """Small WEBP of the render, built once per file and kept in the cache"""
+        image = get_object_or_404(GeneratedImage.objects.only('id', 'user_id', 'generated_image'), pk=pk)
+        if not self.has_view_permission(request, image):
+            raise PermissionDenied
+        name = image.generated_image.name
+        cache_key = f'admin-thumbnail:{THUMBNAIL_SIZE}:{name}'
+        cache = caches[settings.ADMIN_THUMBNAIL_CACHE_ALIAS]
+        data = cache.get(cache_key)
+        if data is None:
+            try:
+                with default_storage.open(name, 'rb') as file:
+                    data = make_thumbnail(file, THUMBNAIL_SIZE)
+            except (FileNotFoundError, OSError):
+                raise Http404('Image file not found')
+            cache.set(cache_key, data, THUMBNAIL_CACHE_TIMEOUT)
+        response = HttpResponse(data, content_type='image/webp')
+        # File names are never reused, so the thumbnail of a URL never changes
+        response['Cache-Control'] = f'private, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        return response
 
 
 class PackageAdmin(admin.ModelAdmin):
@@ -25,14 +123,168 @@ class PackageAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
 
 
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
     list_display = ['id', 'user', 'package', 'amount', 'status', 'qpay_invoice_id', 'created_at']
-    list_filter = ['status', 'created_at']
-    search_fields = ['user__username', 'qpay_invoice_id']
+    list_filter = ['status', 'package']
+    list_select_related = ['user', 'package']
+    date_hierarchy = 'created_at'
+    search_fields = ['=id', '=user__username', '=user__id', '=qpay_invoice_id']
+    search_help_text = 'Exact order id, username, user id or QPay invoice id'
     readonly_fields = ['created_at', 'updated_at']
+    actions = ['expire_pending', 'refund_paid']
+    
+    @admin.action(description='Expire selected pending orders', permissions=['change'])
+    def expire_pending(self, request, queryset):
+        # update() skips auto_now, so updated_at is set explicitly
+        count = queryset.filter(status='pending').update(status='cancelled', updated_at=timezone.now())
+        self.message_user(request, f'{count} pending order(s) cancelled.', messages.SUCCESS)
+    
+    @admin.action(description='Refund selected paid orders (takes their credits back)', permissions=['change'])
+    def refund_paid(self, request, queryset):
+        """
+        Mark paid orders refunded and debit the credits they added, in one
+        UPDATE and one INSERT. The money itself is returned in QPay.
+        """
+        with transaction.atomic():
+            orders = list(
+                queryset.filter(status='paid')
+                .select_for_update(of=('self',))
+                .values_list('id', 'user_id', 'package__credits')
+            )
+            # The rows are locked, so none of them can be refunded twice
+            count = Order.objects.filter(id__in=[order_id for order_id, _, _ in orders]).update(
+                status='refunded', updated_at=timezone.now()
+            )
+            CreditTransaction.objects.bulk_create(
+                CreditTransaction(
+                    user_id=user_id,
+                    amount=credits,
+                    transaction_type='use',
+                    description=f'Refund of order #{order_id}',
+                )
+                for order_id, user_id, credits in orders
+            )
+        self.message_user(request, f'{count} order(s) refunded.', messages.SUCCESS)
+
+
+class UserIdentityAdmin(admin.ModelAdmin):
+    list_display = ['value', 'kind', 'user', 'created_at']
+    list_filter = ['kind']
+    search_fields = ['=value']
+    raw_id_fields = ['user']
+    list_select_related = ['user']
+    readonly_fields = ['created_at']
+
+
+class ShareLinkAdmin(admin.ModelAdmin):
+    """Deleting a link revokes it; its page and images may stay in a CDN for SHARE_PAGE_MAX_AGE"""
+    list_display = ['token', 'image', 'created_at', 'page_link']
+    search_fields = ['=token']
+    raw_id_fields = ['image']
+    readonly_fields = ['token', 'composite', 'og_image', 'created_at']
+    date_hierarchy = 'created_at'
+    
+    def has_add_permission(self, request):
+        # Links are built by core.sharing, which renders their images
+        return False
+    
+    @admin.display(description='Page')
+    def page_link(self, obj):
+        return format_html('<a href="{}" target="_blank">Open</a>', reverse('core:share', args=[obj.token]))
+
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'url_name', 'method', 'path', 'status_code', 'duration_ms', 'sample_count', 'flamegraph_link']
+    list_filter = ['url_name', 'method']
+    search_fields = ['path']
+    date_hierarchy = 'created_at'
+    raw_id_fields = ['user']
+    exclude = ['folded_stacks']
+    readonly_fields = ['url_name', 'path', 'method', 'status_code', 'duration_ms', 'interval_ms',
+                       'sample_count', 'user', 'created_at', 'flamegraph_link']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def get_queryset(self, request):
+        # The stacks are only needed on the flame graph page
+        return super().get_queryset(request).defer('folded_stacks')
+    
+    def get_urls(self):
+        return [
+            path('<int:pk>/flamegraph/', self.admin_site.admin_view(self.flamegraph_view), name='core_requestprofile_flamegraph'),
+            path('<int:pk>/folded/', self.admin_site.admin_view(self.folded_view), name='core_requestprofile_folded'),
+        ] + super().get_urls()
+    
+    @admin.display(description='Flame graph')
+    def flamegraph_link(self, obj):
+        return format_html('<a href="{}">View</a>', reverse('admin:core_requestprofile_flamegraph', args=[obj.pk]))
+    
+    def flamegraph_view(self, request, pk):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if not self.has_view_permission(request, profile):
+            raise PermissionDenied
+        return TemplateResponse(request, 'admin/core/requestprofile/flamegraph.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f'Flame graph: {profile}',
+            'profile': profile,
+            'flamegraph': render_flamegraph(profile.folded_stacks),
+        })
+    
+    def folded_view(self, request, pk):
+        """Raw folded stacks for flamegraph.pl or speedscope"""
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if not self.has_view_permission(request, profile):
+            raise PermissionDenied
+        response = HttpResponse(profile.folded_stacks, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.pk}.folded"'
+        return response
+
+
+class RollupAdmin(admin.ModelAdmin):
+    """Read-only; rows are written by manage.py update_rollups"""
+    date_hierarchy = 'date'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class DailyGenerationStatAdmin(RollupAdmin):
+    list_display = ['date', 'style', 'generations', 'output_bytes']
+    list_filter = ['style']
+
+
+class DailyCreditStatAdmin(RollupAdmin):
+    list_display = ['date', 'transaction_type', 'transactions', 'credits']
+    list_filter = ['transaction_type']
+
+
+class DailyRevenueStatAdmin(RollupAdmin):
+    list_display = ['date', 'package', 'orders', 'revenue']
+    list_filter = ['package']
+    list_select_related = ['package']
+
+
+class RollupWatermarkAdmin(RollupAdmin):
+    list_display = ['name', 'last_id', 'last_updated_at', 'updated_at']
+    date_hierarchy = None
 
 
 admin.site.register(CreditTransaction, CreditTransactionAdmin)
 admin.site.register(GeneratedImage, GeneratedImageAdmin)
 admin.site.register(Package, PackageAdmin)
-admin.site.register(Order, OrderAdmin)
\ No newline at end of file
+admin.site.register(Order, OrderAdmin)
+admin.site.register(UserIdentity, UserIdentityAdmin)
+admin.site.register(ShareLink, ShareLinkAdmin)
+admin.site.register(RequestProfile, RequestProfileAdmin)
+admin.site.register(DailyGenerationStat, DailyGenerationStatAdmin)
+admin.site.register(DailyCreditStat, DailyCreditStatAdmin)
+admin.site.register(DailyRevenueStat, DailyRevenueStatAdmin)
+admin.site.register(RollupWatermark, RollupWatermarkAdmin)
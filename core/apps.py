@@ -4,3 +4,36 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_migrate, post_save
+        from .accounts import user_saved
+        from .lifecycle import schedule_file_cleanup
+        from .models import GeneratedImage, ShareLink
+        from .timing import install_query_timer
+        from . import checks  # noqa: F401  (registers the system checks)
+
+        # Stored files are removed when their GeneratedImage or ShareLink row goes away
+        post_delete.connect(schedule_file_cleanup, sender=GeneratedImage)
+        post_delete.connect(schedule_file_cleanup, sender=ShareLink)
+
+        # Every user logs in via OTP with the phone/email kept in User.email
+        post_save.connect(user_saved, sender=User)
+
+        # SQL time of each request shows up in Server-Timing and /metrics
+        connection_created.connect(install_query_timer)
+
+        # SQLite drops the full-text triggers when a migration rebuilds core_generatedimage
+        post_migrate.connect(restore_fulltext_index, sender=self)
+
+
+def restore_fulltext_index(sender, using, plan=None, **kwargs):
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+    from .history import ensure_fulltext_index
+
+    applied = MigrationRecorder(connections[using]).applied_migrations()
+    if ('core', '0014_history_search_indexes') in applied:
+        ensure_fulltext_index(using)
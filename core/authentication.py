@@ -0,0 +1,155 @@
+"""
+Stateless signed-token authentication for the JSON API.
+
+Access tokens are short-lived and carry everything needed to authenticate a
+request, so no session row or user row is read. Refresh tokens live longer and
+are exchanged at ``/api/token/refresh/``, which is the only place the user row
+is checked again.
+
+Each refresh token has a ``RefreshToken`` row. Exchanging the token deletes
+the row, so a refresh token works once; logout deletes the rows, and a
+password change makes them fail the password check. Access tokens already
+handed out stay valid until they expire (``API_TOKEN_ACCESS_TTL``).
+"""
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, SessionAuthentication, get_authorization_header
+
+from .models import RefreshToken
+
+
+ACCESS_SALT = 'core.authentication.access'
+REFRESH_SALT = 'core.authentication.refresh'
+
+
+def password_marker(user):
+    """Changes whenever the password does, like the session auth hash"""
+    return user.get_session_auth_hash()[:16]
+
+
+def issue_tokens(user):
+    """Return a new access/refresh token pair for ``user``"""
+    now = timezone.now()
+    # Expired rows of this user go as new ones are added, so the table stays small
+    RefreshToken.objects.filter(user=user, expires_at__lte=now).delete()
+    refresh = RefreshToken.objects.create(
+        jti=secrets.token_hex(16),
+        user=user,
+        expires_at=now + timedelta(seconds=settings.API_TOKEN_REFRESH_TTL),
+    )
+    claims = {
+        'uid': user.pk,
+        'usr': user.username,
+        'stf': user.is_staff,
+    }
+    refresh_claims = {
+        'uid': user.pk,
+        'jti': refresh.jti,
+        'pwd': password_marker(user),
+    }
+    return {
+        'access': signing.dumps(claims, salt=ACCESS_SALT, compress=True),
+        'refresh': signing.dumps(refresh_claims, salt=REFRESH_SALT, compress=True),
+        'token_type': 'Bearer',
+        'expires_in': settings.API_TOKEN_ACCESS_TTL,
+    }
+
+
+def read_refresh_claims(token):
+    """Claims of a refresh token with a valid signature; raises signing.BadSignature"""
+    claims = signing.loads(token, salt=REFRESH_SALT, max_age=settings.API_TOKEN_REFRESH_TTL)
+    if 'jti' not in claims:
+        raise signing.BadSignature('Refresh token without an id')
+    return claims
+
+
+def read_refresh_token(token):
+    """
+    Spend a refresh token and return its (active) user. Raises
+    signing.BadSignature when the token is invalid, expired, already used or
+    revoked, or the password changed since it was issued.
+    """
+    claims = read_refresh_claims(token)
+    # Deleting the row spends the token; of two concurrent exchanges only one wins
+    deleted, _ = RefreshToken.objects.filter(
+        jti=claims['jti'], user_id=claims['uid'], expires_at__gt=timezone.now()
+    ).delete()
+    if not deleted:
+        raise signing.BadSignature('Refresh token was used or revoked')
+
+    user = User.objects.filter(pk=claims['uid'], is_active=True).first()
+    if user is None or not constant_time_compare(claims.get('pwd', ''), password_marker(user)):
+        raise signing.BadSignature('Refresh token no longer matches the user')
+    return user
+
+
+def revoke_refresh_tokens(user, token=None):
+    """Delete ``token`` if given (one client logging out), otherwise every refresh token of ``user``"""
+    tokens = RefreshToken.objects.filter(user=user)
+    if token:
+        try:
+            tokens = tokens.filter(jti=read_refresh_claims(token)['jti'])
+        except signing.BadSignature:
+            return
+    tokens.delete()
+
+
+def enforce_csrf(request):
+    """
+    Run Django's CSRF check on a DRF request; raises PermissionDenied.
+
+    DRF only checks CSRF inside SessionAuthentication, so views that skip
+    authentication call this before they log a session in.
+    """
+    SessionAuthentication().enforce_csrf(request)
+
+
+def user_from_claims(claims):
+    """
+    Build a User from token claims without querying the database.
+
+    The instance is created with deferred fields, so anything not carried in
+    the token (email, date_joined...) is loaded on first access and ``save()``
+    only writes the fields that were loaded.
+    """
+    return User.from_db(
+        'default',
+        ['id', 'username', 'is_staff', 'is_active'],
+        [claims['uid'], claims['usr'], claims['stf'], True],
+    )
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Authenticate ``Authorization: Bearer <access token>`` headers"""
+
+    keyword = b'bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword:
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        try:
+            claims = signing.loads(
+                auth[1].decode(),
+                salt=ACCESS_SALT,
+                max_age=settings.API_TOKEN_ACCESS_TTL,
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed('Token expired.')
+        except (signing.BadSignature, UnicodeDecodeError):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        return user_from_claims(claims), None
+
+    def authenticate_header(self, request):
+        return 'Bearer'
@@ -0,0 +1,300 @@
+"""
+Microbenchmarks for the hot paths of image generation and the JSON API.
+
+* ``pil.*``: the PIL steps of ``generate_image_view`` (decode, RGBA
+  flattening, PNG encode) on synthetic photos of typical phone sizes.
+* ``serializer.*`` and ``balance.*``: serializers over large querysets and
+  the credit balance aggregates. Their fixtures are created inside a
+  transaction that is rolled back, so the benchmarks can run against any
+  database without leaving rows behind.
+* ``startup.*``: boot cost of a fresh interpreter (``django.setup()``, the
+  URLconf, the warm-up), timed from outside together with its peak RSS.
+
+Each case reports seconds per call (median of several repeats).
+``manage.py benchmark`` compares them with a saved baseline and fails when a
+case got slower than the allowed threshold.
+"""
+import fnmatch
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from contextlib import contextmanager
+from functools import lru_cache
+
+import PIL
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+from PIL import Image, ImageFilter
+
+from .imaging import flatten_to_rgb
+from .models import CreditTransaction, GeneratedImage
+from .serializers import GeneratedImageSerializer, UserSerializer
+
+
+# Typical upload sizes: downscaled, full HD-ish, 12 MP phone camera
+PHOTO_SIZES = {
+    'small': (1024, 768),
+    'medium': (2048, 1536),
+    'large': (4032, 3024),
+}
+
+FIXTURE_USERS = 200
+FIXTURE_IMAGES = 500
+FIXTURE_TRANSACTIONS_PER_USER = 20
+
+BENCHMARKS = {}
+
+
+def benchmark(name, uses_db=False, measure_with=None):
+    """Register ``setup``; it returns what ``measure_with`` (default ``measure``) times"""
+    def register(setup):
+        BENCHMARKS[name] = (setup, uses_db, measure_with)
+        return setup
+    return register
+
+
+@lru_cache(maxsize=None)
+def synthetic_photo(size_name):
+    """RGBA image with smooth gradients and grain, compressing roughly like a photo"""
+    width, height = PHOTO_SIZES[size_name]
+    gradient = Image.linear_gradient('L').resize((width, height))
+    radial = Image.radial_gradient('L').resize((width, height))
+    noise = Image.effect_noise((width, height), 40).filter(ImageFilter.GaussianBlur(1))
+    return Image.merge('RGBA', (gradient, radial, noise, Image.linear_gradient('L').rotate(90).resize((width, height))))
+
+
+@lru_cache(maxsize=None)
+def synthetic_jpeg(size_name):
+    buffer = io.BytesIO()
+    synthetic_photo(size_name).convert('RGB').save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+for _size in PHOTO_SIZES:
+    @benchmark(f'pil.decode[{_size}]')
+    def _decode(size=_size):
+        data = synthetic_jpeg(size)
+
+        def run():
+            with Image.open(io.BytesIO(data)) as image:
+                image.load()
+        return run
+
+    @benchmark(f'pil.flatten_rgba[{_size}]')
+    def _flatten(size=_size):
+        image = synthetic_photo(size)
+        return lambda: flatten_to_rgb(image)
+
+    @benchmark(f'pil.encode_png[{_size}]')
+    def _encode_png(size=_size):
+        image = synthetic_photo(size).convert('RGB')
+        return lambda: image.save(io.BytesIO(), format='PNG')
+
+
+@contextmanager
+def db_fixtures():
+    """Users, transactions and images for the DB cases; rolled back afterwards"""
+    with transaction.atomic():
+        now = timezone.now()
+        users = User.objects.bulk_create(
+            User(username=f'benchmark-{i}', date_joined=now) for i in range(FIXTURE_USERS)
+        )
+        CreditTransaction.objects.bulk_create(
+            CreditTransaction(
+                user=user,
+                amount=1 if i % 4 else 10,
+                transaction_type='use' if i % 4 else 'add',
+                created_at=now,
+            )
+            for user in users
+            for i in range(FIXTURE_TRANSACTIONS_PER_USER)
+        )
+        GeneratedImage.objects.bulk_create(
+            GeneratedImage(
+                user=users[0],
+                original_image=f'original_images/ab/cd/original_{i}.jpg',
+                generated_image=f'generated_images/ab/cd/generated_{i}.webp',
+                style='Modern',
+                output_format='webp',
+                output_width=1024,
+                output_height=768,
+            )
+            for i in range(FIXTURE_IMAGES)
+        )
+        try:
+            yield {'users': users}
+        finally:
+            transaction.set_rollback(True)
+
+
+@benchmark(f'serializer.generated_images[{FIXTURE_IMAGES}]', uses_db=True)
+def _serialize_images(fixtures):
+    user = fixtures['users'][0]
+    return lambda: GeneratedImageSerializer(
+        GeneratedImage.objects.filter(user=user).order_by('-created_at'), many=True
+    ).data
+
+
+@benchmark(f'serializer.users[{FIXTURE_USERS}]', uses_db=True)
+def _serialize_users(fixtures):
+    ids = [user.pk for user in fixtures['users']]
+    return lambda: UserSerializer(User.objects.filter(pk__in=ids), many=True).data
+
+
+@benchmark('balance.two_queries', uses_db=True)
+def _balance_two_queries(fixtures):
+    user = fixtures['users'][0]
+
+    def run():
+        # Shape used by UserDashboardView and UserSerializer
+        added = CreditTransaction.objects.filter(
+            user=user, transaction_type='add'
+        ).aggregate(total=Sum('amount'))['total'] or 0
+        used = CreditTransaction.objects.filter(
+            user=user, transaction_type='use'
+        ).aggregate(total=Sum('amount'))['total'] or 0
+        return added - used
+    return run
+
+
+@benchmark('balance.conditional', uses_db=True)
+def _balance_conditional(fixtures):
+    user = fixtures['users'][0]
+
+    def run():
+        # Single-query shape used by the async views (views_async.credit_balance)
+        totals = CreditTransaction.objects.filter(user=user).aggregate(
+            added=Sum('amount', filter=Q(transaction_type='add')),
+            used=Sum('amount', filter=Q(transaction_type='use')),
+        )
+        return (totals['added'] or 0) - (totals['used'] or 0)
+    return run
+
+
+def measure(func, repeat=5):
+    """Seconds per call: median and best of ``repeat`` runs of at least 0.2s each"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {'median': statistics.median(times), 'min': min(times), 'number': number}
+
+
+STARTUP_SCRIPT = """
+import resource
+import django
+django.setup()
+{code}
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def measure_process(code, repeat=5):
+    """Wall time and peak RSS (KiB) of a new interpreter running ``code`` after ``django.setup()``"""
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+    times, rss = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-c', STARTUP_SCRIPT.format(code=code)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        times.append(time.perf_counter() - started)
+        rss.append(int(output.split()[-1]))
+    return {'median': statistics.median(times), 'min': min(times), 'number': 1, 'rss_kb': statistics.median(rss)}
+
+
+@benchmark('startup.setup', measure_with=measure_process)
+def _startup_setup():
+    # What every manage.py command and test run pays
+    return ''
+
+
+@benchmark('startup.urlconf', measure_with=measure_process)
+def _startup_urlconf():
+    # What a worker pays before serving its first request
+    return 'from django.urls import get_resolver; get_resolver().url_patterns'
+
+
+@benchmark('startup.warmup', measure_with=measure_process)
+def _startup_warmup():
+    return 'from core.warmup import warm_up; warm_up()'
+
+
+def selected(patterns):
+    # Case names contain brackets, so "[" in a pattern is literal, not a character class
+    patterns = [pattern.replace('[', '[[]') for pattern in patterns]
+    return [
+        name for name in BENCHMARKS
+        if not patterns or any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+    ]
+
+
+def run_benchmarks(patterns=(), repeat=5, log=None):
+    """Run the selected cases; returns ``{name: {'median', 'min', 'number'}}``"""
+    log = log or (lambda name, result: None)
+    names = selected(patterns)
+    results = {}
+
+    for name in names:
+        setup, uses_db, measure_with = BENCHMARKS[name]
+        if not uses_db:
+            results[name] = (measure_with or measure)(setup(), repeat)
+            log(name, results[name])
+
+    db_names = [name for name in names if BENCHMARKS[name][1]]
+    if db_names:
+        with db_fixtures() as fixtures:
+            for name in db_names:
+                results[name] = measure(BENCHMARKS[name][0](fixtures), repeat)
+                log(name, results[name])
+    return results
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f).get('results', {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, results):
+    """Merge ``results`` into the baseline file"""
+    merged = {**load_baseline(path), **results}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'meta': {
+                'python': platform.python_version(),
+                'pillow': PIL.__version__,
+                'machine': platform.machine(),
+                'saved_at': timezone.now().isoformat(),
+            },
+            'results': merged,
+        }, f, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, threshold):
+    """
+    Yield ``(name, ratio, regressed)`` for the time of each case, and for the
+    peak RSS of the startup cases; ratio is None for cases without a baseline.
+    """
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            yield name, None, False
+            continue
+        ratio = result['median'] / reference['median']
+        yield name, ratio, ratio > 1 + threshold
+        if 'rss_kb' in result and reference.get('rss_kb'):
+            ratio = result['rss_kb'] / reference['rss_kb']
+            yield f'{name} (RSS)', ratio, ratio > 1 + threshold
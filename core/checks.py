@@ -0,0 +1,35 @@
+"""
+System checks for settings that work with a single development process but
+break once several workers serve the site.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+from django.utils.module_loading import import_string
+
+
+# Cache backends whose contents are not shared between processes
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_process_local(alias):
+    return settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_CACHES
+
+
+@register()
+def check_otp_backend(app_configs, **kwargs):
+    from .otp import CacheOTPBackend
+
+    backend = import_string(settings.OTP_BACKEND)
+    if issubclass(backend, CacheOTPBackend) and is_process_local(settings.OTP_CACHE_ALIAS):
+        return [Warning(
+            'OTP codes are stored in a cache that is not shared between processes.',
+            hint=(
+                'A code sent by one worker cannot be verified by another. Set REDIS_URL '
+                'or OTP_BACKEND=core.otp.DatabaseOTPBackend.'
+            ),
+            id='core.W001',
+        )]
+    return []
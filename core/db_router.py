@@ -0,0 +1,107 @@
+"""
+Read-replica routing.
+
+When ``DATABASES['replica']`` is configured, ``ReplicaRoutingMiddleware``
+marks requests to the views in ``settings.DB_REPLICA_VIEWS`` and
+``PrimaryReplicaRouter`` sends their reads to the replica. Everything else,
+and every write, goes to the primary.
+
+Read-your-writes: once a request writes, the rest of it reads from the
+primary, and the response sets a short-lived cookie that keeps the client's
+next requests on the primary until the replica has caught up.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+PIN_COOKIE = 'db_pin'
+
+
+class RoutingState:
+    """Routing decisions for one request"""
+
+    def __init__(self, pinned=False):
+        self.use_replica = False
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.use_replica and not state.pinned:
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # Reads after a write must see it
+            state.wrote = state.pinned = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware:
+    """Route reads of replica views to the replica; pin clients to the primary after writes"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if REPLICA not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is not None and request.resolver_match.view_name in settings.DB_REPLICA_VIEWS:
+            state.use_replica = True
+
+    def finish(self, request, response, state):
+        if state.wrote or request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.DB_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
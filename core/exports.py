@@ -0,0 +1,124 @@
+"""
+Streaming ZIP export of a user's originals and renders.
+
+``stream_export`` writes the archive with ``zipfile`` into a sink that is
+drained after every chunk, so the response starts at once and memory holds
+one file chunk, never the archive. Members are ``ZIP_STORED``: the images are
+already compressed, and storing them needs no CPU. The sink cannot seek, so
+``zipfile`` writes each member's sizes in a data descriptor after its data.
+
+An export is split into parts of at most ``count`` images, ordered by id. A
+part is a complete archive; the response's ``Link: rel="next"`` header
+points to the following part. A client resumes an interrupted download by
+asking for the part that starts after the last image it fully received.
+
+Under ASGI, Django collects a sync iterator into a list before sending it,
+which would hold the whole part in memory. ``astream_export`` runs the same
+generator one chunk at a time in a worker thread instead.
+"""
+import csv
+import io
+import posixpath
+import zipfile
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .lifecycle import open_stored_file
+from .models import GeneratedImage
+
+
+CHUNK_SIZE = 64 * 1024
+
+INDEX_FIELDS = ['id', 'created_at', 'style', 'room_type', 'description', 'original', 'render']
+
+
+class StreamSink(io.RawIOBase):
+    """Write-only, unseekable buffer that hands out what was written since the last drain"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        """Everything written since the last drain, as a list of at most one bytes object"""
+        if not self.chunks:
+            return []
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return [data]
+
+
+def export_images(user, after=0, count=200):
+    """
+    Images of one part (ids above ``after``) and whether more follow.
+    Only the fields the archive needs are loaded.
+    """
+    images = list(
+        GeneratedImage.objects.filter(user=user, id__gt=after)
+        .order_by('id')
+        .only('id', 'created_at', 'style', 'room_type', 'description',
+              'original_image', 'generated_image', 'original_archived_at')[:count + 1]
+    )
+    return images[:count], len(images) > count
+
+
+def member_name(image, role, name):
+    folder = f'{image.pk:08d}-{slugify(image.style) or "render"}'
+    extension = posixpath.splitext(name)[1].lower()
+    return f'{folder}/{role}{extension}'
+
+
+def stream_export(images):
+    """Yield the bytes of a ZIP holding every image's original, render and an index.csv"""
+    sink = StreamSink()
+    index = io.StringIO()
+    writer = csv.writer(index)
+    writer.writerow(INDEX_FIELDS)
+
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for image in images:
+            names = {}
+            for field, role in (('original_image', 'original'), ('generated_image', 'render')):
+                name = getattr(image, field).name
+                if not name:
+                    continue
+                info = zipfile.ZipInfo(member_name(image, role, name), timezone.localtime(image.created_at).timetuple()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                try:
+                    source = open_stored_file(image, field)
+                except FileNotFoundError:
+                    continue
+                with source, archive.open(info, 'w', force_zip64=True) as member:
+                    while chunk := source.read(CHUNK_SIZE):
+                        member.write(chunk)
+                        yield from sink.drain()
+                names[role] = info.filename
+                # Data descriptor, written when the member closes
+                yield from sink.drain()
+            writer.writerow([
+                image.pk, image.created_at.isoformat(), image.style, image.room_type,
+                image.description, names.get('original', ''), names.get('render', ''),
+            ])
+
+        archive.writestr('index.csv', index.getvalue(), compress_type=zipfile.ZIP_DEFLATED)
+    # Central directory, written when the archive closes
+    yield from sink.drain()
+
+
+async def astream_export(images):
+    """``stream_export`` for ASGI responses, one chunk per trip to a worker thread"""
+    chunks = stream_export(images)
+    try:
+        while (chunk := await sync_to_async(next)(chunks, None)) is not None:
+            yield chunk
+    finally:
+        # Closes the open source file when the client goes away mid-part
+        await sync_to_async(chunks.close)()
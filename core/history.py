@@ -0,0 +1,163 @@
+"""
+Search over a user's generation history.
+
+Filters (style, room type, date range) are served by the composite
+``(user, style|room_type, created_at)`` indexes on ``GeneratedImage``. Text
+search over ``description`` uses a full-text index:
+
+* SQLite: the FTS5 table ``core_generatedimage_fts`` (external content, kept
+  in sync by triggers on ``core_generatedimage``);
+* PostgreSQL: a GIN index on ``to_tsvector('simple', description)``.
+
+``ensure_fulltext_index`` creates them after every ``migrate``, because
+SQLite rebuilds a table (dropping its triggers) whenever a later migration
+alters it; migration 0014 keeps its own copy of the SQL.
+
+Neither index contains the user, so a text search first finds the matching
+descriptions of every user and only then keeps this user's. That is cheap
+while matches are rare, but short prefixes of common words touch much of the
+index. If that shows up, add ``user_id`` to the index (an FTS5 column that
+is part of the query, or a ``btree_gin`` index on PostgreSQL).
+
+Results come newest first with keyset pagination: the cursor is the
+``(created_at, id)`` of the last row, so deep pages cost the same as the first.
+"""
+import base64
+import re
+from datetime import datetime, time, timedelta
+
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import GeneratedImage
+
+
+FTS_TABLE = 'core_generatedimage_fts'
+
+SQLITE_FULLTEXT_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        description, content='core_generatedimage', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON core_generatedimage BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON core_generatedimage BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF description ON core_generatedimage BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+    END""",
+]
+
+SQLITE_TRIGGERS = [f'{FTS_TABLE}_insert', f'{FTS_TABLE}_delete', f'{FTS_TABLE}_update']
+
+POSTGRESQL_FULLTEXT_SQL = [
+    "CREATE INDEX IF NOT EXISTS core_generatedimage_description_fts "
+    "ON core_generatedimage USING gin (to_tsvector('simple', description))",
+]
+
+
+def ensure_fulltext_index(using='default'):
+    """Create the full-text index of ``description`` if it (or a trigger) is missing"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'core_generatedimage'"
+            )
+            if set(SQLITE_TRIGGERS) <= {row[0] for row in cursor.fetchall()}:
+                return
+            for sql in SQLITE_FULLTEXT_SQL:
+                cursor.execute(sql)
+            # Rows written while a trigger was missing are not in the index
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif connection.vendor == 'postgresql':
+            for sql in POSTGRESQL_FULLTEXT_SQL:
+                cursor.execute(sql)
+
+
+def drop_fulltext_index(using='default'):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for trigger in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS core_generatedimage_description_fts')
+
+
+def description_matches(text, vendor):
+    """
+    Condition matching descriptions that contain every word of ``text``
+    (words may be prefixes, for search-as-you-type); None without words.
+    The full-text lookup covers all users, see the module docstring.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    if vendor == 'sqlite':
+        sql = f'"core_generatedimage"."id" IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)'
+        query = ' '.join(f'"{word}"*' for word in words)
+    elif vendor == 'postgresql':
+        sql = "to_tsvector('simple', \"core_generatedimage\".\"description\") @@ to_tsquery('simple', %s)"
+        query = ' & '.join(f'{word}:*' for word in words)
+    else:
+        condition = Q()
+        for word in words:
+            condition &= Q(description__icontains=word)
+        return condition
+    return RawSQL(sql, [query], output_field=BooleanField())
+
+
+def encode_cursor(image):
+    raw = f'{image.created_at.isoformat()}|{image.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """``(created_at, id)`` from a cursor; raises ValueError when it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if created_at is None:
+        raise ValueError('Invalid cursor')
+    return created_at, pk
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def search_history(user, q='', style='', room_type='', start=None, end=None, cursor=None, limit=20):
+    """Return ``(images, next_cursor)``; ``next_cursor`` is None on the last page"""
+    images = GeneratedImage.objects.filter(user=user)
+    if style:
+        images = images.filter(style=style)
+    if room_type:
+        images = images.filter(room_type=room_type)
+    if start:
+        images = images.filter(created_at__gte=start_of_day(start))
+    if end:
+        images = images.filter(created_at__lt=start_of_day(end + timedelta(days=1)))
+    if q:
+        condition = description_matches(q, connections[images.db].vendor)
+        if condition is not None:
+            images = images.filter(condition)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        images = images.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    page = list(images.order_by('-created_at', '-pk')[:limit + 1])
+    if len(page) > limit:
+        return page[:limit], encode_cursor(page[limit - 1])
+    return page, None
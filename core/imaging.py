@@ -0,0 +1,123 @@
+"""
+Output encoding for generated renders.
+
+Gemini returns lossless PNG data. ``encode_render`` re-encodes it according to
+``settings.RENDER_OUTPUT`` (format, quality, effort) and reports the metadata
+stored on ``GeneratedImage`` so storage and bandwidth savings can be measured.
+Pillow is imported by the functions that need it, not when the URLconf loads.
+"""
+import logging
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {
+    'WEBP': 'webp',
+    'AVIF': 'avif',
+    'JPEG': 'jpg',
+    'PNG': 'png',
+}
+
+
+def avif_supported():
+    """AVIF is built into Pillow >= 11.2; older versions need pillow-avif-plugin"""
+    from PIL import features
+
+    if features.check('avif'):
+        return True
+    try:
+        import pillow_avif  # noqa: F401  (registers the AVIF plugin)
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_format(requested):
+    fmt = (requested or 'WEBP').upper()
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unsupported render output format: {requested}")
+    if fmt == 'AVIF' and not avif_supported():
+        logger.warning("AVIF encoder not available, falling back to WEBP")
+        return 'WEBP'
+    return fmt
+
+
+def flatten_to_rgb(image, background=(255, 255, 255)):
+    """Composite an image with alpha onto a solid background; other modes are returned as is"""
+    from PIL import Image
+
+    if image.mode not in ('RGBA', 'LA'):
+        return image
+    rgb_image = Image.new('RGB', image.size, background)
+    rgb_image.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
+    return rgb_image
+
+
+def encode_image(image, fmt, quality, effort):
+    """Encode a PIL image and return the bytes"""
+    buffer = BytesIO()
+    if fmt == 'WEBP':
+        # method: 0 (fast) .. 6 (smallest)
+        image.save(buffer, format='WEBP', quality=quality, method=min(effort, 6))
+    elif fmt == 'AVIF':
+        # speed: 0 (smallest) .. 10 (fast), so invert effort on a 0-10 scale
+        image.save(buffer, format='AVIF', quality=quality, speed=max(0, 10 - effort))
+    elif fmt == 'JPEG':
+        image.convert('RGB').save(buffer, format='JPEG', quality=quality, optimize=effort > 0, progressive=True)
+    else:
+        image.save(buffer, format='PNG', optimize=effort > 0)
+    return buffer.getvalue()
+
+
+def make_thumbnail(file, size, fmt='WEBP', quality=70):
+    """Encoded thumbnail that fits in ``size`` x ``size``, from an open image file"""
+    from PIL import Image
+
+    with Image.open(file) as image:
+        image.draft('RGB', (size, size))
+        image.thumbnail((size, size))
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        return encode_image(image, fmt, quality, effort=4)
+
+
+def encode_render(image_data, policy=None):
+    """
+    Re-encode raw render bytes according to the output policy.
+
+    Returns ``(render_file, master_file, metadata)``; ``master_file`` holds the
+    untouched model output when the policy asks to keep one, otherwise None.
+    """
+    from PIL import Image
+
+    policy = {**settings.RENDER_OUTPUT, **(policy or {})}
+    fmt = resolve_format(policy['format'])
+
+    image = Image.open(BytesIO(image_data))
+    source_format = image.format or 'PNG'
+    image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    encoded = encode_image(image, fmt, policy['quality'], policy['effort'])
+    name = uuid.uuid4().hex
+    render_file = ContentFile(encoded, name=f"generated_{name}.{EXTENSIONS[fmt]}")
+
+    master_file = None
+    if policy['keep_master']:
+        # Keep the bytes exactly as the model returned them
+        extension = EXTENSIONS.get(source_format, source_format.lower())
+        master_file = ContentFile(image_data, name=f"master_{name}.{extension}")
+
+    metadata = {
+        'output_format': fmt.lower(),
+        'output_bytes': len(encoded),
+        'output_width': image.width,
+        'output_height': image.height,
+    }
+    return render_file, master_file, metadata
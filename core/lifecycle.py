@@ -0,0 +1,204 @@
+"""
+Media lifecycle: orphan sweeping and cold-tier archiving.
+
+* ``iter_orphans`` walks the media storage tree and checks names against the
+  database in batches, so neither the file list nor the set of referenced
+  names is ever held in memory as a whole.
+* ``archive_originals`` moves originals older than a cutoff to
+  ``storages['cold']``; ``restore_original`` brings one back when it is
+  requested again.
+* Files of deleted ``GeneratedImage`` and ``ShareLink`` rows (including
+  user cascades) are removed once the delete commits.
+
+A file another row still references is neither deleted nor archived.
+"""
+import logging
+import posixpath
+
+from django.core.files.storage import default_storage, storages
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import GeneratedImage, ShareLink, UploadSession
+
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FIELDS = ('original_image', 'generated_image', 'master_image')
+
+SHARE_FIELDS = ('composite', 'og_image')
+
+# Top-level media directories managed by the lifecycle
+MANAGED_PREFIXES = ('original_images', 'generated_images', 'generated_masters', 'uploads', 'shares')
+
+
+def walk_storage(storage, top):
+    """Yield every file name under ``top``, depth first, one directory at a time"""
+    try:
+        directories, files = storage.listdir(top)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield posixpath.join(top, name)
+    for directory in directories:
+        yield from walk_storage(storage, posixpath.join(top, directory))
+
+
+def referenced_names(names, exclude_image=None):
+    """
+    Subset of ``names`` still referenced by a GeneratedImage (other than
+    ``exclude_image``), ShareLink or UploadSession
+    """
+    query = Q()
+    for field in IMAGE_FIELDS:
+        query |= Q(**{f'{field}__in': names})
+
+    referenced = set()
+    images = GeneratedImage.objects.filter(query)
+    if exclude_image is not None:
+        images = images.exclude(pk=exclude_image.pk)
+    for row in images.values_list(*IMAGE_FIELDS):
+        referenced.update(row)
+    share_query = Q()
+    for field in SHARE_FIELDS:
+        share_query |= Q(**{f'{field}__in': names})
+    for row in ShareLink.objects.filter(share_query).values_list(*SHARE_FIELDS):
+        referenced.update(row)
+    referenced.update(
+        UploadSession.objects.filter(upload_key__in=names).values_list('upload_key', flat=True)
+    )
+    return referenced
+
+
+def iter_orphans(grace, batch_size=500, storage=None):
+    """
+    Yield stored files no row references, skipping files newer than ``grace``
+    (a timedelta) so saves in progress are never swept.
+    """
+    storage = storage or default_storage
+    cutoff = timezone.now() - grace
+
+    def check(batch):
+        referenced = referenced_names(batch)
+        for name in batch:
+            if name in referenced:
+                continue
+            if storage.get_modified_time(name) > cutoff:
+                continue
+            yield name
+
+    batch = []
+    for prefix in MANAGED_PREFIXES:
+        for name in walk_storage(storage, prefix):
+            batch.append(name)
+            if len(batch) >= batch_size:
+                yield from check(batch)
+                batch = []
+    if batch:
+        yield from check(batch)
+
+
+def copy_between(source, target, name):
+    """Copy ``name`` from one storage to another under the same name"""
+    with source.open(name, 'rb') as content:
+        saved = target.save(name, content)
+    if saved != name:
+        target.delete(saved)
+        raise RuntimeError(f'{name} already exists in the target storage')
+
+
+def archive_original(image):
+    """
+    Move the original of ``image`` to the cold tier. Returns False (and
+    leaves it) when another row still uses the same file: uploads reused
+    before renders got their own copies can back several images.
+    """
+    name = image.original_image.name
+    if referenced_names([name], exclude_image=image):
+        return False
+    cold = storages['cold']
+    if not cold.exists(name):
+        copy_between(default_storage, cold, name)
+    updated = GeneratedImage.objects.filter(
+        pk=image.pk, original_archived_at__isnull=True
+    ).update(original_archived_at=timezone.now())
+    if updated:
+        default_storage.delete(name)
+    return True
+
+
+def archive_originals(older_than, batch_size=200, limit=None):
+    """Archive originals of images created before ``older_than`` ago. Returns the count."""
+    cutoff = timezone.now() - older_than
+    queryset = GeneratedImage.objects.filter(
+        created_at__lt=cutoff, original_archived_at__isnull=True
+    ).exclude(original_image='').only('id', 'original_image').order_by('id')
+
+    archived = 0
+    last_id = 0
+    while limit is None or archived < limit:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        for image in batch:
+            try:
+                if archive_original(image):
+                    archived += 1
+            except Exception:
+                logger.exception('Failed to archive original of GeneratedImage #%s', image.pk)
+            if limit is not None and archived >= limit:
+                break
+        last_id = batch[-1].pk
+    return archived
+
+
+def restore_original(image):
+    """Bring an archived original back to the hot tier"""
+    name = image.original_image.name
+    cold = storages['cold']
+    if not default_storage.exists(name):
+        copy_between(cold, default_storage, name)
+    GeneratedImage.objects.filter(pk=image.pk).update(original_archived_at=None)
+    image.original_archived_at = None
+    cold.delete(name)
+
+
+def open_stored_file(image, field):
+    """Open a stored file of ``image``, from the cold tier for an archived original"""
+    name = getattr(image, field).name
+    if field == 'original_image' and image.original_archived_at:
+        return storages['cold'].open(name, 'rb')
+    return default_storage.open(name, 'rb')
+
+
+def delete_image_files(image):
+    """Delete the stored files of a deleted ``image`` from both tiers, except those other rows still use"""
+    names = {getattr(image, field).name for field in IMAGE_FIELDS} - {''}
+    in_use = referenced_names(list(names)) if names else set()
+    for name in names - in_use:
+        default_storage.delete(name)
+    name = image.original_image.name
+    if image.original_archived_at and name and name not in in_use:
+        storages['cold'].delete(name)
+
+
+def delete_share_files(share):
+    for field in SHARE_FIELDS:
+        name = getattr(share, field).name
+        if name:
+            default_storage.delete(name)
+
+
+def schedule_file_cleanup(sender, instance, **kwargs):
+    """post_delete handler: remove the files once the delete has committed"""
+    delete_files = delete_share_files if sender is ShareLink else delete_image_files
+
+    def cleanup():
+        try:
+            delete_files(instance)
+        except Exception:
+            # The orphan sweep will pick the files up later
+            logger.exception('Failed to delete files of %s #%s', sender.__name__, instance.pk)
+
+    transaction.on_commit(cleanup)
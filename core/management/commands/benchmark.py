@@ -0,0 +1,79 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmarks import compare, load_baseline, run_benchmarks, save_baseline, selected
+
+
+class Command(BaseCommand):
+    help = 'Run the codec/serializer/startup benchmarks and compare them with the saved baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'patterns',
+            nargs='*',
+            help='Only run cases matching these glob patterns, e.g. "pil.*" or "*[small]"',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per case; the median is compared',
+        )
+        parser.add_argument(
+            '--baseline',
+            default=os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json'),
+            help='Baseline file to compare with (and write with --save)',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.15,
+            help='Allowed slowdown against the baseline before failing (0.15 = 15%%)',
+        )
+        parser.add_argument(
+            '--save',
+            action='store_true',
+            help='Store the results as the new baseline instead of comparing',
+        )
+
+    def handle(self, *args, **options):
+        baseline = load_baseline(options['baseline'])
+        if not options['save']:
+            # A case without a reference can never regress, so comparing it would always pass
+            missing = [name for name in selected(options['patterns']) if not baseline.get(name)]
+            if missing:
+                raise CommandError(
+                    f"No baseline for {', '.join(missing)} in {options['baseline']}; "
+                    'record one on this machine with --save'
+                )
+
+        def log(name, result):
+            reference = baseline.get(name)
+            line = f"{name:<40} {result['median'] * 1000:10.3f} ms"
+            if reference:
+                line += f"   baseline {reference['median'] * 1000:10.3f} ms"
+            if 'rss_kb' in result:
+                line += f"   RSS {result['rss_kb'] / 1024:.1f} MiB"
+            self.stdout.write(line)
+
+        results = run_benchmarks(options['patterns'], options['repeat'], log)
+        if not results:
+            raise CommandError('No benchmark matches the given patterns')
+
+        if options['save']:
+            save_baseline(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f"Saved {len(results)} results to {options['baseline']}"))
+            return
+
+        regressions = []
+        for name, ratio, regressed in compare(results, baseline, options['threshold']):
+            if regressed:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: {ratio:.2f}x the baseline'))
+            elif ratio is not None and ratio < 1 - options['threshold']:
+                self.stdout.write(self.style.SUCCESS(f'{name}: {ratio:.2f}x the baseline'))
+
+        if regressions:
+            raise CommandError(f'{len(regressions)} benchmark(s) slower than the baseline by more than {options["threshold"]:.0%}')
+        self.stdout.write(self.style.SUCCESS('No regressions'))
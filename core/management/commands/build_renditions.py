@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.pagecache import purge_page_cache
+from core.renditions import build_renditions
+
+
+class Command(BaseCommand):
+    help = 'Build responsive renditions of bundled static images (only changed sources are rebuilt)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild every source, even when the manifest is up to date',
+        )
+
+    def handle(self, *args, **options):
+        built, skipped, removed = build_renditions(force=options['force'], log=self.stdout.write)
+        if built or removed:
+            # Cached pages still point at the previous renditions
+            for page in settings.PAGE_CACHE_PAGES:
+                purge_page_cache(page)
+        self.stdout.write(
+            self.style.SUCCESS(f'Done: {built} built, {skipped} unchanged, {removed} removed')
+        )
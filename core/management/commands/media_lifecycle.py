@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from core.lifecycle import archive_originals, iter_orphans, restore_original
+from core.models import GeneratedImage
+
+
+class Command(BaseCommand):
+    help = 'Sweep orphaned media files, archive old originals to the cold tier, or restore them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=['sweep', 'archive', 'restore'],
+            help='sweep: find (and with --delete remove) unreferenced files; '
+                 'archive: move old originals to cold storage; '
+                 'restore: bring archived originals back (--id)',
+        )
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='Actually delete orphans found by sweep (default is a dry run)',
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=settings.MEDIA_ORPHAN_GRACE_HOURS,
+            help='Never sweep files modified more recently than this',
+        )
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=settings.MEDIA_ARCHIVE_AFTER_DAYS,
+            help='Archive originals of images older than this',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Maximum number of originals to archive in this run',
+        )
+        parser.add_argument(
+            '--id',
+            type=int,
+            action='append',
+            dest='ids',
+            help='GeneratedImage id to restore (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        getattr(self, options['action'])(options)
+
+    def sweep(self, options):
+        found = deleted = 0
+        for name in iter_orphans(timedelta(hours=options['grace_hours'])):
+            found += 1
+            if options['delete']:
+                default_storage.delete(name)
+                deleted += 1
+            self.stdout.write(name)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{found} orphaned files found, {deleted} deleted')
+        )
+
+    def archive(self, options):
+        archived = archive_originals(
+            timedelta(days=options['older_than_days']),
+            limit=options['limit'],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Archived {archived} originals to cold storage')
+        )
+
+    def restore(self, options):
+        if not options['ids']:
+            raise CommandError('restore needs at least one --id')
+
+        images = GeneratedImage.objects.filter(
+            id__in=options['ids'], original_archived_at__isnull=False
+        )
+        restored = 0
+        for image in images:
+            restore_original(image)
+            restored += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Restored {restored} originals')
+        )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from core.models import OTPCode
+
+
+class Command(BaseCommand):
+    help = 'Delete used and expired OTPCode rows in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Delete every row, e.g. after switching to the cache OTP backend',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows deleted per statement',
+        )
+
+    def handle(self, *args, **options):
+        queryset = OTPCode.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(Q(is_used=True) | Q(expires_at__lt=timezone.now()))
+
+        batch_size = options['batch_size']
+        total = 0
+        while True:
+            # Delete by primary key batches to keep each transaction short
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted, _ = OTPCode.objects.filter(id__in=ids).delete()
+            total += deleted
+            self.stdout.write(f'Deleted {total} OTP codes so far...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Purged {total} OTP codes')
+        )
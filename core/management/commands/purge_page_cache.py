@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.pagecache import purge_page_cache
+
+
+class Command(BaseCommand):
+    help = 'Drop cached anonymous renders of full pages (all pages by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('pages', nargs='*', help='Page names, e.g. landing')
+
+    def handle(self, *args, **options):
+        pages = options['pages'] or settings.PAGE_CACHE_PAGES
+        unknown = set(pages) - set(settings.PAGE_CACHE_PAGES)
+        if unknown:
+            raise CommandError(f"Unknown pages: {', '.join(sorted(unknown))}")
+
+        for page in pages:
+            purge_page_cache(page)
+            self.stdout.write(f'Purged {page}')
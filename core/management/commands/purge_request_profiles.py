@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.models import RequestProfile
+
+
+class Command(BaseCommand):
+    help = 'Delete RequestProfile rows older than PROFILING_RETENTION_DAYS in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.PROFILING_RETENTION_DAYS,
+            help='Keep profiles from this many days',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows deleted per statement',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        queryset = RequestProfile.objects.filter(created_at__lt=cutoff)
+
+        batch_size = options['batch_size']
+        total = 0
+        while True:
+            # Folded stacks make rows large; short batches keep each transaction small
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted, _ = RequestProfile.objects.filter(id__in=ids).delete()
+            total += deleted
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Purged {total} request profiles')
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.models import UploadSession
+from core.uploads import discard
+
+
+class Command(BaseCommand):
+    help = 'Delete expired chunked upload sessions and their temporary files'
+
+    def handle(self, *args, **options):
+        expired = UploadSession.objects.filter(expires_at__lt=timezone.now())
+
+        total = 0
+        for session in expired.iterator(chunk_size=1000):
+            if session.status == 'active':
+                discard(session)
+            total += 1
+        expired.delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Purged {total} upload sessions')
+        )
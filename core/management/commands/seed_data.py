@@ -1,12 +1,60 @@
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
 from core.models import CreditTransaction, Package
+from core.seeding import Seeder
 
 
 class Command(BaseCommand):
-    help = 'Seed the database with test users and data'
+    help = 'Seed the database with test users and data; --users N adds a large synthetic data set'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=0,
+            help='Synthetic users to create (scale mode); 0 only creates the test accounts and packages',
+        )
+        parser.add_argument(
+            '--images',
+            type=int,
+            default=None,
+            help='Generated image records (default: 5 per user)',
+        )
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=None,
+            help='Orders (default: 1 per 2 users), plus a purchase whenever a user runs out of credits',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Spread the synthetic history over this many days',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk insert and transaction',
+        )
+        parser.add_argument(
+            '--media',
+            action='store_true',
+            help='Write a small placeholder file for every image (slow for millions)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Random seed, for a reproducible data set',
+        )
 
     def handle(self, *args, **options):
+        if options['users'] < 0 or options['chunk_size'] < 1:
+            raise CommandError('--users must be >= 0 and --chunk-size >= 1')
         # Create test users
         test_users = [
             {'username': 'demo', 'email': 'demo@example.com', 'password': 'demo123'},
@@ -69,3 +117,26 @@ class Command(BaseCommand):
         self.stdout.write('Test accounts:')
         self.stdout.write('  Username: demo, Password: demo123')
         self.stdout.write('  Username: testuser, Password: test123')
+
+        if options['users']:
+            self.seed_scale(options)
+
+    def seed_scale(self, options):
+        users = options['users']
+        images = options['images'] if options['images'] is not None else users * 5
+        orders = options['orders'] if options['orders'] is not None else users // 2
+
+        started = time.monotonic()
+        seeder = Seeder(
+            days=options['days'],
+            chunk_size=options['chunk_size'],
+            media=options['media'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        counts = seeder.run(users, images, orders)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {users} users, {counts['images']} images and {counts['orders']} orders "
+            f'(tag {seeder.tag}) in {time.monotonic() - started:.0f}s'
+        ))
+        self.stdout.write('Run `manage.py update_rollups --rebuild` to include them in the analytics rollups.')
@@ -0,0 +1,122 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from core.models import GeneratedImage
+from core.storage import is_sharded, shard_path
+
+
+# Image fields and the prefix their files are sharded under
+SHARDED_FIELDS = {
+    'original_image': 'original_images',
+    'generated_image': 'generated_images',
+    'master_image': 'generated_masters',
+}
+
+
+def move_file(old_name, new_name):
+    """Move a stored file; rename in place on local storage, copy+delete otherwise"""
+    if hasattr(default_storage, 'path') and settings.MEDIA_STORAGE == 'local':
+        new_path = default_storage.path(new_name)
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        os.replace(default_storage.path(old_name), new_path)
+    else:
+        with default_storage.open(old_name, 'rb') as source:
+            saved = default_storage.save(new_name, source)
+        if saved != new_name:
+            raise RuntimeError(f'{new_name} already exists in storage')
+        default_storage.delete(old_name)
+
+
+class Command(BaseCommand):
+    help = 'Move existing media files into the hash-sharded directory layout'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of GeneratedImage rows processed per batch',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.BASE_DIR, 'tmp', 'shard_media.json'),
+            help='File recording the last processed row, used to resume',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the checkpoint and start from the first row',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be moved without touching files or rows',
+        )
+
+    def read_checkpoint(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)['last_id']
+        except (FileNotFoundError, KeyError, ValueError):
+            return 0
+
+    def write_checkpoint(self, path, last_id):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'last_id': last_id}, f)
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        dry_run = options['dry_run']
+        last_id = 0 if options['restart'] else self.read_checkpoint(checkpoint)
+        if last_id:
+            self.stdout.write(f'Resuming after GeneratedImage #{last_id}')
+
+        moved = missing = 0
+        while True:
+            rows = list(
+                GeneratedImage.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values('id', *SHARDED_FIELDS)[:options['batch_size']]
+            )
+            if not rows:
+                break
+
+            for row in rows:
+                updates = {}
+                for field, prefix in SHARDED_FIELDS.items():
+                    old_name = row[field]
+                    if not old_name or is_sharded(prefix, old_name):
+                        continue
+                    new_name = shard_path(prefix, old_name)
+
+                    if dry_run:
+                        self.stdout.write(f'{old_name} -> {new_name}')
+                        moved += 1
+                        continue
+
+                    if default_storage.exists(old_name):
+                        move_file(old_name, new_name)
+                    elif not default_storage.exists(new_name):
+                        # Nothing to move; keep the row as is so it can be inspected
+                        self.stderr.write(f'Missing file for GeneratedImage #{row["id"]}: {old_name}')
+                        missing += 1
+                        continue
+                    # else: moved on a previous run that stopped before the update
+                    updates[field] = new_name
+
+                if updates:
+                    GeneratedImage.objects.filter(id=row['id']).update(**updates)
+                    moved += len(updates)
+
+            last_id = rows[-1]['id']
+            if not dry_run:
+                self.write_checkpoint(checkpoint, last_id)
+            self.stdout.write(f'Processed up to GeneratedImage #{last_id} ({moved} files moved)')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Done: {moved} files moved, {missing} missing')
+        )
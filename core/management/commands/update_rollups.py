@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from core.rollups import reset_rollups, update_rollups
+
+
+class Command(BaseCommand):
+    help = 'Fold rows added since the last run into the daily analytics rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Drop the rollups and watermarks and rebuild them from all rows',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50000,
+            help='Source ids aggregated per transaction',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            reset_rollups()
+
+        results = update_rollups(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {results['generations']} generations and {results['credits']} credit transactions, "
+            f"rebuilt revenue of {results['revenue']} days"
+        ))
@@ -0,0 +1,177 @@
+"""
+Prometheus-format metrics.
+
+Request and phase durations are kept as histograms per view. Each process
+adds its observations up in memory and flushes the deltas to the metrics
+cache at most every ``METRICS_FLUSH_SECONDS``, so ``/metrics`` reports all
+workers when the cache is shared (Redis). Series keys are derived from the
+URL names and the fixed phase list, which lets ``/metrics`` read them back
+without a key registry.
+"""
+import bisect
+import hmac
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import Http404, HttpResponse
+from django.urls import URLResolver, get_resolver
+
+from .pagecache import get_page_cache_stats
+from .ratelimit import get_rejection_counts
+
+
+# Upper bounds in seconds; generation requests routinely take 10-30s
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+PHASES = ('db', 'upload', 'codec', 'storage', 'gemini', 'qpay', 'share')
+
+OTHER_VIEW = 'other'
+
+_lock = threading.Lock()
+_pending = defaultdict(int)
+_last_flush = time.monotonic()
+_view_names = None
+
+
+def _cache():
+    return caches[settings.METRICS_CACHE_ALIAS]
+
+
+def _incr(cache, key, delta):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, timeout=None)
+
+
+def collect_view_names(patterns, namespace=''):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            yield from collect_view_names(pattern.url_patterns, prefix)
+        elif pattern.name:
+            yield namespace + pattern.name
+
+
+def view_names():
+    """Every named URL; the label set of the histograms"""
+    global _view_names
+    if _view_names is None:
+        _view_names = sorted(set(collect_view_names(get_resolver().url_patterns))) + [OTHER_VIEW]
+    return _view_names
+
+
+def series_key(metric, labels):
+    return 'metrics:' + metric + ':' + '|'.join(labels)
+
+
+def _observe(metric, labels, seconds):
+    key = series_key(metric, labels)
+    _pending[f'{key}:b{bisect.bisect_left(BUCKETS, seconds)}'] += 1
+    # Cache counters are integers; keep the sum in microseconds
+    _pending[f'{key}:sum'] += round(seconds * 1_000_000)
+
+
+def record_request(view_name, total, phases):
+    """Record one request: its total duration and the time of each phase"""
+    if view_name not in view_names():
+        view_name = OTHER_VIEW
+    with _lock:
+        _observe('request', (view_name,), total)
+        for phase, (seconds, _count) in phases.items():
+            if phase in PHASES:
+                _observe('phase', (view_name, phase), seconds)
+    flush()
+
+
+def flush(force=False):
+    """Push this process' pending observations to the shared cache"""
+    global _pending, _last_flush
+    now = time.monotonic()
+    with _lock:
+        if not _pending or (not force and now - _last_flush < settings.METRICS_FLUSH_SECONDS):
+            return
+        pending, _pending = _pending, defaultdict(int)
+        _last_flush = now
+    cache = _cache()
+    for key, delta in pending.items():
+        _incr(cache, key, delta)
+
+
+def _labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _histogram_lines(name, help_text, metric, label_names, label_sets):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    keys = []
+    for labels in label_sets:
+        key = series_key(metric, labels)
+        keys.append(f'{key}:sum')
+        keys.extend(f'{key}:b{i}' for i in range(len(BUCKETS) + 1))
+    values = _cache().get_many(keys)
+
+    for labels in label_sets:
+        key = series_key(metric, labels)
+        counts = [values.get(f'{key}:b{i}', 0) for i in range(len(BUCKETS) + 1)]
+        if not any(counts):
+            continue
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(label_names, labels, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(label_names, labels)} {values.get(f"{key}:sum", 0) / 1_000_000}')
+        lines.append(f'{name}_count{_labels(label_names, labels)} {cumulative}')
+    return lines
+
+
+def _counter_lines(name, help_text, label_names, counts):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    for labels, value in sorted(counts.items()):
+        lines.append(f'{name}{_labels(label_names, labels)} {value}')
+    return lines
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    flush(force=True)
+    views = view_names()
+    lines = []
+    lines += _histogram_lines(
+        'rehome_request_duration_seconds', 'Request duration by view.',
+        'request', ('view',), [(view,) for view in views],
+    )
+    lines += _histogram_lines(
+        'rehome_request_phase_seconds', 'Time spent per request in each phase (db, gemini...) by view.',
+        'phase', ('view', 'phase'), [(view, phase) for view in views for phase in PHASES],
+    )
+    lines += _counter_lines(
+        'rehome_otp_rate_limited_total', 'OTP requests rejected by the rate limiter.',
+        ('scope', 'dimension'), get_rejection_counts(),
+    )
+    lines += _counter_lines(
+        'rehome_page_cache_requests_total', 'Anonymous page cache lookups by outcome.',
+        ('page', 'event'), get_page_cache_stats(settings.PAGE_CACHE_PAGES),
+    )
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Scrape endpoint: ``Authorization: Bearer <METRICS_TOKEN>``, or a staff session"""
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        allowed = hmac.compare_digest(request.headers.get('Authorization', ''), expected)
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not settings.METRICS_ENABLED or not allowed:
+        raise Http404
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_identities(apps, schema_editor):
+    """Create identities from User.email, where OTP signup stored the phone/email"""
+    User = apps.get_model('auth', 'User')
+    UserIdentity = apps.get_model('core', 'UserIdentity')
+    
+    seen = set()
+    batch = []
+    users = User.objects.exclude(email='').order_by('id').values_list('id', 'email')
+    for user_id, email in users.iterator(chunk_size=2000):
+        value = email.strip()
+        kind = 'email' if '@' in value else 'phone'
+        if kind == 'email':
+            value = value.lower()
+        # The oldest account wins if two users share an address
+        if not value or value in seen:
+            continue
+        seen.add(value)
+        batch.append(UserIdentity(user_id=user_id, kind=kind, value=value))
+        if len(batch) >= 2000:
+            UserIdentity.objects.bulk_create(batch)
+            batch = []
+    UserIdentity.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_package_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserIdentity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('phone', 'Phone'), ('email', 'Email')], max_length=5)),
+                ('value', models.CharField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='identities', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'user identities',
+            },
+        ),
+        migrations.RunPython(backfill_identities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_useridentity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='generatedimage',
+            name='generated_image',
+            field=models.ImageField(db_index=True, upload_to='generated_images/'),
+        ),
+        migrations.AlterField(
+            model_name='generatedimage',
+            name='original_image',
+            field=models.ImageField(db_index=True, upload_to='original_images/'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_index_image_paths'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedimage',
+            name='master_image',
+            field=models.ImageField(blank=True, db_index=True, upload_to='generated_masters/'),
+        ),
+        migrations.AddField(
+            model_name='generatedimage',
+            name='output_bytes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='generatedimage',
+            name='output_format',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='generatedimage',
+            name='output_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='generatedimage',
+            name='output_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
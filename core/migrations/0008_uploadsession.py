@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:06
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_render_output_metadata'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                ('content_type', models.CharField(max_length=50)),
+                ('total_size', models.PositiveBigIntegerField()),
+                ('received_bytes', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('complete', 'Complete')], default='active', max_length=10)),
+                ('upload_key', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
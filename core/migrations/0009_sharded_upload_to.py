@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:07
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='generatedimage',
+            name='generated_image',
+            field=models.ImageField(db_index=True, upload_to=core.storage.ShardedUploadTo('generated_images')),
+        ),
+        migrations.AlterField(
+            model_name='generatedimage',
+            name='master_image',
+            field=models.ImageField(blank=True, db_index=True, upload_to=core.storage.ShardedUploadTo('generated_masters')),
+        ),
+        migrations.AlterField(
+            model_name='generatedimage',
+            name='original_image',
+            field=models.ImageField(db_index=True, upload_to=core.storage.ShardedUploadTo('original_images')),
+        ),
+    ]
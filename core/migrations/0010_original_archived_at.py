@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_sharded_upload_to'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedimage',
+            name='original_archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
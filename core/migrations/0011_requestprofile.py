@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_original_archived_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_name', models.CharField(db_index=True, max_length=100)),
+                ('path', models.CharField(max_length=500)),
+                ('method', models.CharField(max_length=10)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.PositiveIntegerField()),
+                ('interval_ms', models.PositiveSmallIntegerField()),
+                ('sample_count', models.PositiveIntegerField()),
+                ('folded_stacks', models.TextField(help_text="One 'frame;frame;frame count' line per distinct stack")),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
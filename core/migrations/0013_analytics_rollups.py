@@ -0,0 +1,71 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_admin_indexes_refunded_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('last_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='DailyCreditStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('add', 'Add Credits'), ('use', 'Use Credits')], max_length=3)),
+                ('transactions', models.PositiveIntegerField(default=0)),
+                ('credits', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-date', 'transaction_type'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'transaction_type'), name='unique_credit_stat')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyGenerationStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('style', models.CharField(max_length=50)),
+                ('generations', models.PositiveIntegerField(default=0)),
+                ('output_bytes', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-date', 'style'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'style'), name='unique_generation_stat')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRevenueStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.BigIntegerField(default=0, help_text='MNT')),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.package')),
+            ],
+            options={
+                'ordering': ['-date', 'package'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'package'), name='unique_revenue_stat')],
+            },
+        ),
+    ]
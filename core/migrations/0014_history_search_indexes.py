@@ -0,0 +1,79 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# A copy of core.history's SQL at the time of this migration; the app's
+# post_migrate handler keeps the index current afterwards
+FTS_TABLE = 'core_generatedimage_fts'
+
+SQLITE_FULLTEXT_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        description, content='core_generatedimage', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON core_generatedimage BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON core_generatedimage BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF description ON core_generatedimage BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+POSTGRESQL_FULLTEXT_SQL = [
+    "CREATE INDEX IF NOT EXISTS core_generatedimage_description_fts "
+    "ON core_generatedimage USING gin (to_tsvector('simple', description))",
+]
+
+POSTGRESQL_DROP_SQL = ['DROP INDEX IF EXISTS core_generatedimage_description_fts']
+
+
+def run_sql(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql, params=None)
+
+
+def create_fulltext_index(apps, schema_editor):
+    # FTS5 table and triggers on SQLite, GIN index on PostgreSQL
+    run_sql(schema_editor, {'sqlite': SQLITE_FULLTEXT_SQL, 'postgresql': POSTGRESQL_FULLTEXT_SQL})
+
+
+def remove_fulltext_index(apps, schema_editor):
+    run_sql(schema_editor, {'sqlite': SQLITE_DROP_SQL, 'postgresql': POSTGRESQL_DROP_SQL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_analytics_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='generatedimage',
+            index=models.Index(fields=['user', 'created_at'], name='core_genera_user_id_acfc64_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='generatedimage',
+            index=models.Index(fields=['user', 'style', 'created_at'], name='core_genera_user_id_19eee1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='generatedimage',
+            index=models.Index(fields=['user', 'room_type', 'created_at'], name='core_genera_user_id_e12ea4_idx'),
+        ),
+        migrations.RunPython(create_fulltext_index, remove_fulltext_index),
+    ]
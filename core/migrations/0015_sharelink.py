@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:40
+
+import core.models
+import core.storage
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_history_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShareLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(default=core.models.new_share_token, editable=False, max_length=16, unique=True)),
+                ('composite', models.ImageField(db_index=True, upload_to=core.storage.ShardedUploadTo('shares'))),
+                ('og_image', models.ImageField(db_index=True, upload_to=core.storage.ShardedUploadTo('shares'))),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('image', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='share_link', to='core.generatedimage')),
+            ],
+        ),
+    ]
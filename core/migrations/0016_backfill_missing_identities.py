@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:50
+
+from django.db import migrations
+
+
+def backfill_missing_identities(apps, schema_editor):
+    """Identities for users created outside OTP signup (admin, createsuperuser) since 0005"""
+    User = apps.get_model('auth', 'User')
+    UserIdentity = apps.get_model('core', 'UserIdentity')
+
+    # Few users lack an identity, so their values fit in memory
+    candidates = {}
+    users = (
+        User.objects.exclude(email='').filter(identities__isnull=True)
+        .order_by('id').values_list('id', 'email')
+    )
+    for user_id, email in users.iterator(chunk_size=2000):
+        value = email.strip()
+        if '@' in value:
+            value = value.lower()
+        # The oldest account wins if two users share an address
+        if value:
+            candidates.setdefault(value, user_id)
+
+    values = list(candidates)
+    for start in range(0, len(values), 2000):
+        chunk = values[start:start + 2000]
+        taken = set(UserIdentity.objects.filter(value__in=chunk).values_list('value', flat=True))
+        UserIdentity.objects.bulk_create(
+            UserIdentity(user_id=candidates[value], kind='email' if '@' in value else 'phone', value=value)
+            for value in chunk if value not in taken
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_sharelink'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_missing_identities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_refreshtoken'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('complete', 'Complete'), ('used', 'Used')], default='active', max_length=10),
+        ),
+    ]
@@ -1,8 +1,13 @@
+import secrets
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from .storage import ShardedUploadTo
+
 
 class CreditTransaction(models.Model):
     TRANSACTION_TYPES = [
@@ -14,7 +19,8 @@ class CreditTransaction(models.Model):
     amount = models.IntegerField()
     transaction_type = models.CharField(max_length=3, choices=TRANSACTION_TYPES)
     description = models.CharField(max_length=200, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Indexed for the admin date drill-down and newest-first lists
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
     class Meta:
         ordering = ['-created_at']
@@ -36,22 +42,81 @@ class GeneratedImage(models.Model):
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='generated_images')
-    original_image = models.ImageField(upload_to='original_images/')
-    generated_image = models.ImageField(upload_to='generated_images/')
+    # Indexed so the media view can find the owner of a file by its path
+    original_image = models.ImageField(upload_to=ShardedUploadTo('original_images'), db_index=True)
+    generated_image = models.ImageField(upload_to=ShardedUploadTo('generated_images'), db_index=True)
+    # Untouched model output, only kept when RENDER_OUTPUT['keep_master'] is on
+    master_image = models.ImageField(upload_to=ShardedUploadTo('generated_masters'), blank=True, db_index=True)
+    output_format = models.CharField(max_length=10, blank=True)
+    output_bytes = models.PositiveIntegerField(null=True, blank=True)
+    output_width = models.PositiveIntegerField(null=True, blank=True)
+    output_height = models.PositiveIntegerField(null=True, blank=True)
+    # Set when the original has been moved to the cold storage tier
+    original_archived_at = models.DateTimeField(null=True, blank=True)
     style = models.CharField(max_length=50)
     room_type = models.CharField(max_length=100, blank=True)
     description = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # History listing and its filters (core.history); description has a full-text index
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'style', 'created_at']),
+            models.Index(fields=['user', 'room_type', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.style} style - {self.created_at}"
 
 
+def new_share_token():
+    return secrets.token_urlsafe(9)
+
+
+class ShareLink(models.Model):
+    """Public link to a render, with its before/after composite and Open Graph image built at share time"""
+    token = models.CharField(max_length=16, unique=True, default=new_share_token, editable=False)
+    image = models.OneToOneField(GeneratedImage, on_delete=models.CASCADE, related_name='share_link')
+    composite = models.ImageField(upload_to=ShardedUploadTo('shares'), db_index=True)
+    og_image = models.ImageField(upload_to=ShardedUploadTo('shares'), db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.token} -> image {self.image_id}"
+
+
+class UploadSession(models.Model):
+    """Resumable chunked upload of a room photo"""
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('complete', 'Complete'),
+        ('used', 'Used'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=50)
+    total_size = models.PositiveBigIntegerField()
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
+    # Storage key of the assembled file once the upload is complete
+    upload_key = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.filename} ({self.received_bytes}/{self.total_size})"
+    
+    def is_expired(self):
+        from django.utils import timezone
+        return timezone.now() > self.expires_at
+
+
 class OTPCode(models.Model):
-    """OTP code for phone/email verification"""
+    """OTP code for phone/email verification (used by DatabaseOTPBackend)"""
     phone_or_email = models.CharField(max_length=255, db_index=True)
     otp_code = models.CharField(max_length=6)
     is_used = models.BooleanField(default=False)
@@ -72,6 +137,36 @@ class OTPCode(models.Model):
         return timezone.now() > self.expires_at
 
 
+class UserIdentity(models.Model):
+    """Normalized phone number or email that logs a user in via OTP"""
+    KIND_CHOICES = [
+        ('phone', 'Phone'),
+        ('email', 'Email'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='identities')
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+    value = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name_plural = 'user identities'
+    
+    def __str__(self):
+        return f"{self.value} -> {self.user_id}"
+
+
+class RefreshToken(models.Model):
+    """Live refresh token of a signed-token API client; exchanging or revoking it deletes the row"""
+    jti = models.CharField(max_length=32, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='refresh_tokens')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.jti} -> {self.user_id}"
+
+
 class Package(models.Model):
     """Credit packages available for purchase"""
     name = models.CharField(max_length=100)
@@ -94,6 +189,7 @@ class Order(models.Model):
         ('paid', 'Paid'),
         ('failed', 'Failed'),
         ('cancelled', 'Cancelled'),
+        ('refunded', 'Refunded'),
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
@@ -102,16 +198,103 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     qpay_invoice_id = models.CharField(max_length=255, blank=True, null=True, db_index=True)
     qpay_invoice_code = models.CharField(max_length=255, blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Indexed so the revenue rollup finds orders paid or refunded since its last run
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Status filter of the admin and the bulk expire/refund actions
+            models.Index(fields=['status', 'created_at']),
+        ]
     
     def __str__(self):
         return f"Order #{self.id} - {self.user.username} - {self.package.name} - {self.status}"
 
 
+class RequestProfile(models.Model):
+    """Sampled stack profile of one request, in folded-stack format"""
+    url_name = models.CharField(max_length=100, db_index=True)
+    path = models.CharField(max_length=500)
+    method = models.CharField(max_length=10)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.PositiveIntegerField()
+    interval_ms = models.PositiveSmallIntegerField()
+    sample_count = models.PositiveIntegerField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    folded_stacks = models.TextField(help_text="One 'frame;frame;frame count' line per distinct stack")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms} ms)"
+
+
+class DailyGenerationStat(models.Model):
+    """Generations per style and day (core.rollups)"""
+    date = models.DateField()
+    style = models.CharField(max_length=50)
+    generations = models.PositiveIntegerField(default=0)
+    output_bytes = models.PositiveBigIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date', 'style']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'style'], name='unique_generation_stat'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.style}: {self.generations}"
+
+
+class DailyCreditStat(models.Model):
+    """Credits added and used per day (core.rollups)"""
+    date = models.DateField()
+    transaction_type = models.CharField(max_length=3, choices=CreditTransaction.TRANSACTION_TYPES)
+    transactions = models.PositiveIntegerField(default=0)
+    credits = models.BigIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date', 'transaction_type']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'transaction_type'], name='unique_credit_stat'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.transaction_type}: {self.credits}"
+
+
+class DailyRevenueStat(models.Model):
+    """Paid orders and revenue per package, by order date (core.rollups)"""
+    date = models.DateField()
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name='+')
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.BigIntegerField(default=0, help_text="MNT")
+    
+    class Meta:
+        ordering = ['-date', 'package']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'package'], name='unique_revenue_stat'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.package_id}: {self.revenue} MNT"
+
+
+class RollupWatermark(models.Model):
+    """How far each rollup has read its source table"""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    last_updated_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.last_id or self.last_updated_at}"
+
+
 @receiver(post_save, sender=User)
 def create_user_credits(sender, instance, created, **kwargs):
     """Automatically give new users 3 free credits"""
@@ -0,0 +1,126 @@
+"""
+OTP storage backends.
+
+The backend is chosen with ``settings.OTP_BACKEND``. ``CacheOTPBackend`` keeps
+codes in the configured cache so they expire on their own; ``DatabaseOTPBackend``
+keeps the original ``OTPCode`` table behaviour.
+"""
+import hmac
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+# Result codes returned by ``verify``
+OTP_VALID = 'valid'
+OTP_INVALID = 'invalid'
+OTP_EXPIRED = 'expired'
+
+
+def normalize_identifier(phone_or_email):
+    """Normalize a phone number or email so the same person maps to one key"""
+    value = (phone_or_email or '').strip()
+    if '@' in value:
+        return value.lower()
+    return value
+
+
+class BaseOTPBackend:
+    """Interface every OTP backend implements"""
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else settings.OTP_TTL_SECONDS
+
+    def issue(self, phone_or_email, otp_code):
+        """Store ``otp_code`` for the identifier, replacing any previous code"""
+        raise NotImplementedError
+
+    def verify(self, phone_or_email, otp_code):
+        """Check the code and consume it on success. Returns one of the OTP_* results."""
+        raise NotImplementedError
+
+
+class CacheOTPBackend(BaseOTPBackend):
+    """
+    Keeps one live code per identifier in the cache, expired natively.
+
+    The entry outlives the code by ``ttl`` so a late attempt gets OTP_EXPIRED
+    rather than OTP_INVALID. Every worker must share the cache (REDIS_URL).
+    """
+
+    key_prefix = 'otp'
+
+    def __init__(self, ttl=None, cache_alias=None):
+        super().__init__(ttl)
+        self.cache = caches[cache_alias or settings.OTP_CACHE_ALIAS]
+
+    def _key(self, phone_or_email):
+        return f'{self.key_prefix}:{normalize_identifier(phone_or_email)}'
+
+    def issue(self, phone_or_email, otp_code):
+        # A plain set overwrites the previous code, which invalidates it
+        entry = {'code': otp_code, 'expires_at': time.time() + self.ttl}
+        self.cache.set(self._key(phone_or_email), entry, timeout=self.ttl * 2)
+
+    def verify(self, phone_or_email, otp_code):
+        key = self._key(phone_or_email)
+        entry = self.cache.get(key)
+        if not isinstance(entry, dict) or not hmac.compare_digest(str(entry['code']), str(otp_code)):
+            return OTP_INVALID
+        if entry['expires_at'] <= time.time():
+            return OTP_EXPIRED
+
+        # Only the caller whose delete actually removed the key gets to use the
+        # code, so two concurrent verifications cannot both succeed.
+        if not self.cache.delete(key):
+            return OTP_INVALID
+        return OTP_VALID
+
+
+class DatabaseOTPBackend(BaseOTPBackend):
+    """Original behaviour: one OTPCode row per send"""
+
+    def issue(self, phone_or_email, otp_code):
+        from .models import OTPCode
+
+        # Mark old OTP codes as used
+        OTPCode.objects.filter(
+            phone_or_email=phone_or_email,
+            is_used=False
+        ).update(is_used=True)
+
+        OTPCode.objects.create(
+            phone_or_email=phone_or_email,
+            otp_code=otp_code,
+            expires_at=timezone.now() + timedelta(seconds=self.ttl)
+        )
+
+    def verify(self, phone_or_email, otp_code):
+        from .models import OTPCode
+
+        otp = OTPCode.objects.filter(
+            phone_or_email=phone_or_email,
+            otp_code=otp_code,
+            is_used=False
+        ).order_by('-created_at').first()
+
+        if not otp:
+            return OTP_INVALID
+
+        if otp.is_expired():
+            return OTP_EXPIRED
+
+        # Conditional update so a code can only be consumed once
+        consumed = OTPCode.objects.filter(pk=otp.pk, is_used=False).update(is_used=True)
+        if not consumed:
+            return OTP_INVALID
+        return OTP_VALID
+
+
+def get_otp_backend():
+    """Return an instance of the configured OTP backend"""
+    return import_string(settings.OTP_BACKEND)()
@@ -0,0 +1,113 @@
+"""
+Full-response cache for pages anonymous visitors see.
+
+``cache_anonymous_page('landing')`` stores the rendered response for visitors
+without a login, keyed by page name, language, host and a generation number.
+Signed-in users always get the dynamic render. A response that sets a cookie
+is never stored, including the CSRF and session cookies that middleware adds
+after the view returns. ``purge_page_cache`` bumps the generation, which drops
+every cached copy of a page at once.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.translation import get_language
+
+
+STATS_EVENTS = ('hit', 'miss', 'bypass')
+
+
+def _cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def _incr(cache, key):
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def _generation(cache, name):
+    return cache.get_or_set(f'pagecache:gen:{name}', 1, timeout=None)
+
+
+def purge_page_cache(name):
+    """Invalidate every cached variant of page ``name``"""
+    _incr(_cache(), f'pagecache:gen:{name}')
+
+
+def get_page_cache_stats(names):
+    """Return ``{(name, event): count}`` for hit/miss/bypass counters"""
+    keys = {f'pagecache:stats:{name}:{event}': (name, event) for name in names for event in STATS_EVENTS}
+    values = _cache().get_many(list(keys))
+    return {pair: values.get(key, 0) for key, pair in keys.items()}
+
+
+def _variant_key(request, name, generation):
+    # Everything the anonymous render depends on
+    parts = [
+        name,
+        str(generation),
+        settings.PAGE_CACHE_VERSION,
+        get_language() or '',
+        request.get_host(),
+        request.scheme,
+    ]
+    return 'pagecache:page:' + ':'.join(parts)
+
+
+def _cacheable(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.GET
+        and not request.user.is_authenticated
+    )
+
+
+def _sets_cookies(request, response):
+    if response.cookies:
+        return True
+    # CsrfViewMiddleware and SessionMiddleware add their cookies after the view
+    if request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+        return True
+    session = getattr(request, 'session', None)
+    return session is not None and session.modified
+
+
+def cache_anonymous_page(name):
+    """View decorator caching the full response for anonymous visitors"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            cache = _cache()
+            if not settings.PAGE_CACHE_ENABLED or not _cacheable(request):
+                _incr(cache, f'pagecache:stats:{name}:bypass')
+                return view_func(request, *args, **kwargs)
+
+            key = _variant_key(request, name, _generation(cache, name))
+            cached = cache.get(key)
+            if cached is not None:
+                _incr(cache, f'pagecache:stats:{name}:hit')
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Page-Cache'] = 'HIT'
+            else:
+                _incr(cache, f'pagecache:stats:{name}:miss')
+                response = view_func(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response = response.render()
+                if response.status_code == 200 and not _sets_cookies(request, response):
+                    cache.set(key, (response.content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+                response['X-Page-Cache'] = 'MISS'
+
+            # Shared caches must not hand the anonymous copy to a signed-in user
+            patch_vary_headers(response, ('Cookie', 'Accept-Language'))
+            return response
+        return wrapper
+    return decorator
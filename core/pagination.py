@@ -0,0 +1,39 @@
+"""
+Admin pagination for tables with millions of rows.
+
+An exact ``COUNT(*)`` has to visit every row (or index entry). For the
+unfiltered changelist of a large table ``EstimatedCountPaginator`` reports the
+planner's row estimate on PostgreSQL, or the highest primary key elsewhere;
+both are index or catalog lookups. Filtered lists, and tables below
+``ADMIN_ESTIMATED_COUNT_THRESHOLD``, keep the exact count.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections, router
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(queryset):
+    model = queryset.model
+    connection = connections[queryset.db or router.db_for_read(model)]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [model._meta.db_table])
+            row = cursor.fetchone()
+        # -1 until the table has been vacuumed or analyzed
+        if row and row[0] >= 0:
+            return row[0]
+    # Ids are never reused, so the highest one bounds the row count from above
+    return queryset.model._default_manager.using(queryset.db).aggregate(last=Max('pk'))['last'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        object_list = self.object_list
+        if not object_list.query.where:
+            estimate = estimated_row_count(object_list)
+            if estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
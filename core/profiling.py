@@ -0,0 +1,226 @@
+"""
+Opt-in sampling profiler for production requests.
+
+``ProfilingMiddleware`` profiles a random ``PROFILING_SAMPLE_RATE`` share of
+requests, plus any request from a staff user that carries the
+``PROFILING_HEADER`` header. While such a request runs, a ``StackSampler``
+thread reads the stack of the thread serving it every
+``PROFILING_INTERVAL_MS`` through ``sys._current_frames()``. Nothing is
+traced and the request thread does no extra work, so the cost is the sampler
+thread waking up. Stacks are stored folded (``a;b;c 12``), the input format of
+flamegraph.pl and speedscope, as ``RequestProfile`` rows; the admin renders
+them as a flame graph.
+
+Under ASGI, Django runs sync views in a worker thread rather than on the event
+loop, so the sampler is started from ``process_view``, which Django calls on
+that same worker thread; async views are sampled on the event loop thread. ``purge_request_profiles`` deletes rows older than
+``PROFILING_RETENTION_DAYS``.
+"""
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.html import format_html, format_html_join
+from rest_framework import exceptions
+
+from .authentication import SignedTokenAuthentication
+from .models import RequestProfile
+
+
+MAX_DEPTH = 128
+
+# Flame graph nodes narrower than this share of all samples are left out
+MIN_NODE_SHARE = 0.005
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}"
+
+
+def fold(frame, root_code=None):
+    """Root-first ``;``-joined stack of ``frame``, starting at ``root_code`` when it is on the stack"""
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(frame_label(frame))
+        if frame.f_code is root_code:
+            # Frames above the middleware are the server's, the same for every request
+            break
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler(threading.Thread):
+    """Counts the stacks of one thread at a fixed interval until stopped"""
+
+    def __init__(self, thread_id, interval, root_code=None):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold(frame, self.root_code)] += 1
+                self.samples += 1
+            del frame
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def folded(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
+
+
+def parse_folded(text):
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(' ')
+        if stack:
+            yield stack.split(';'), int(count)
+
+
+def build_tree(text):
+    """Nested ``{'name', 'value', 'children'}`` tree from folded stacks"""
+    root = {'name': 'all', 'value': 0, 'children': {}}
+    for frames, count in parse_folded(text):
+        root['value'] += count
+        node = root
+        for name in frames:
+            node = node['children'].setdefault(name, {'name': name, 'value': 0, 'children': {}})
+            node['value'] += count
+    return root
+
+
+def render_flamegraph(text):
+    """HTML flame graph (root on top) of folded stacks"""
+    root = build_tree(text)
+    total = root['value'] or 1
+
+    def render(node, parent_value):
+        children = [
+            child for child in sorted(node['children'].values(), key=lambda c: -c['value'])
+            if child['value'] / total >= MIN_NODE_SHARE
+        ]
+        return format_html(
+            '<div class="fg-node" style="width:{}%">'
+            '<div class="fg-frame" title="{} — {} samples ({}%)">{}</div>'
+            '<div class="fg-children">{}</div></div>',
+            f"{100 * node['value'] / parent_value:.3f}",
+            node['name'], node['value'], f"{100 * node['value'] / total:.1f}",
+            node['name'].rpartition('.')[2] if node is not root else 'all',
+            format_html_join('', '{}', ((render(child, node['value']),) for child in children)),
+        )
+
+    return render(root, total)
+
+
+def sampled(request):
+    """Cheap part of the decision: the random sample, or whether the header could apply"""
+    if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+        return True
+    return None if settings.PROFILING_HEADER in request.headers else False
+
+
+def is_staff_request(request):
+    # The header only counts for staff, from a session or a Bearer token
+    try:
+        result = SignedTokenAuthentication().authenticate(request)
+    except exceptions.AuthenticationFailed:
+        return False
+    user = result[0] if result else request.user
+    return user.is_authenticated and user.is_staff
+
+
+def wants_profile(request):
+    decision = sampled(request)
+    return is_staff_request(request) if decision is None else decision
+
+
+def save_profile(request, response, sampler, duration):
+    match = getattr(request, 'resolver_match', None)
+    user = getattr(request, 'user', None)
+    RequestProfile.objects.create(
+        url_name=(match.url_name or match.view_name) if match else '',
+        path=request.path[:500],
+        method=request.method,
+        status_code=response.status_code,
+        duration_ms=round(duration * 1000),
+        interval_ms=settings.PROFILING_INTERVAL_MS,
+        sample_count=sampler.samples,
+        user_id=user.pk if user is not None and user.is_authenticated else None,
+        folded_stacks=sampler.folded(),
+    )
+
+
+class ProfilingMiddleware:
+    """Profile sampled requests and store the result as a RequestProfile"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def start(self):
+        root_code = sys._getframe(1).f_code
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL_MS / 1000, root_code)
+        sampler.start()
+        return sampler, time.perf_counter()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not wants_profile(request):
+            return self.get_response(request)
+        sampler, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        save_profile(request, response, sampler, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        decision = sampled(request)
+        if decision is None:
+            # Only staff checks touch the session or database
+            decision = await sync_to_async(is_staff_request)(request)
+        if not decision:
+            return await self.get_response(request)
+        # The event loop thread serves other requests too; process_view starts
+        # the sampler on the thread that runs this request's view
+        request._profiler = None
+        request._profiler_loop_thread = threading.get_ident()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            sampler = request._profiler
+            if sampler is not None:
+                sampler.stop()
+        if sampler is not None:
+            await sync_to_async(save_profile)(request, response, sampler, time.perf_counter() - started)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Sync, so under ASGI Django runs it in the thread the sync view will use
+        if getattr(request, '_profiler', False) is not None:
+            return None
+        thread_id = threading.get_ident()
+        if iscoroutinefunction(view_func):
+            thread_id = request._profiler_loop_thread
+        request._profiler = StackSampler(thread_id, settings.PROFILING_INTERVAL_MS / 1000)
+        request._profiler.start()
+        return None
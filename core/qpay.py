@@ -0,0 +1,76 @@
+"""
+Async QPay merchant API client.
+
+Every call takes an ``httpx.AsyncClient`` so one view can reuse a connection
+for the token request and the call that follows it.
+"""
+from django.conf import settings
+
+from .timing import timed
+
+
+API_URL = 'https://merchant.qpay.mn/v2'
+
+
+class QPayError(Exception):
+    pass
+
+
+def client():
+    """New AsyncClient; use it as ``async with qpay.client() as http:``"""
+    import httpx
+
+    return httpx.AsyncClient(base_url=API_URL, timeout=settings.QPAY_TIMEOUT)
+
+
+async def post(http, url, **kwargs):
+    with timed('qpay'):
+        return await http.post(url, **kwargs)
+
+
+async def get_access_token(http):
+    """Get QPay access token"""
+    response = await post(http, '/auth/token', auth=(settings.QPAY_USERNAME, settings.QPAY_PASSWORD))
+    if response.status_code != 200:
+        raise QPayError(f"Failed to get QPay access token: {response.text}")
+    return response.json()['access_token']
+
+
+async def create_invoice(http, order, package):
+    """Create QPay invoice for an order"""
+    access_token = await get_access_token(http)
+    callback_url = f"{settings.QPAY_CALLBACK_BASE_URL}/api/qpay-webhook/?invoiceid={order.id}"
+    response = await post(
+        http,
+        '/invoice',
+        headers={'Authorization': f"Bearer {access_token}"},
+        json={
+            "invoice_code": settings.QPAY_INVOICE_CODE,
+            "sender_invoice_no": str(order.id),
+            "invoice_receiver_code": "terminal",
+            "invoice_description": f"ReHome - {package.name} багц ({package.credits} кредит)",
+            "sender_branch_code": "Credits",
+            "amount": str(int(order.amount)),
+            "callback_url": callback_url,
+        },
+    )
+    if response.status_code != 200:
+        raise QPayError(f"Failed to create QPay invoice: {response.text}")
+    return response.json()
+
+
+async def check_payment(http, invoice_id):
+    """Return the payment check result for a QPay invoice"""
+    access_token = await get_access_token(http)
+    response = await post(
+        http,
+        '/payment/check',
+        headers={'Authorization': f"Bearer {access_token}"},
+        json={
+            "object_type": "INVOICE",
+            "object_id": invoice_id,
+        },
+    )
+    if response.status_code != 200:
+        raise QPayError(f"QPay төлбөрийн статус шалгахэд алдаа: {response.text}")
+    return response.json()
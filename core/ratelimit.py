@@ -0,0 +1,128 @@
+"""
+Cache-backed sliding-window rate limiting for the OTP endpoints.
+
+Budgets live in ``settings.OTP_RATE_LIMITS``, one entry per scope (``send``,
+``verify``) with separate limits per identifier and per client IP.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from .otp import normalize_identifier
+
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window counter.
+
+    Each key keeps a counter for the current and previous fixed window; the
+    previous window is weighted by how much of it still overlaps the sliding
+    window. This needs two cache keys per limit and only atomic increments.
+    """
+
+    key_prefix = 'rl'
+
+    def __init__(self, cache_alias=None):
+        self.cache = caches[cache_alias or settings.RATELIMIT_CACHE_ALIAS]
+
+    def hit(self, key, limit, window):
+        """Record one hit for ``key``. Returns ``(allowed, retry_after_seconds)``."""
+        now = time.time()
+        current = int(now // window)
+        current_key = f'{self.key_prefix}:{key}:{current}'
+        previous_key = f'{self.key_prefix}:{key}:{current - 1}'
+
+        # Counter lives for two windows so it can act as the "previous" one
+        self.cache.add(current_key, 0, timeout=window * 2)
+        try:
+            count = self.cache.incr(current_key)
+        except ValueError:
+            # Key expired between add and incr
+            self.cache.set(current_key, 1, timeout=window * 2)
+            count = 1
+        previous = self.cache.get(previous_key, 0)
+
+        elapsed = (now % window) / window
+        estimated = previous * (1 - elapsed) + count
+        if estimated <= limit:
+            return True, 0
+        return False, int(window - (now % window)) + 1
+
+
+def _hash(value):
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+def record_rejection(scope, dimension):
+    """Count a rejected request for the metrics counters"""
+    cache = caches[settings.RATELIMIT_CACHE_ALIAS]
+    key = f'rl:rejected:{scope}:{dimension}'
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_rejection_counts():
+    """Return ``{(scope, dimension): count}`` for every configured limit"""
+    cache = caches[settings.RATELIMIT_CACHE_ALIAS]
+    keys = {
+        f'rl:rejected:{scope}:{dimension}': (scope, dimension)
+        for scope, limits in settings.OTP_RATE_LIMITS.items()
+        for dimension in limits
+    }
+    values = cache.get_many(list(keys))
+    return {pair: values.get(key, 0) for key, pair in keys.items()}
+
+
+class OTPRateThrottle(BaseThrottle):
+    """
+    Applies the identifier and IP budgets of ``scope``.
+
+    Both limits are always evaluated, so the rejection path does the same
+    amount of work whatever the request contains, and nothing touches the
+    database.
+    """
+
+    scope = None
+
+    def __init__(self):
+        self.limiter = SlidingWindowLimiter()
+        self.retry_after = None
+
+    def allow_request(self, request, view):
+        limits = settings.OTP_RATE_LIMITS.get(self.scope, {})
+        identifier = request.data.get('phone_or_email', '')
+        if not isinstance(identifier, str):
+            identifier = ''
+        keys = {
+            'identifier': _hash(normalize_identifier(identifier)),
+            'ip': _hash(self.get_ident(request) or ''),
+        }
+
+        allowed = True
+        waits = []
+        for dimension, (limit, window) in limits.items():
+            ok, wait = self.limiter.hit(f'{self.scope}:{dimension}:{keys[dimension]}', limit, window)
+            if not ok:
+                allowed = False
+                waits.append(wait)
+                record_rejection(self.scope, dimension)
+
+        self.retry_after = max(waits) if waits else None
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class OTPSendThrottle(OTPRateThrottle):
+    scope = 'send'
+
+
+class OTPVerifyThrottle(OTPRateThrottle):
+    scope = 'verify'
@@ -0,0 +1,243 @@
+"""
+Responsive renditions of the bundled static images.
+
+``build_renditions`` resizes every image under ``settings.RENDITIONS['sources']``
+(directories inside ``static/``) to each configured width that is not larger
+than the source, in AVIF (when the encoder is available), WEBP and the
+source's own format. Results go to ``static/<output_dir>/`` together with a
+``manifest.json`` that maps each source to its renditions. Sources whose
+content hash and build options match the manifest are skipped, so re-running
+the build only touches changed files.
+
+The ``renditions`` template tag library reads the manifest to emit
+``srcset``/``sizes``; without a manifest it falls back to the original file.
+"""
+import hashlib
+import json
+import os
+import posixpath
+
+from django.conf import settings
+from django.templatetags.static import static
+
+from .imaging import EXTENSIONS, avif_supported, encode_image
+
+
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+MANIFEST_NAME = 'manifest.json'
+
+FORMAT_BY_EXTENSION = {
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.png': 'PNG',
+    '.webp': 'WEBP',
+}
+
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+}
+
+# Order of <source> elements; browsers take the first type they support
+PREFERRED_FORMATS = ('AVIF', 'WEBP', 'JPEG', 'PNG')
+
+_manifest_cache = {'mtime': None, 'data': {}}
+
+
+def static_root():
+    return os.path.join(settings.BASE_DIR, 'static')
+
+
+def output_root():
+    return os.path.join(static_root(), settings.RENDITIONS['output_dir'])
+
+
+def manifest_path():
+    return os.path.join(output_root(), MANIFEST_NAME)
+
+
+def load_manifest():
+    """Parsed manifest, re-read only when the file changes"""
+    try:
+        mtime = os.stat(manifest_path()).st_mtime
+    except FileNotFoundError:
+        return {}
+    if _manifest_cache['mtime'] != mtime:
+        with open(manifest_path()) as f:
+            _manifest_cache['data'] = json.load(f)
+        _manifest_cache['mtime'] = mtime
+    return _manifest_cache['data']
+
+
+def write_manifest(manifest):
+    os.makedirs(output_root(), exist_ok=True)
+    tmp_path = manifest_path() + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path())
+
+
+def iter_sources():
+    """Yield static-relative paths of every source image"""
+    root = static_root()
+    for source_dir in settings.RENDITIONS['sources']:
+        top = os.path.join(root, source_dir)
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(SOURCE_EXTENSIONS):
+                    path = os.path.join(dirpath, filename)
+                    yield os.path.relpath(path, root).replace(os.sep, '/')
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def output_formats(source):
+    formats = ['WEBP']
+    if avif_supported():
+        formats.insert(0, 'AVIF')
+    source_format = FORMAT_BY_EXTENSION[posixpath.splitext(source)[1].lower()]
+    if source_format not in formats:
+        formats.append(source_format)
+    return formats
+
+
+def build_options():
+    """Everything besides the source bytes that changes the output"""
+    options = settings.RENDITIONS
+    return {
+        'widths': sorted(options['widths']),
+        'quality': options['quality'],
+        'effort': options['effort'],
+        'avif': avif_supported(),
+    }
+
+
+def rendition_name(source, width, fmt):
+    """``img/hero.jpg`` -> ``renditions/img/hero-640.webp`` (static-relative)"""
+    stem = posixpath.splitext(source)[0]
+    return f"{settings.RENDITIONS['output_dir']}/{stem}-{width}.{EXTENSIONS[fmt]}"
+
+
+def output_path(name):
+    return os.path.join(static_root(), *name.split('/'))
+
+
+def entry_outputs(entry):
+    for candidates in entry.get('formats', {}).values():
+        for name, _width in candidates:
+            yield name
+
+
+def is_current(entry, digest, options):
+    return (
+        entry.get('sha256') == digest
+        and entry.get('options') == options
+        and all(os.path.exists(output_path(name)) for name in entry_outputs(entry))
+    )
+
+
+def remove_outputs(entry):
+    for name in entry_outputs(entry):
+        try:
+            os.remove(output_path(name))
+        except FileNotFoundError:
+            pass
+
+
+def render_source(source, options):
+    """Write every rendition of ``source`` and return its manifest entry"""
+    from PIL import Image
+
+    with Image.open(os.path.join(static_root(), source)) as image:
+        image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    # Never upscale; the source width is always the largest candidate
+    widths = sorted({w for w in options['widths'] if w < image.width} | {image.width})
+    formats = {}
+    for fmt in output_formats(source):
+        candidates = []
+        for width in widths:
+            if width == image.width:
+                resized = image
+            else:
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS)
+            name = rendition_name(source, width, fmt)
+            path = output_path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(encode_image(resized, fmt, options['quality'].get(fmt, 80), options['effort']))
+            os.replace(path + '.tmp', path)
+            candidates.append([name, width])
+        formats[fmt.lower()] = candidates
+
+    return {
+        'width': image.width,
+        'height': image.height,
+        'formats': formats,
+    }
+
+
+def build_renditions(force=False, log=None):
+    """
+    Bring the renditions in line with the sources.
+
+    Returns ``(built, skipped, removed)`` counts of source images.
+    """
+    log = log or (lambda message: None)
+    manifest = load_manifest()
+    options = build_options()
+    result = {}
+    built = skipped = 0
+
+    for source in iter_sources():
+        digest = file_hash(os.path.join(static_root(), source))
+        entry = manifest.get(source)
+        if entry and not force and is_current(entry, digest, options):
+            result[source] = entry
+            skipped += 1
+            continue
+        if entry:
+            remove_outputs(entry)
+        log(f'Building {source}')
+        result[source] = {'sha256': digest, 'options': options, **render_source(source, options)}
+        built += 1
+
+    removed = 0
+    for source, entry in manifest.items():
+        if source not in result:
+            log(f'Removing renditions of {source}')
+            remove_outputs(entry)
+            removed += 1
+
+    write_manifest(result)
+    return built, skipped, removed
+
+
+def srcsets(source):
+    """
+    ``{'width': w, 'height': h, 'sources': [(mime, srcset), ...]}`` for a
+    static-relative source path, or None when it has no renditions.
+    """
+    entry = load_manifest().get(source)
+    if not entry:
+        return None
+    sources = []
+    for fmt in PREFERRED_FORMATS:
+        candidates = entry['formats'].get(fmt.lower())
+        if candidates:
+            srcset = ', '.join(f"{static(name)} {width}w" for name, width in candidates)
+            sources.append((MIME_TYPES[fmt], srcset))
+    return {'width': entry['width'], 'height': entry['height'], 'sources': sources}
@@ -0,0 +1,179 @@
+"""
+Daily analytics rollups.
+
+``DailyGenerationStat``, ``DailyCreditStat`` and ``DailyRevenueStat`` answer
+the reporting questions (generations per style per day, revenue per package
+per month...) without scanning the hot tables. ``update_rollups`` keeps them
+current and is meant to run from cron (``manage.py update_rollups``):
+
+* ``GeneratedImage`` and ``CreditTransaction`` rows are never updated, so
+  their rollups are additive. Each batch aggregates the rows with ids above
+  the ``RollupWatermark`` per day and key, adds the sums to the rollup rows
+  and moves the watermark in the same transaction.
+* Orders change status after they are created (paid, refunded), so the
+  revenue rollup re-aggregates the days, by order date, of the orders updated
+  since its watermark.
+
+Rows younger than ``ROLLUP_LAG_SECONDS`` wait for the next run: ids and
+timestamps are assigned before commit, so a row committed late could
+otherwise end up behind the watermark.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import (
+    CreditTransaction, DailyCreditStat, DailyGenerationStat, DailyRevenueStat,
+    GeneratedImage, Order, RollupWatermark,
+)
+
+
+# name: (source model, rollup model, key field, {rollup field: aggregate})
+ADDITIVE_ROLLUPS = {
+    'generations': (GeneratedImage, DailyGenerationStat, 'style', {
+        'generations': Count('id'),
+        'output_bytes': Sum('output_bytes'),
+    }),
+    'credits': (CreditTransaction, DailyCreditStat, 'transaction_type', {
+        'transactions': Count('id'),
+        'credits': Sum('amount'),
+    }),
+}
+
+# metric: (rollup model, key fields in results, summed fields)
+STATS = {
+    'generations': (DailyGenerationStat, ['style'], ['generations', 'output_bytes']),
+    'credits': (DailyCreditStat, ['transaction_type'], ['transactions', 'credits']),
+    'revenue': (DailyRevenueStat, ['package', 'package__name'], ['orders', 'revenue']),
+}
+
+PERIODS = {
+    'day': F('date'),
+    'month': TruncMonth('date'),
+}
+
+
+def get_watermark(name):
+    """Locked watermark row; call inside a transaction"""
+    return RollupWatermark.objects.select_for_update().get_or_create(name=name)[0]
+
+
+def add_to_rollup(rollup, key, rows, fields):
+    """Add aggregated ``rows`` (``day``, key, fields) to the matching rollup rows"""
+    existing = {
+        (stat.date, getattr(stat, key)): stat
+        for stat in rollup.objects.filter(date__in={row['day'] for row in rows})
+    }
+    created, changed = [], []
+    for row in rows:
+        stat = existing.get((row['day'], row[key]))
+        if stat is None:
+            created.append(rollup(date=row['day'], **{key: row[key]}, **{f: row[f] or 0 for f in fields}))
+        else:
+            for field in fields:
+                setattr(stat, field, getattr(stat, field) + (row[field] or 0))
+            changed.append(stat)
+    rollup.objects.bulk_create(created)
+    rollup.objects.bulk_update(changed, fields)
+
+
+def update_additive(name, cutoff, batch_size):
+    """Fold rows added since the watermark into the rollup; returns the number of rows read"""
+    source, rollup, key, totals = ADDITIVE_ROLLUPS[name]
+    count_field = next(iter(totals))
+
+    with transaction.atomic():
+        last_id = get_watermark(name).last_id
+    # Stop before the first row that is still too young, so none is skipped later
+    young = source.objects.filter(id__gt=last_id, created_at__gte=cutoff).aggregate(first=Min('id'))['first']
+    upper = young - 1 if young else source.objects.aggregate(last=Max('id'))['last'] or 0
+
+    read = 0
+    while last_id < upper:
+        batch_end = min(last_id + batch_size, upper)
+        with transaction.atomic():
+            watermark = get_watermark(name)
+            if watermark.last_id != last_id:
+                # Another run got here first
+                break
+            rows = list(
+                source.objects.filter(id__gt=last_id, id__lte=batch_end)
+                .annotate(day=TruncDate('created_at'))
+                .values('day', key)
+                .annotate(**totals)
+                .order_by()
+            )
+            add_to_rollup(rollup, key, rows, list(totals))
+            watermark.last_id = batch_end
+            watermark.save(update_fields=['last_id', 'updated_at'])
+        read += sum(row[count_field] for row in rows)
+        last_id = batch_end
+    return read
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def update_revenue(cutoff):
+    """Rebuild the revenue of every day with an order updated since the watermark; returns the day count"""
+    with transaction.atomic():
+        watermark = get_watermark('revenue')
+        changed = Order.objects.filter(updated_at__lt=cutoff)
+        if watermark.last_updated_at:
+            changed = changed.filter(updated_at__gte=watermark.last_updated_at)
+        days = set(changed.annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct())
+
+        if days:
+            in_days = Q()
+            for day in days:
+                start, end = day_bounds(day)
+                in_days |= Q(created_at__gte=start, created_at__lt=end)
+            rows = (
+                Order.objects.filter(in_days, status='paid')
+                .annotate(day=TruncDate('created_at'))
+                .values('day', 'package')
+                .annotate(orders=Count('id'), revenue=Sum('amount'))
+                .order_by()
+            )
+            DailyRevenueStat.objects.filter(date__in=days).delete()
+            DailyRevenueStat.objects.bulk_create(
+                DailyRevenueStat(date=row['day'], package_id=row['package'], orders=row['orders'], revenue=row['revenue'])
+                for row in rows
+            )
+
+        watermark.last_updated_at = cutoff
+        watermark.save(update_fields=['last_updated_at', 'updated_at'])
+    return len(days)
+
+
+def update_rollups(batch_size=50000):
+    """Bring every rollup up to date; returns ``{name: rows read or days rebuilt}``"""
+    cutoff = timezone.now() - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+    results = {name: update_additive(name, cutoff, batch_size) for name in ADDITIVE_ROLLUPS}
+    results['revenue'] = update_revenue(cutoff)
+    return results
+
+
+def reset_rollups():
+    """Drop all rollup rows and watermarks; the next update rebuilds from scratch"""
+    with transaction.atomic():
+        for model in (DailyGenerationStat, DailyCreditStat, DailyRevenueStat, RollupWatermark):
+            model.objects.all().delete()
+
+
+def query_stats(metric, start, end, period='day'):
+    """Rollup totals between two dates (inclusive), per ``period`` and key"""
+    rollup, keys, fields = STATS[metric]
+    return list(
+        rollup.objects.filter(date__gte=start, date__lte=end)
+        .annotate(period=PERIODS[period])
+        .values('period', *keys)
+        .annotate(**{field: Sum(field) for field in fields})
+        .order_by('period', *keys)
+    )
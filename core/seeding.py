@@ -0,0 +1,281 @@
+"""
+Synthetic data at scale for ``manage.py seed_data --users N``.
+
+Rows are built chunk by chunk and written with ``bulk_create``, one
+transaction per chunk, so millions of rows take minutes and memory only
+holds a few numbers per user. The distributions follow production:
+
+* signups grow over the period, so recent days see more of them;
+* activity per user is heavy tailed: most users render a few images, a few
+  render hundreds, and the same users buy most packages;
+* events peak in the Ulaanbaatar evening;
+* styles and packages are weighted toward the popular ones; most orders are
+  paid, the rest pending, cancelled or failed.
+
+Credit transactions follow from the rest (the welcome bonus of each user, an
+``add`` per paid order, a ``use`` per image), so balances and rollups stay
+consistent. Orders are drawn before images; a user who runs out of credits
+buys a package shortly before the next render, so heavy users get extra paid
+orders and no balance goes negative. Every run gets a tag from ``secrets`` in
+its usernames and identities, so it can be repeated on the same database,
+with the same ``--seed`` too.
+"""
+import math
+import random
+import secrets
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .imaging import encode_image
+from .models import CreditTransaction, GeneratedImage, Order, Package, UserIdentity
+from .storage import shard_path
+
+
+DAY = 24 * 3600
+
+# Share of events per UTC hour; the peak is 19:00-23:00 in Ulaanbaatar (UTC+8)
+HOUR_WEIGHTS = [5, 6, 6, 6, 5, 4, 4, 4, 3, 2, 3, 6, 9, 11, 12, 13, 12, 8, 3, 1, 1, 1, 1, 2]
+
+STYLE_WEIGHTS = {
+    'Modern': 30, 'Minimal': 18, 'Scandinavian': 15, 'Luxury': 12,
+    'Industrial': 8, 'Traditional': 7, 'Bohemian': 5, 'Rustic': 5,
+}
+
+# Cheapest package first (Package.Meta.ordering is by price)
+PACKAGE_WEIGHTS = [45, 30, 17, 8]
+
+ORDER_STATUS_WEIGHTS = {'paid': 72, 'pending': 10, 'cancelled': 10, 'failed': 8}
+
+RENDER_SIZES = [(1024, 768), (1024, 1024), (768, 1024), (1280, 720)]
+
+PLACEHOLDER_SIZE = (64, 48)
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Keep the ``created_at``/``updated_at`` set on objects instead of auto_now(_add)"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def from_epoch(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def chunks(total, size):
+    for start in range(0, total, size):
+        yield range(start, min(start + size, total))
+
+
+class Seeder:
+    """One synthetic data run; ``run()`` writes users, images and orders and returns their counts"""
+
+    def __init__(self, days=365, chunk_size=5000, media=False, seed=None, log=None):
+        self.rng = random.Random(seed)
+        # History ends before the rollup lag, so update_rollups can read all of it at once
+        self.now = time.time() - settings.ROLLUP_LAG_SECONDS
+        self.start = self.now - days * DAY
+        self.chunk_size = chunk_size
+        self.media = media
+        self.log = log or (lambda message: None)
+        # Not from self.rng: a repeated --seed must not reuse usernames
+        self.tag = secrets.token_hex(3)
+        self.hour_weights = list(accumulate(HOUR_WEIGHTS))
+        self.styles = list(STYLE_WEIGHTS)
+        self.style_weights = list(accumulate(STYLE_WEIGHTS.values()))
+        self.statuses = list(ORDER_STATUS_WEIGHTS)
+        self.status_weights = list(accumulate(ORDER_STATUS_WEIGHTS.values()))
+        self.placeholders = {}
+        self.packages = []
+        self.package_weights = []
+        # Parallel lists, one entry per seeded user
+        self.user_ids = []
+        self.joined = []
+        self.activity = []
+        self.balances = []
+        self.counts = {'images': 0, 'orders': 0}
+
+    def event_time(self, index):
+        """A moment between the user's signup and now, at a likely hour of the day"""
+        joined = self.joined[index]
+        moment = joined + (self.now - joined) * self.rng.random()
+        hour = self.rng.choices(range(24), cum_weights=self.hour_weights)[0]
+        moment = moment - moment % DAY + hour * 3600 + self.rng.random() * 3600
+        return min(max(moment, joined), self.now)
+
+    def pick_users(self, count):
+        return self.rng.choices(range(len(self.user_ids)), cum_weights=self.activity, k=count)
+
+    def write(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.chunk_size)
+
+    def create_users(self, total):
+        password = make_password(None)
+        # Tag-derived block of numbers, so phones of different runs never collide
+        phone_base = 10 ** 11 + int(self.tag, 16) * 10 ** 7
+        weights = []
+        for batch in chunks(total, self.chunk_size):
+            users, identities, bonuses = [], [], []
+            for i in batch:
+                # Density grows linearly over the period
+                joined = self.start + (self.now - self.start) * math.sqrt(self.rng.random())
+                users.append(User(
+                    username=f'seed_{self.tag}_{i}',
+                    email=f'seed_{self.tag}_{i}@example.com',
+                    password=password,
+                    date_joined=from_epoch(joined),
+                ))
+                self.joined.append(joined)
+                self.balances.append(3)
+                weights.append(self.rng.lognormvariate(0, 1.5))
+            with transaction.atomic():
+                self.write(User, users)
+                for user, joined in zip(users, self.joined[-len(users):]):
+                    created_at = from_epoch(joined)
+                    if self.rng.random() < 0.7:
+                        identity = UserIdentity(user=user, kind='phone', value=f'+976{phone_base + len(self.user_ids)}')
+                    else:
+                        identity = UserIdentity(user=user, kind='email', value=user.email)
+                    identity.created_at = created_at
+                    identities.append(identity)
+                    bonuses.append(CreditTransaction(
+                        user=user, amount=3, transaction_type='add',
+                        description='Welcome bonus - 3 free credits', created_at=created_at,
+                    ))
+                    self.user_ids.append(user.pk)
+                self.write(UserIdentity, identities)
+                self.write(CreditTransaction, bonuses)
+            self.log(f'Users: {batch.stop}/{total}')
+        self.activity = list(accumulate(weights))
+
+    def placeholder(self, style):
+        """Tiny WEBP, one colour per style"""
+        if style not in self.placeholders:
+            from PIL import Image
+
+            color = tuple(self.rng.randrange(40, 220) for _ in range(3))
+            self.placeholders[style] = encode_image(Image.new('RGB', PLACEHOLDER_SIZE, color), 'WEBP', 50, 0)
+        return self.placeholders[style]
+
+    def media_names(self, style):
+        name = uuid.uuid4().hex
+        original = shard_path('original_images', f'original_seed_{name}.webp')
+        generated = shard_path('generated_images', f'generated_seed_{name}.webp')
+        if self.media:
+            data = self.placeholder(style)
+            original = default_storage.save(original, ContentFile(data))
+            generated = default_storage.save(generated, ContentFile(data))
+        return original, generated
+
+    def create_images(self, total):
+        skipped = 0
+        for batch in chunks(total, self.chunk_size):
+            images, uses, orders, credits = [], [], [], []
+            for index in self.pick_users(len(batch)):
+                created = self.event_time(index)
+                if not self.balances[index]:
+                    if not self.packages:
+                        skipped += 1
+                        continue
+                    # Out of credits: buy a package a few minutes before rendering
+                    package = self.pick_package()
+                    bought = max(created - self.rng.uniform(60, 900), self.joined[index])
+                    self.add_order(index, package, 'paid', bought, orders, credits)
+                self.balances[index] -= 1
+                style = self.rng.choices(self.styles, cum_weights=self.style_weights)[0]
+                created_at = from_epoch(created)
+                width, height = self.rng.choice(RENDER_SIZES)
+                original, generated = self.media_names(style)
+                images.append(GeneratedImage(
+                    user_id=self.user_ids[index],
+                    original_image=original,
+                    generated_image=generated,
+                    style=style,
+                    output_format='webp',
+                    output_bytes=int(self.rng.lognormvariate(12, 0.4)),
+                    output_width=width,
+                    output_height=height,
+                    created_at=created_at,
+                ))
+                uses.append(CreditTransaction(
+                    user_id=self.user_ids[index], amount=1, transaction_type='use',
+                    description=f'Generated {style} style image', created_at=created_at,
+                ))
+            with transaction.atomic():
+                self.write(GeneratedImage, images)
+                self.write(Order, orders)
+                self.write(CreditTransaction, credits + uses)
+            self.counts['images'] += len(images)
+            self.log(f'Images: {batch.stop}/{total}')
+        if skipped:
+            self.log(f'Skipped {skipped} images of users without credits (no active packages to buy)')
+
+    def pick_package(self):
+        return self.rng.choices(self.packages, cum_weights=self.package_weights)[0]
+
+    def add_order(self, index, package, status, created, orders, credits):
+        # Paid within a few minutes; others are closed later
+        updated = min(created + self.rng.uniform(30, 600 if status == 'paid' else 3 * DAY), self.now)
+        self.counts['orders'] += 1
+        orders.append(Order(
+            user_id=self.user_ids[index],
+            package=package,
+            amount=package.price,
+            status=status,
+            qpay_invoice_id=f'seed-{uuid.uuid4().hex}',
+            created_at=from_epoch(created),
+            updated_at=from_epoch(updated),
+        ))
+        if status == 'paid':
+            credits.append(CreditTransaction(
+                user_id=self.user_ids[index], amount=package.credits, transaction_type='add',
+                description=f'Purchased {package.name} package - {package.credits} credits',
+                created_at=from_epoch(updated),
+            ))
+            self.balances[index] += package.credits
+
+    def create_orders(self, total):
+        if not self.packages:
+            return
+        for batch in chunks(total, self.chunk_size):
+            orders, credits = [], []
+            for index in self.pick_users(len(batch)):
+                status = self.rng.choices(self.statuses, cum_weights=self.status_weights)[0]
+                self.add_order(index, self.pick_package(), status, self.event_time(index), orders, credits)
+            with transaction.atomic():
+                self.write(Order, orders)
+                self.write(CreditTransaction, credits)
+            self.log(f'Orders: {batch.stop}/{total}')
+
+    def run(self, users, images, orders):
+        with explicit_timestamps(CreditTransaction, GeneratedImage, Order, UserIdentity):
+            self.create_users(users)
+            if self.user_ids:
+                self.packages = list(Package.objects.filter(is_active=True).order_by('price'))
+                self.package_weights = list(accumulate(
+                    PACKAGE_WEIGHTS[:len(self.packages)] + [1] * (len(self.packages) - len(PACKAGE_WEIGHTS))
+                ))
+                # Purchases first, so renders know which users still have credits
+                self.create_orders(orders)
+                self.create_images(images)
+        return self.counts
@@ -1,7 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.files.storage import default_storage
 from django.db.models import Sum
-from .models import CreditTransaction, GeneratedImage, Package, Order
+from django.utils import timezone
+from datetime import timedelta
+from .history import decode_cursor
+from .media import signed_media_url
+from .storage import ALLOWED_UPLOAD_TYPES, is_user_upload_key
+from .models import CreditTransaction, GeneratedImage, Package, Order, UploadSession, UserIdentity
+from .otp import normalize_identifier
+from .rollups import PERIODS
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -12,6 +21,15 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'credit_balance', 'date_joined']
         read_only_fields = ['id', 'credit_balance', 'date_joined']
     
+    def validate_email(self, value):
+        # The email logs its owner in via OTP, so it cannot be someone else's
+        taken = UserIdentity.objects.filter(value=normalize_identifier(value))
+        if self.instance is not None:
+            taken = taken.exclude(user=self.instance)
+        if value and taken.exists():
+            raise serializers.ValidationError('This email belongs to another account')
+        return value
+    
     def get_credit_balance(self, obj):
         """Calculate user's current credit balance"""
         total_added = CreditTransaction.objects.filter(
@@ -32,18 +50,117 @@ class CreditTransactionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+class MediaFileField(serializers.ImageField):
+    """Stored image that is rendered as an expiring signed URL when MEDIA_SIGNED_URLS is on"""
+    
+    def to_representation(self, value):
+        if value and settings.MEDIA_SIGNED_URLS and settings.MEDIA_STORAGE == 'local':
+            url = signed_media_url(value.name)
+            request = self.context.get('request')
+            return request.build_absolute_uri(url) if request else url
+        return super().to_representation(value)
+
+
 class GeneratedImageSerializer(serializers.ModelSerializer):
+    original_image = MediaFileField(read_only=True)
+    generated_image = MediaFileField(read_only=True)
+    
     class Meta:
         model = GeneratedImage
-        fields = ['id', 'original_image', 'generated_image', 'style', 'room_type', 'description', 'created_at']
+        fields = ['id', 'original_image', 'generated_image', 'style', 'room_type', 'description',
+                  'output_format', 'output_width', 'output_height', 'created_at']
         read_only_fields = ['id', 'created_at']
 
 
 class ImageGenerationSerializer(serializers.Serializer):
-    image = serializers.ImageField()
+    image = serializers.ImageField(required=False)
+    upload_key = serializers.CharField(required=False)
+    upload_id = serializers.UUIDField(required=False)
     style = serializers.CharField()
     room_type = serializers.CharField(required=False, allow_blank=True)
     description = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate_upload_key(self, value):
+        """Key returned by /api/upload-intent/; must belong to the requesting user"""
+        user = self.context['request'].user
+        if not is_user_upload_key(user, value) or not default_storage.exists(value):
+            raise serializers.ValidationError('Upload not found')
+        return value
+    
+    def validate_upload_id(self, value):
+        """Finished chunked upload of the requesting user"""
+        session = UploadSession.objects.filter(
+            pk=value, user=self.context['request'].user, status='complete'
+        ).first()
+        if not session:
+            raise serializers.ValidationError('Upload not found or not complete')
+        return session
+    
+    def validate(self, attrs):
+        sources = [name for name in ('image', 'upload_key', 'upload_id') if attrs.get(name)]
+        if len(sources) != 1:
+            raise serializers.ValidationError('Provide exactly one of image, upload_key or upload_id')
+        
+        session = attrs.pop('upload_id', None)
+        if session:
+            attrs['upload_key'] = session.upload_key
+        return attrs
+
+
+class UploadIntentSerializer(serializers.Serializer):
+    filename = serializers.CharField(required=False, allow_blank=True)
+    content_type = serializers.ChoiceField(choices=list(ALLOWED_UPLOAD_TYPES))
+    size = serializers.IntegerField(min_value=1)
+    
+    def validate_size(self, value):
+        if value > settings.UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(f'File is larger than {settings.UPLOAD_MAX_BYTES} bytes')
+        return value
+
+
+class HistoryQuerySerializer(serializers.Serializer):
+    """Query parameters of /api/history/"""
+    q = serializers.CharField(required=False, allow_blank=True, max_length=200)
+    style = serializers.CharField(required=False, allow_blank=True)
+    room_type = serializers.CharField(required=False, allow_blank=True)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    cursor = serializers.CharField(required=False, allow_blank=True)
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+    
+    def validate_cursor(self, value):
+        if value:
+            try:
+                decode_cursor(value)
+            except ValueError:
+                raise serializers.ValidationError('Invalid cursor')
+        return value
+    
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError('start is after end')
+        return attrs
+
+
+class StatsQuerySerializer(serializers.Serializer):
+    """Query parameters of /api/stats/<metric>/; the range defaults to the last 30 days"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    period = serializers.ChoiceField(choices=list(PERIODS), required=False, default='day')
+    
+    def validate(self, attrs):
+        attrs.setdefault('end', timezone.localdate())
+        attrs.setdefault('start', attrs['end'] - timedelta(days=29))
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError('start is after end')
+        return attrs
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """Query parameters of /api/export/: the part after image id ``after``"""
+    after = serializers.IntegerField(required=False, default=0, min_value=0)
+    # A WSGI worker is busy for the whole part, so parts stay short
+    count = serializers.IntegerField(required=False, default=100, min_value=1, max_value=100)
 
 
 class PurchaseCreditsSerializer(serializers.Serializer):
@@ -0,0 +1,88 @@
+"""
+Public share links for renders.
+
+``create_share`` builds two images once, when the user shares:
+
+* the composite: original and render side by side at ``SHARE_COMPOSITE_HEIGHT``
+  (WEBP), which the share page shows instead of both full-size files;
+* the Open Graph preview: the composite padded to 1200x630 (JPEG, which every
+  link-preview crawler reads).
+
+Both are stored under ``shares/`` with unique names and served from
+``/s/<token>/`` with immutable cache headers, so a CDN in front of the origin
+answers repeat views. Revoking deletes the row and, once committed, the files.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+
+from .imaging import encode_image
+from .lifecycle import open_stored_file
+from .models import ShareLink
+
+
+OG_IMAGE_SIZE = (1200, 630)
+BACKGROUND = (245, 245, 245)
+
+
+def fit_height(image, height):
+    from PIL import Image
+
+    if image.height == height:
+        return image
+    width = max(1, round(image.width * height / image.height))
+    return image.resize((width, height), Image.Resampling.BICUBIC)
+
+
+def build_composite(original_file, render_file, height):
+    """Original (left) and render (right) at the same height, with a thin gap"""
+    from PIL import Image, ImageOps
+
+    with Image.open(original_file) as before, Image.open(render_file) as after:
+        before = fit_height(ImageOps.exif_transpose(before).convert('RGB'), height)
+        after = fit_height(after.convert('RGB'), height)
+    gap = max(2, height // 90)
+    composite = Image.new('RGB', (before.width + gap + after.width, height), (255, 255, 255))
+    composite.paste(before, (0, 0))
+    composite.paste(after, (before.width + gap, 0))
+    return composite
+
+
+def build_og_image(composite):
+    from PIL import ImageOps
+
+    return ImageOps.pad(composite, OG_IMAGE_SIZE, color=BACKGROUND)
+
+
+def create_share(image):
+    """Return the image's ShareLink, building it (and its images) on first share"""
+    existing = ShareLink.objects.filter(image=image).first()
+    if existing:
+        return existing
+
+    with open_stored_file(image, 'original_image') as original, \
+            open_stored_file(image, 'generated_image') as render:
+        composite = build_composite(original, render, settings.SHARE_COMPOSITE_HEIGHT)
+    name = uuid.uuid4().hex
+    share = ShareLink(image=image)
+    share.composite.save(
+        f'share_{name}.webp',
+        ContentFile(encode_image(composite, 'WEBP', settings.SHARE_IMAGE_QUALITY, 4)),
+        save=False,
+    )
+    share.og_image.save(
+        f'share_{name}_og.jpg',
+        ContentFile(encode_image(build_og_image(composite), 'JPEG', settings.SHARE_IMAGE_QUALITY, 1)),
+        save=False,
+    )
+    try:
+        with transaction.atomic():
+            share.save()
+    except IntegrityError:
+        # Shared concurrently; keep the other link and drop these files
+        for field in (share.composite, share.og_image):
+            field.storage.delete(field.name)
+        return ShareLink.objects.get(image=image)
+    return share
@@ -0,0 +1,56 @@
+"""
+Static files storage used in production.
+
+Hashed file names come from ``ManifestStaticFilesStorage``; on top of that
+``collectstatic`` writes ``.gz`` and (if the ``brotli`` package is installed)
+``.br`` variants next to every compressible file, so the web server can send
+them as-is (nginx ``gzip_static``/``brotli_static``) without compressing on
+each request.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.svg', '.json', '.txt', '.html', '.xml', '.map')
+
+# Files smaller than this are not worth a compressed copy
+MIN_COMPRESS_SIZE = 512
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not dry_run and isinstance(hashed_name, str):
+                self.compress(hashed_name)
+            yield name, hashed_name, processed
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+
+        # mtime=0 keeps the output byte-identical between runs
+        self.write_if_smaller(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0), len(data))
+        if brotli is not None:
+            self.write_if_smaller(path + '.br', brotli.compress(data, quality=11), len(data))
+
+    @staticmethod
+    def write_if_smaller(path, compressed, original_size):
+        if len(compressed) >= original_size:
+            return
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
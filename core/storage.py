@@ -0,0 +1,206 @@
+"""
+Direct-to-storage uploads.
+
+Clients ask ``/api/upload-intent/`` for an upload target and send the photo
+straight to storage; ``/api/generate/`` then only receives the object key.
+
+``S3UploadBackend`` presigns uploads against an S3-compatible bucket (AWS, MinIO,
+R2...) shared with ``default_storage``. ``LocalUploadBackend`` is a stand-in with
+the same protocol that receives the PUT in Django and writes it to
+``default_storage``; it is meant for development and tests.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+
+UPLOAD_SALT = 'core.storage.upload'
+
+ALLOWED_UPLOAD_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+}
+
+# Pillow format each allowed type must actually contain
+UPLOAD_FORMATS = {
+    'image/jpeg': 'JPEG',
+    'image/png': 'PNG',
+    'image/webp': 'WEBP',
+}
+
+
+def shard_path(prefix, filename):
+    """
+    Spread files over two levels of hash-prefix directories.
+
+    ``generated_images/ab/cd/<filename>`` gives 65536 leaf directories, so
+    no single directory grows to millions of entries.
+    """
+    filename = posixpath.basename(filename)
+    digest = hashlib.md5(filename.encode()).hexdigest()
+    return f"{prefix}/{digest[:2]}/{digest[2:4]}/{filename}"
+
+
+def is_sharded(prefix, name):
+    """True if ``name`` already follows the shard_path layout for ``prefix``"""
+    return name == shard_path(prefix, name)
+
+
+@deconstructible
+class ShardedUploadTo:
+    """``upload_to`` callable that places files with ``shard_path``"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def __call__(self, instance, filename):
+        return shard_path(self.prefix, filename)
+
+    def __eq__(self, other):
+        return isinstance(other, ShardedUploadTo) and self.prefix == other.prefix
+
+
+def new_upload_key(user, content_type):
+    """Storage key for a new upload, scoped to the uploading user"""
+    return f"{upload_prefix(user)}{uuid.uuid4().hex}{ALLOWED_UPLOAD_TYPES[content_type]}"
+
+
+def upload_prefix(user):
+    return f"uploads/{user.pk}/"
+
+
+def is_user_upload_key(user, key):
+    """True if ``key`` is a well-formed upload key belonging to ``user``"""
+    prefix = upload_prefix(user)
+    return (
+        isinstance(key, str)
+        and key.startswith(prefix)
+        and '/' not in key[len(prefix):]
+        and '..' not in key
+    )
+
+
+class BaseUploadBackend:
+    """Creates upload targets that let clients write directly to storage"""
+
+    def __init__(self):
+        self.ttl = settings.UPLOAD_URL_TTL
+
+    def create_upload(self, request, key, content_type, size):
+        """
+        Return a dict describing how to upload: ``method``, ``url`` and either
+        ``headers`` (PUT) or form ``fields`` (POST).
+        """
+        raise NotImplementedError
+
+
+class LocalUploadBackend(BaseUploadBackend):
+    """Signed PUT URLs served by ``direct_upload_view``"""
+
+    def create_upload(self, request, key, content_type, size):
+        token = signing.dumps({
+            'key': key,
+            'type': content_type,
+            'size': size,
+            'exp': int(time.time()) + self.ttl,
+        }, salt=UPLOAD_SALT)
+        return {
+            'method': 'PUT',
+            'url': request.build_absolute_uri(reverse('core:direct_upload', args=[token])),
+            'headers': {'Content-Type': content_type},
+        }
+
+    @staticmethod
+    def read_token(token):
+        """Return the signed upload claims or raise signing.BadSignature"""
+        claims = signing.loads(token, salt=UPLOAD_SALT)
+        if claims['exp'] < time.time():
+            raise signing.SignatureExpired('Upload URL expired')
+        return claims
+
+    @staticmethod
+    def save_stream(key, stream, expected_size, chunk_size=64 * 1024):
+        """
+        Copy ``stream`` into ``default_storage`` under ``key``.
+
+        The body is spooled to a temporary file as it arrives, so a slow client
+        never makes us hold the whole photo in memory. Returns the stored name
+        or None if the body size doesn't match ``expected_size``.
+        """
+        if stream is None:
+            return None
+        with tempfile.SpooledTemporaryFile(max_size=1024 * 1024, dir=settings.FILE_UPLOAD_TEMP_DIR) as tmp:
+            received = 0
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > expected_size:
+                    return None
+                tmp.write(chunk)
+            if received != expected_size:
+                return None
+            tmp.seek(0)
+            return default_storage.save(key, File(tmp, name=os.path.basename(key)))
+
+
+class S3UploadBackend(BaseUploadBackend):
+    """Presigned POST uploads to the S3-compatible bucket behind default_storage"""
+
+    def __init__(self):
+        super().__init__()
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise ImproperlyConfigured('S3UploadBackend requires boto3 (pip install django-storages[s3])')
+
+        options = settings.STORAGES['default'].get('OPTIONS', {})
+        self.bucket = options['bucket_name']
+        self.location = options.get('location', '').strip('/')
+        self.client = boto3.client(
+            's3',
+            endpoint_url=options.get('endpoint_url') or None,
+            aws_access_key_id=options.get('access_key') or None,
+            aws_secret_access_key=options.get('secret_key') or None,
+            region_name=options.get('region_name') or None,
+            config=Config(signature_version='s3v4'),
+        )
+
+    def create_upload(self, request, key, content_type, size):
+        object_key = f"{self.location}/{key}" if self.location else key
+        # The policy pins type and exact size, so the client can't swap the body
+        presigned = self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=object_key,
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', size, size],
+            ],
+            ExpiresIn=self.ttl,
+        )
+        return {
+            'method': 'POST',
+            'url': presigned['url'],
+            'fields': presigned['fields'],
+        }
+
+
+def get_upload_backend():
+    """Return an instance of the configured upload backend"""
+    return import_string(settings.UPLOAD_BACKEND)()
@@ -0,0 +1,60 @@
+"""
+Template tags emitting responsive images from the rendition manifest.
+
+    {% load renditions %}
+    {% responsive_image 'img/hero.jpg' alt='...' sizes='(min-width: 768px) 50vw, 100vw' class='w-full' %}
+    {% rendition_srcsets 'interior_styles' 'style-renditions' %}
+"""
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join, json_script
+
+from core.renditions import load_manifest, srcsets
+
+
+register = template.Library()
+
+DEFAULT_SIZES = '100vw'
+
+
+@register.simple_tag
+def responsive_image(source, alt='', sizes=DEFAULT_SIZES, loading='lazy', **attrs):
+    """``<picture>`` with one ``<source>`` per format; a plain ``<img>`` without renditions"""
+    attributes = format_html_join('', ' {}="{}"', sorted(attrs.items()))
+    renditions = srcsets(source)
+    if renditions is None:
+        return format_html(
+            '<img src="{}" alt="{}" loading="{}"{}>', static(source), alt, loading, attributes
+        )
+
+    # The last <source> is the source's own format and doubles as the <img> fallback
+    *modern, (_fallback_type, fallback_srcset) = renditions['sources']
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" loading="{}"{}></picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', (
+            (mime, srcset, sizes) for mime, srcset in modern
+        )),
+        static(source),
+        fallback_srcset,
+        sizes,
+        renditions['width'],
+        renditions['height'],
+        alt,
+        loading,
+        attributes,
+    )
+
+
+@register.simple_tag
+def rendition_srcsets(directory, element_id):
+    """
+    JSON block mapping every source under ``directory`` to its
+    ``[[mime, srcset], ...]`` list, for images rendered from JavaScript.
+    """
+    prefix = directory.rstrip('/') + '/'
+    data = {
+        source: srcsets(source)['sources']
+        for source in load_manifest()
+        if source.startswith(prefix)
+    }
+    return json_script(data, element_id)
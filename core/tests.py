@@ -1,3 +1,1064 @@
-from django.test import TestCase
+import contextlib
+import io
+import json
+import os
+import posixpath
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage, storages
+from django.core.management import CommandError, call_command
+from django.db.models import Q, Sum
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.response import Response
+
+from . import metrics, uploads, views_async
+from .accounts import allocate_username, create_otp_user, find_user_by_identifier
+from .authentication import issue_tokens
+from .db_router import PIN_COOKIE, PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from .imaging import encode_render, resolve_format
+from .lifecycle import archive_originals
+from .media import signed_media_url
+from .renditions import srcsets
+from .rollups import update_rollups
+from .seeding import Seeder
+from .storage import shard_path
+from .models import (
+    CreditTransaction, DailyCreditStat, DailyRevenueStat, GeneratedImage, Order, Package, RequestProfile,
+    ShareLink, UploadSession,
+)
+from .otp import CacheOTPBackend, DatabaseOTPBackend, OTP_EXPIRED, OTP_INVALID, OTP_VALID
+from .serializers import ImageGenerationSerializer
+from .views_async import mark_order_paid, prepare_generation_input, save_generated_image
+
+
+def image_bytes(size=(32, 24), color=(120, 80, 40), fmt='JPEG'):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+class MediaTestCase(TestCase):
+    """Stores media in a temporary directory"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root, STORAGES={
+            **settings.STORAGES,
+            'cold': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': f'{media_root}/cold'},
+            },
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class OTPBackendTests(TestCase):
+    backends = [CacheOTPBackend, DatabaseOTPBackend]
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_round_trip(self):
+        for backend_class in self.backends:
+            with self.subTest(backend=backend_class.__name__):
+                backend = backend_class(ttl=60)
+                backend.issue('User@Example.com', '111111')
+                self.assertEqual(backend.verify('User@Example.com', '000000'), OTP_INVALID)
+                self.assertEqual(backend.verify('User@Example.com', '111111'), OTP_VALID)
+                # A code is consumed by its first successful use
+                self.assertEqual(backend.verify('User@Example.com', '111111'), OTP_INVALID)
+
+    def test_new_code_replaces_old(self):
+        for backend_class in self.backends:
+            with self.subTest(backend=backend_class.__name__):
+                backend = backend_class(ttl=60)
+                backend.issue('99119911', '111111')
+                backend.issue('99119911', '222222')
+                self.assertEqual(backend.verify('99119911', '111111'), OTP_INVALID)
+                self.assertEqual(backend.verify('99119911', '222222'), OTP_VALID)
+
+    def test_expired(self):
+        for backend_class in self.backends:
+            with self.subTest(backend=backend_class.__name__):
+                backend = backend_class(ttl=60)
+                backend.issue('99119912', '111111')
+                later = time.time() + 61
+                with mock.patch('time.time', return_value=later), \
+                        mock.patch('django.utils.timezone.now', return_value=datetime.fromtimestamp(later, tz=timezone.utc)):
+                    self.assertEqual(backend.verify('99119912', '111111'), OTP_EXPIRED)
+
+    @override_settings(OTP_BACKEND='core.otp.CacheOTPBackend')
+    def test_check_warns_about_process_local_cache(self):
+        from .checks import check_otp_backend
+
+        self.assertEqual([w.id for w in check_otp_backend(None)], ['core.W001'])
+        with override_settings(OTP_BACKEND='core.otp.DatabaseOTPBackend'):
+            self.assertEqual(check_otp_backend(None), [])
+
+
+SMALL_RATE_LIMITS = {
+    'send': {'identifier': (2, 3600), 'ip': (100, 3600)},
+    'verify': {'identifier': (100, 900), 'ip': (100, 900)},
+}
+
+
+@override_settings(OTP_BACKEND='core.otp.DatabaseOTPBackend', OTP_RATE_LIMITS=SMALL_RATE_LIMITS)
+class OTPViewTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def send(self, client, phone_or_email):
+        return client.post('/api/send-otp/', {'phone_or_email': phone_or_email}, content_type='application/json')
+
+    def test_send_is_throttled_per_identifier(self):
+        self.assertEqual(self.send(self.client, '99110001').status_code, 200)
+        self.assertEqual(self.send(self.client, '99110001').status_code, 200)
+        response = self.send(self.client, '99110001')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        # Other identifiers keep their own budget
+        self.assertEqual(self.send(self.client, '99110002').status_code, 200)
+
+    def test_verify_requires_csrf_token_for_session_login(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        self.assertEqual(self.send(client, '99110003').status_code, 200)
+        data = {'phone_or_email': '99110003', 'otp_code': '123456'}
+
+        response = client.post('/api/verify-otp/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        response = client.post(
+            '/api/verify-otp/', data, content_type='application/json',
+            headers={'X-CSRFToken': client.cookies['csrftoken'].value},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('_auth_user_id', client.session)
+
+
+class IdentityTests(TestCase):
+    def test_admin_created_user_logs_in_by_email(self):
+        user = User.objects.create_user('admin_made', email='Admin.Made@Example.com')
+        self.assertEqual(find_user_by_identifier('admin.made@example.com'), user)
+
+    def test_lookup_follows_email_change(self):
+        user, created = create_otp_user('old@example.com')
+        self.assertTrue(created)
+        self.client.force_login(user)
+        response = self.client.patch('/api/profile/', {'email': 'new@example.com'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(find_user_by_identifier('new@example.com'), user)
+        self.assertIsNone(find_user_by_identifier('old@example.com'))
+        # Logging in with the new address reaches the same account
+        self.assertEqual(create_otp_user('new@example.com'), (user, False))
+
+    def test_phone_user_keeps_phone_after_adding_email(self):
+        user, _ = create_otp_user('99112233')
+        user.email = 'phone.user@example.com'
+        user.save()
+        self.assertEqual(find_user_by_identifier('99112233'), user)
+        self.assertEqual(find_user_by_identifier('phone.user@example.com'), user)
+
+    def test_email_of_another_account_is_rejected(self):
+        create_otp_user('taken@example.com')
+        user, _ = create_otp_user('mine@example.com')
+        self.client.force_login(user)
+        response = self.client.patch('/api/profile/', {'email': 'TAKEN@example.com'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_allocate_username(self):
+        User.objects.create_user('bold')
+        User.objects.create_user('bold1')
+        User.objects.create_user('boldface')
+        self.assertEqual(allocate_username('bold'), 'bold2')
+        self.assertEqual(allocate_username('brave'), 'brave')
+
+
+@override_settings(API_TOKEN_AUTH=True)
+class RefreshTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('token_user', email='token@example.com', password='old-password')
+        self.tokens = issue_tokens(self.user)
+
+    def refresh(self, token):
+        return self.client.post('/api/token/refresh/', {'refresh': token}, content_type='application/json')
+
+    def test_refresh_token_works_once(self):
+        response = self.refresh(self.tokens['refresh'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(self.tokens['refresh']).status_code, 401)
+        # The rotated token is good
+        self.assertEqual(self.refresh(response.json()['tokens']['refresh']).status_code, 200)
+
+    def test_logout_revokes_refresh_token(self):
+        other = issue_tokens(self.user)
+        response = self.client.post(
+            '/api/logout/', {'refresh': self.tokens['refresh']}, content_type='application/json',
+            headers={'Authorization': f"Bearer {self.tokens['access']}"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(self.tokens['refresh']).status_code, 401)
+        # Another client's token is left alone
+        self.assertEqual(self.refresh(other['refresh']).status_code, 200)
+
+    def test_password_change_revokes_refresh_token(self):
+        self.user.set_password('new-password')
+        self.user.save()
+        self.assertEqual(self.refresh(self.tokens['refresh']).status_code, 401)
+
+
+class DirectUploadTests(MediaTestCase):
+    def test_render_copies_and_spends_the_upload(self):
+        user = User.objects.create_user('uploader')
+        key = default_storage.save(f'uploads/{user.pk}/photo.jpg', ContentFile(image_bytes()))
+
+        original, _ = prepare_generation_input(None, key)
+        with self.captureOnCommitCallbacks(execute=True):
+            image = save_generated_image(user, {
+                'original_image': original,
+                'generated_image': ContentFile(image_bytes(fmt='WEBP'), name='render.webp'),
+            }, {'style': 'Modern'}, key)
+
+        self.assertTrue(image.original_image.name.startswith('original_images/'))
+        self.assertTrue(default_storage.exists(image.original_image.name))
+        self.assertFalse(default_storage.exists(key))
+
+
+class MediaAccessTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user('owner')
+        self.image = GeneratedImage.objects.create(
+            user=self.owner, style='Modern',
+            original_image=ContentFile(image_bytes(), name='original.jpg'),
+            generated_image=ContentFile(image_bytes(), name='render.jpg'),
+        )
+        self.name = self.image.generated_image.name
+        self.url = f'{settings.MEDIA_URL}{self.name}'
+
+    def get(self, user=None, url=None):
+        if user:
+            self.client.force_login(user)
+        response = self.client.get(url or self.url)
+        if response.streaming:
+            response.close()
+        return response
+
+    def test_owner_and_staff_are_served(self):
+        self.assertEqual(self.get(self.owner).status_code, 200)
+        staff = User.objects.create_user('staff', is_staff=True)
+        response = self.get(staff)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Cache-Control'].startswith('private'))
+
+    def test_others_get_404(self):
+        self.assertEqual(self.get().status_code, 404)
+        self.assertEqual(self.get(User.objects.create_user('other')).status_code, 404)
+
+    def test_signed_url(self):
+        self.assertEqual(self.get(url=signed_media_url(self.name)).status_code, 200)
+
+    def test_expired_or_tampered_signature(self):
+        url = signed_media_url(self.name)
+        with mock.patch('core.media.time.time', return_value=time.time() + 3 * settings.MEDIA_URL_TTL):
+            self.assertEqual(self.get(url=url).status_code, 404)
+        self.assertEqual(self.get(url=url[:-1] + ('0' if url[-1] != '0' else '1')).status_code, 404)
+        # A signature is only good for the file it was made for
+        other = signed_media_url(self.image.original_image.name)
+        self.assertEqual(self.get(url=self.url + '?' + other.split('?', 1)[1]).status_code, 404)
+
+    def test_front_server_delivery(self):
+        with override_settings(MEDIA_DELIVERY='nginx', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.get(self.owner)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+        with override_settings(MEDIA_DELIVERY='apache'):
+            response = self.get(self.owner)
+        self.assertEqual(response['X-Sendfile'], f'{settings.MEDIA_ROOT}/{self.name}')
+
+
+class RenderEncodingTests(TestCase):
+    def png(self, mode='RGB'):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        color = (200, 40, 40, 0) if mode == 'RGBA' else (200, 40, 40)
+        Image.new(mode, (40, 30), color).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def decode(self, content_file):
+        from PIL import Image
+
+        return Image.open(io.BytesIO(content_file.read()))
+
+    def test_webp_by_default(self):
+        render, master, metadata = encode_render(self.png(), {'format': 'WEBP', 'keep_master': False})
+        self.assertIsNone(master)
+        self.assertTrue(render.name.endswith('.webp'))
+        self.assertEqual(metadata, {
+            'output_format': 'webp', 'output_bytes': render.size, 'output_width': 40, 'output_height': 30,
+        })
+        self.assertEqual(self.decode(render).format, 'WEBP')
+
+    def test_avif_falls_back_to_webp_without_encoder(self):
+        with mock.patch('core.imaging.avif_supported', return_value=False), self.assertLogs('core.imaging', 'WARNING'):
+            self.assertEqual(resolve_format('avif'), 'WEBP')
+            render, _, metadata = encode_render(self.png(), {'format': 'AVIF'})
+        self.assertEqual(metadata['output_format'], 'webp')
+        self.assertEqual(self.decode(render).format, 'WEBP')
+        with mock.patch('core.imaging.avif_supported', return_value=True):
+            self.assertEqual(resolve_format('avif'), 'AVIF')
+        with self.assertRaises(ValueError):
+            resolve_format('gif')
+
+    def test_alpha(self):
+        render, _, _ = encode_render(self.png('RGBA'), {'format': 'WEBP'})
+        self.assertEqual(self.decode(render).mode, 'RGBA')
+        render, _, metadata = encode_render(self.png('RGBA'), {'format': 'JPEG'})
+        self.assertEqual(self.decode(render).mode, 'RGB')
+        self.assertEqual(metadata['output_format'], 'jpeg')
+        self.assertTrue(render.name.endswith('.jpg'))
+
+    def test_quality_changes_size(self):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.effect_noise((128, 128), 64).convert('RGB').save(buffer, 'PNG')
+        sizes = [
+            encode_render(buffer.getvalue(), {'format': 'JPEG', 'quality': quality})[2]['output_bytes']
+            for quality in (30, 95)
+        ]
+        self.assertLess(sizes[0], sizes[1])
+
+    def test_keep_master_stores_model_output(self):
+        data = self.png()
+        render, master, _ = encode_render(data, {'format': 'WEBP', 'keep_master': True})
+        self.assertEqual(master.read(), data)
+        self.assertTrue(master.name.endswith('.png'))
+        self.assertEqual(master.name[len('master_'):-len('.png')], render.name[len('generated_'):-len('.webp')])
+
+
+class ChunkedUploadTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        override = override_settings(CHUNKED_UPLOAD_TEMP_DIR=temp_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user('chunked')
+
+    def upload(self, data, content_type):
+        session = uploads.create_session(self.user, content_type, len(data))
+        uploads.write_chunk(session, f'bytes 0-{len(data) - 1}/{len(data)}', io.BytesIO(data))
+        return session
+
+    def test_format_must_match_content_type(self):
+        session = self.upload(image_bytes(fmt='PNG'), 'image/jpeg')
+        with self.assertRaises(uploads.UploadError):
+            uploads.finalize(session)
+        self.assertFalse(UploadSession.objects.filter(pk=session.pk).exists())
+
+    def test_concurrent_finalize_saves_once(self):
+        session = self.upload(image_bytes(), 'image/jpeg')
+        # Both requests loaded the session while it was still active
+        other = UploadSession.objects.get(pk=session.pk)
+        key = uploads.finalize(session)
+        self.assertEqual(uploads.finalize(other), key)
+        self.assertEqual(UploadSession.objects.get(pk=session.pk).upload_key, key)
+        self.assertEqual(len(default_storage.listdir(posixpath.dirname(key))[1]), 1)
+
+    def test_incomplete_upload_can_be_finished_later(self):
+        data = image_bytes()
+        session = uploads.create_session(self.user, 'image/jpeg', len(data))
+        uploads.write_chunk(session, f'bytes 0-9/{len(data)}', io.BytesIO(data[:10]))
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.finalize(session)
+        self.assertEqual(raised.exception.status, 409)
+        uploads.write_chunk(session, f'bytes 10-{len(data) - 1}/{len(data)}', io.BytesIO(data[10:]))
+        self.assertTrue(default_storage.exists(uploads.finalize(session)))
+
+    def test_upload_backs_one_render(self):
+        session = self.upload(image_bytes(), 'image/jpeg')
+        key = uploads.finalize(session)
+        with self.captureOnCommitCallbacks(execute=True):
+            uploads.consume_upload(self.user, key)
+
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'used')
+        self.assertFalse(default_storage.exists(key))
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.finalize(session)
+        self.assertEqual(raised.exception.status, 410)
+
+        serializer = ImageGenerationSerializer(
+            data={'upload_id': str(session.pk), 'style': 'Modern'},
+            context={'request': SimpleNamespace(user=self.user)},
+        )
+        self.assertFalse(serializer.is_valid())
+
+
+class ShardMediaTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('owner')
+        self.checkpoint = f'{settings.MEDIA_ROOT}/checkpoint.json'
+
+    def flat_image(self, name, stored=True):
+        """Image row in the old flat layout"""
+        original, generated = f'original_images/{name}.jpg', f'generated_images/{name}.webp'
+        if stored:
+            default_storage.save(original, ContentFile(b'original'))
+            default_storage.save(generated, ContentFile(b'render'))
+        image = GeneratedImage.objects.create(user=self.user, style='Modern')
+        GeneratedImage.objects.filter(pk=image.pk).update(original_image=original, generated_image=generated)
+        return image.pk
+
+    def shard(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('shard_media', '--checkpoint', self.checkpoint, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def names(self, pk):
+        return GeneratedImage.objects.filter(pk=pk).values_list('original_image', 'generated_image').get()
+
+    def test_moves_files_and_rewrites_rows(self):
+        pk = self.flat_image('a')
+        self.shard()
+        original, generated = self.names(pk)
+        self.assertEqual(original, shard_path('original_images', 'a.jpg'))
+        self.assertEqual(generated, shard_path('generated_images', 'a.webp'))
+        with default_storage.open(generated) as moved:
+            self.assertEqual(moved.read(), b'render')
+        self.assertFalse(default_storage.exists('generated_images/a.webp'))
+
+    def test_missing_file_leaves_row_alone(self):
+        pk = self.flat_image('gone', stored=False)
+        out, err = self.shard()
+        self.assertEqual(self.names(pk), ('original_images/gone.jpg', 'generated_images/gone.webp'))
+        self.assertIn(f'Missing file for GeneratedImage #{pk}', err)
+        self.assertIn('2 missing', out)
+
+    def test_resumes_after_interruption(self):
+        first, second = self.flat_image('a'), self.flat_image('b')
+        # A run moved b's render, then stopped before updating the row
+        default_storage.save(shard_path('generated_images', 'b.webp'), ContentFile(b'render'))
+        default_storage.delete('generated_images/b.webp')
+        with open(self.checkpoint, 'w') as f:
+            f.write(f'{{"last_id": {first}}}')
+
+        self.shard()
+        self.assertEqual(self.names(first), ('original_images/a.jpg', 'generated_images/a.webp'))
+        self.assertEqual(self.names(second), (
+            shard_path('original_images', 'b.jpg'), shard_path('generated_images', 'b.webp'),
+        ))
+        self.shard('--restart')
+        self.assertEqual(self.names(first)[1], shard_path('generated_images', 'a.webp'))
+
+
+class LifecycleTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('lifecycle')
+        # Renders made from one reused upload, before renders got their own copies
+        self.shared = default_storage.save('uploads/1/shared.jpg', ContentFile(image_bytes()))
+        self.images = [self.create_image(self.shared) for _ in range(2)]
+
+    def create_image(self, original):
+        render = default_storage.save('generated_images/render.webp', ContentFile(image_bytes(fmt='WEBP')))
+        return GeneratedImage.objects.create(
+            user=self.user, style='Modern', original_image=original, generated_image=render,
+        )
+
+    def test_delete_keeps_files_other_rows_use(self):
+        first, second = self.images
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(default_storage.exists(self.shared))
+        self.assertFalse(default_storage.exists(first.generated_image.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(default_storage.exists(self.shared))
+
+    def test_archive_skips_shared_originals(self):
+        own = self.create_image(default_storage.save('original_images/own.jpg', ContentFile(image_bytes())))
+        GeneratedImage.objects.update(created_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+
+        self.assertEqual(archive_originals(timedelta(days=1)), 1)
+        own.refresh_from_db()
+        self.assertIsNotNone(own.original_archived_at)
+        self.assertTrue(storages['cold'].exists(own.original_image.name))
+        self.assertFalse(default_storage.exists(own.original_image.name))
+        # The shared original stays readable for both rows
+        shared_rows = GeneratedImage.objects.filter(pk__in=[image.pk for image in self.images])
+        self.assertFalse(shared_rows.filter(original_archived_at__isnull=False).exists())
+        self.assertTrue(default_storage.exists(self.shared))
+
+
+class QPayWebhookTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer')
+        package = Package.objects.create(name='Starter', credits=10, price=5000)
+        self.order = Order.objects.create(
+            user=self.user, package=package, amount=5000, status='pending', qpay_invoice_id='inv-1',
+        )
+
+    @contextlib.asynccontextmanager
+    async def fake_client(self):
+        yield None
+
+    def purchases(self):
+        # The welcome bonus is the user's other 'add'
+        return CreditTransaction.objects.filter(user=self.user, description__startswith='Purchased').count()
+
+    def test_order_is_paid_once(self):
+        check = mock.AsyncMock(return_value={'paid_amount': 5000})
+        with mock.patch('core.qpay.client', self.fake_client), mock.patch('core.qpay.check_payment', check):
+            first = self.client.get('/api/qpay-webhook/', {'invoiceid': 'inv-1'})
+            second = self.client.get('/api/qpay-webhook/', {'invoiceid': 'inv-1'})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 404)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'paid')
+        self.assertEqual(self.purchases(), 1)
+
+    def test_concurrent_confirmation_adds_credits_once(self):
+        # Both callbacks loaded the order while it was still pending
+        self.assertTrue(mark_order_paid(self.order))
+        self.assertFalse(mark_order_paid(self.order))
+        self.assertEqual(self.purchases(), 1)
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+
+    def visit(self, client=None, **query):
+        return (client or self.client_class()).get('/', query)
+
+    def landing_that(self, side_effect):
+        """Patch the landing render with one that also runs ``side_effect(request, response)``"""
+        def render(request, template_name):
+            response = HttpResponse('landing')
+            side_effect(request, response)
+            return response
+
+        return mock.patch('core.views_frontend.render', render)
+
+    def test_miss_then_hit(self):
+        first, second = self.visit(), self.visit()
+        self.assertEqual(first['X-Page-Cache'], 'MISS')
+        self.assertEqual(second['X-Page-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertIn('Cookie', second['Vary'])
+
+    def test_bypass(self):
+        self.visit()
+        self.assertNotIn('X-Page-Cache', self.visit(ref='ad'))
+        self.client.force_login(User.objects.create_user('member'))
+        self.assertNotIn('X-Page-Cache', self.visit(self.client))
+
+    def test_responses_with_cookies_are_not_stored(self):
+        side_effects = {
+            'view cookie': lambda request, response: response.set_cookie('promo', '1'),
+            # Cookies the CSRF and session middleware add after the view returns
+            'csrf cookie': lambda request, response: get_token(request),
+            'session cookie': lambda request, response: request.session.__setitem__('seen', True),
+        }
+        for label, side_effect in side_effects.items():
+            with self.subTest(label), self.landing_that(side_effect):
+                caches[settings.PAGE_CACHE_ALIAS].clear()
+                first = self.visit()
+                self.assertTrue(first.cookies)
+                # The next visitor never gets the first one's cookie
+                second = self.visit()
+                self.assertEqual(second['X-Page-Cache'], 'MISS')
+
+    def test_purge(self):
+        self.visit()
+        call_command('purge_page_cache', stdout=io.StringIO())
+        self.assertEqual(self.visit()['X-Page-Cache'], 'MISS')
+        self.assertEqual(self.visit()['X-Page-Cache'], 'HIT')
+
+
+class RenditionTests(TestCase):
+    def setUp(self):
+        static_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_dir, ignore_errors=True)
+        os.makedirs(f'{static_dir}/img')
+        with open(f'{static_dir}/img/hero.png', 'wb') as f:
+            f.write(image_bytes((48, 24), fmt='PNG'))
+        self.enterContext(mock.patch('core.renditions.static_root', return_value=static_dir))
+        self.enterContext(mock.patch.dict('core.renditions._manifest_cache', {'mtime': None, 'data': {}}))
+        self.enterContext(override_settings(
+            RENDITIONS={**settings.RENDITIONS, 'sources': ['img'], 'widths': [16, 32], 'effort': 0},
+        ))
+
+    def build(self):
+        out = io.StringIO()
+        call_command('build_renditions', stdout=out)
+        return out.getvalue()
+
+    def render_tag(self):
+        return Template("{% load renditions %}{% responsive_image 'img/hero.png' alt='Hero' %}").render(Context())
+
+    def test_manifest_lookup(self):
+        self.build()
+        renditions = srcsets('img/hero.png')
+        self.assertEqual((renditions['width'], renditions['height']), (48, 24))
+        mime_types = [mime for mime, _ in renditions['sources']]
+        self.assertEqual(mime_types[-2:], ['image/webp', 'image/png'])
+        self.assertIn('renditions/img/hero-16.webp 16w', dict(renditions['sources'])['image/webp'])
+        self.assertIn('width="48"', self.render_tag())
+        self.assertIsNone(srcsets('img/other.png'))
+        self.assertIn('0 built, 1 unchanged', self.build())
+
+    def test_tag_falls_back_without_manifest(self):
+        self.assertIsNone(srcsets('img/hero.png'))
+        self.assertEqual(self.render_tag(), '<img src="/static/img/hero.png" alt="Hero" loading="lazy">')
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_rebuild_purges_cached_pages(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.client.get('/')
+        self.assertEqual(self.client.get('/')['X-Page-Cache'], 'HIT')
+        self.build()
+        self.assertEqual(self.client.get('/')['X-Page-Cache'], 'MISS')
+
+
+class GenerateViewTests(MediaTestCase):
+    def gemini(self, image_data):
+        """Stand-in for genai.Client whose async client returns one image part"""
+        part = SimpleNamespace(inline_data=SimpleNamespace(data=image_data))
+        response = SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+        aio = mock.MagicMock()
+        aio.__aenter__.return_value = aio
+        aio.models.generate_content = mock.AsyncMock(return_value=response)
+        return SimpleNamespace(aio=aio)
+
+    async def test_generate(self):
+        user = await User.objects.acreate(username='renderer')
+        await self.async_client.aforce_login(user)
+        client = self.gemini(image_bytes((48, 32), fmt='PNG'))
+        parse_threads = []
+        real_parse_form = views_async.parse_form
+
+        def parse_form(request):
+            parse_threads.append(threading.get_ident())
+            return real_parse_form(request)
+
+        with mock.patch('core.views_async.gemini_client', return_value=client), \
+                mock.patch('core.views_async.parse_form', parse_form):
+            response = await self.async_client.post('/api/generate/', {
+                'image': SimpleUploadedFile('room.jpg', image_bytes(), content_type='image/jpeg'),
+                'style': 'Modern',
+            })
+
+        self.assertEqual(response.status_code, 201, response.content)
+        # The multipart body was parsed off the event loop
+        self.assertEqual(len(parse_threads), 1)
+        self.assertNotEqual(parse_threads[0], threading.get_ident())
+        prompt, sent_image = client.aio.models.generate_content.await_args.kwargs['contents']
+        self.assertIn('Modern style', prompt)
+        self.assertEqual(sent_image.size, (32, 24))
+
+        image = await GeneratedImage.objects.aget(user=user)
+        self.assertEqual((image.output_width, image.output_height), (48, 32))
+        self.assertEqual(image.output_format, settings.RENDER_OUTPUT['format'].lower())
+        self.assertTrue(await CreditTransaction.objects.filter(user=user, transaction_type='use').aexists())
+
+
+class ReplicaRoutingTests(TestCase):
+    router = PrimaryReplicaRouter()
+
+    def setUp(self):
+        # Only the alias has to exist; nothing here opens a connection to it
+        self.enterContext(mock.patch.dict(settings.DATABASES, {'replica': settings.DATABASES['default']}))
+
+    def route(self, view_name, method='get', cookies=None, write=False):
+        """Databases the view's reads go to, before and after an optional write, and the response"""
+        reads = []
+
+        def view(request):
+            middleware.process_view(request, view, (), {})
+            reads.append(self.router.db_for_read(Package))
+            if write:
+                self.assertEqual(self.router.db_for_write(Package), 'default')
+            reads.append(self.router.db_for_read(Package))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = SimpleNamespace(view_name=view_name)
+        return reads, middleware(request)
+
+    def test_replica_views_read_from_replica(self):
+        reads, response = self.route('core:packages')
+        self.assertEqual(reads, ['replica', 'replica'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_other_views_read_from_primary(self):
+        self.assertEqual(self.route('core:profile')[0], ['default', 'default'])
+        # Outside a request
+        self.assertEqual(self.router.db_for_read(Package), 'default')
+
+    def test_write_pins_to_primary(self):
+        reads, response = self.route('core:packages', write=True)
+        self.assertEqual(reads, ['replica', 'default'])
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.DB_REPLICA_PIN_SECONDS)
+        self.assertTrue(cookie['httponly'])
+
+        # POSTs pin the client even when they wrote nothing
+        self.assertIn(PIN_COOKIE, self.route('core:packages', method='post')[1].cookies)
+
+    def test_pinned_client_reads_from_primary(self):
+        reads, response = self.route('core:packages', cookies={PIN_COOKIE: '1'})
+        self.assertEqual(reads, ['default', 'default'])
+        # A pinned read does not renew the pin, so it lapses after DB_REPLICA_PIN_SECONDS
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class OrderAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        self.user = User.objects.create_user('buyer')
+        package = Package.objects.create(name='Starter', credits=10, price=5000)
+        self.paid = Order.objects.create(user=self.user, package=package, amount=5000, status='paid')
+        self.pending = Order.objects.create(user=self.user, package=package, amount=5000, status='pending')
+
+    def refund(self):
+        return self.client.post('/admin/core/order/', {
+            'action': 'refund_paid', '_selected_action': [self.paid.pk, self.pending.pk],
+        })
+
+    def test_refund_debits_credits_once(self):
+        self.refund()
+        self.refund()
+        self.paid.refresh_from_db()
+        self.pending.refresh_from_db()
+        self.assertEqual(self.paid.status, 'refunded')
+        self.assertEqual(self.pending.status, 'pending')
+        debits = CreditTransaction.objects.filter(user=self.user, transaction_type='use')
+        self.assertEqual(list(debits.values_list('amount', 'description')), [(10, f'Refund of order #{self.paid.pk}')])
+
+
+class AdminThumbnailTests(MediaTestCase):
+    def test_thumbnail_is_cached_apart_from_default(self):
+        admin_user = User.objects.create_superuser('admin', password='x')
+        self.client.force_login(admin_user)
+        image = GeneratedImage.objects.create(
+            user=admin_user, style='Modern',
+            original_image=ContentFile(image_bytes(), name='original.jpg'),
+            generated_image=ContentFile(image_bytes(), name='render.jpg'),
+        )
+        response = self.client.get(f'/admin/core/generatedimage/{image.pk}/thumbnail/')
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        cache_key = f'admin-thumbnail:160:{image.generated_image.name}'
+        self.assertIsNone(caches['default'].get(cache_key))
+        self.assertEqual(caches[settings.ADMIN_THUMBNAIL_CACHE_ALIAS].get(cache_key), response.content)
+
+
+@override_settings(ROLLUP_LAG_SECONDS=0)
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer')
+        package = Package.objects.create(name='Starter', credits=10, price=5000)
+        Order.objects.create(user=self.user, package=package, amount=5000, status='paid')
+
+    def totals(self):
+        credits = DailyCreditStat.objects.aggregate(rows=Sum('transactions'), credits=Sum('credits'))
+        return credits, DailyRevenueStat.objects.aggregate(revenue=Sum('revenue'))['revenue']
+
+    def test_second_run_adds_nothing(self):
+        CreditTransaction.objects.create(user=self.user, amount=10, transaction_type='add', description='Purchased')
+        update_rollups()
+        first = self.totals()
+        update_rollups()
+        self.assertEqual(self.totals(), first)
+        # The welcome bonus and the purchase
+        self.assertEqual(first, ({'rows': 2, 'credits': 13}, 5000))
+
+        CreditTransaction.objects.create(user=self.user, amount=4, transaction_type='use', description='Render')
+        update_rollups()
+        self.assertEqual(self.totals(), ({'rows': 3, 'credits': 17}, 5000))
+
+    def test_stats_reject_bad_dates(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        for query in ({'start': '2026-13-01'}, {'end': 'yesterday'}, {'start': '2026-02-01', 'end': '2026-01-01'},
+                      {'period': 'week'}):
+            with self.subTest(query=query):
+                response = self.client.get('/api/stats/credits/', query)
+                self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/stats/credits/', {'start': '2026-01-01', 'end': '2026-01-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['start'], date(2026, 1, 1))
+
+
+class BenchmarkCommandTests(TestCase):
+    case = 'pil.flatten_rgba[small]'
+
+    def setUp(self):
+        self.baseline = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'baseline.json')
+
+    def benchmark(self, *args):
+        call_command('benchmark', self.case, '--repeat', '1', '--baseline', self.baseline, *args, stdout=io.StringIO())
+
+    def test_missing_baseline_fails(self):
+        with self.assertRaisesMessage(CommandError, f'No baseline for {self.case}'):
+            self.benchmark()
+
+        # A baseline that lacks the case fails the same way
+        with open(self.baseline, 'w') as f:
+            json.dump({'results': {'pil.decode[small]': {'median': 1, 'min': 1, 'number': 1}}}, f)
+        with self.assertRaisesMessage(CommandError, f'No baseline for {self.case}'):
+            self.benchmark()
+
+    def test_compares_with_saved_baseline(self):
+        self.benchmark('--save')
+        self.benchmark('--threshold', '100')
+
+        with open(self.baseline) as f:
+            saved = json.load(f)
+        saved['results'][self.case]['median'] /= 1000
+        with open(self.baseline, 'w') as f:
+            json.dump(saved, f)
+        with self.assertRaisesMessage(CommandError, 'slower than the baseline'):
+            self.benchmark()
+
+
+class StartupImportTests(TestCase):
+    heavy_modules = ('google.genai', 'PIL', 'httpx')
+
+    def loaded_after(self, code):
+        """Heavy modules imported by a fresh interpreter that runs ``code`` after ``django.setup()``"""
+        script = (
+            'import sys, django; django.setup()\n'
+            f'{code}\n'
+            f'print(" ".join(m for m in {self.heavy_modules!r} if m in sys.modules))'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE},
+        ).stdout
+        return set(output.split())
+
+    def test_urlconf_does_not_import_heavy_modules(self):
+        self.assertEqual(self.loaded_after('from django.urls import get_resolver; get_resolver().url_patterns'), set())
+
+    def test_warm_up_imports_heavy_modules(self):
+        self.assertEqual(self.loaded_after('from core.warmup import warm_up; warm_up()'), set(self.heavy_modules))
+
+
+class SeedingTests(TestCase):
+    def test_repeated_seed_runs_keep_balances_positive(self):
+        Package.objects.create(name='Small Package', credits=10, price=5000)
+        for _ in range(2):
+            Seeder(days=30, seed=1).run(users=20, images=300, orders=2)
+
+        balances = (
+            CreditTransaction.objects.values('user')
+            .annotate(
+                added=Sum('amount', filter=Q(transaction_type='add')),
+                used=Sum('amount', filter=Q(transaction_type='use')),
+            )
+        )
+        self.assertEqual(User.objects.filter(username__startswith='seed_').count(), 40)
+        self.assertEqual(GeneratedImage.objects.count(), 600)
+        self.assertFalse([row for row in balances if row['added'] < (row['used'] or 0)])
+
+
+class HistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner')
+        self.client.force_login(self.user)
+        other = User.objects.create_user('other')
+        GeneratedImage.objects.create(user=other, style='Modern', description='Blue sofa by the window')
+        self.images = [
+            GeneratedImage.objects.create(user=self.user, style='Modern', description=f'Blue sofa {i}')
+            for i in range(5)
+        ]
+        # Two renders share a timestamp, so the id breaks the tie
+        moment = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for offset, image in zip([0, 1, 1, 2, 3], self.images):
+            GeneratedImage.objects.filter(pk=image.pk).update(created_at=moment + timedelta(minutes=offset))
+
+    def pages(self, **query):
+        ids, cursor = [], ''
+        while True:
+            response = self.client.get('/api/history/', {**query, 'limit': 2, 'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_cursor_walks_every_row_once(self):
+        expected = [image.pk for image in reversed(self.images)]
+        self.assertEqual(self.pages(), expected)
+        self.assertEqual(self.pages(q='blue so'), expected)
+
+    def test_bad_cursor_is_rejected(self):
+        response = self.client.get('/api/history/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('owner')
+        self.client.force_login(self.user)
+        self.images = [
+            GeneratedImage.objects.create(
+                user=self.user, style='Modern',
+                original_image=ContentFile(image_bytes(), name='original.jpg'),
+                generated_image=ContentFile(image_bytes(fmt='PNG'), name='render.png'),
+            )
+            for _ in range(3)
+        ]
+
+    def check_archive(self, data):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIsNone(archive.testzip())
+            names = archive.namelist()
+            with default_storage.open(self.images[0].original_image.name, 'rb') as original:
+                self.assertEqual(archive.read(names[0]), original.read())
+        self.assertEqual(len(names), 2 * 2 + 1)
+        self.assertEqual(names[-1], 'index.csv')
+
+    def test_export_is_a_valid_zip(self):
+        response = self.client.get('/api/export/', {'count': 2})
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn(f'after={self.images[1].pk}', response['Link'])
+        self.check_archive(b''.join(response.streaming_content))
+
+    async def test_asgi_export_streams_chunks(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/api/export/', {'count': 2})
+        self.assertTrue(response.is_async)
+        self.check_archive(b''.join([chunk async for chunk in response.streaming_content]))
+
+    def test_count_is_capped(self):
+        response = self.client.get('/api/export/', {'count': 101})
+        self.assertEqual(response.status_code, 400)
+
+
+class ShareTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('owner')
+        self.client.force_login(self.user)
+        self.image = GeneratedImage.objects.create(
+            user=self.user, style='Modern',
+            original_image=ContentFile(image_bytes(), name='original.jpg'),
+            generated_image=ContentFile(image_bytes(), name='render.jpg'),
+        )
+
+    def test_revoked_link_is_gone(self):
+        shared = self.client.post(f'/api/images/{self.image.pk}/share/').data
+        page = self.client.get(f"/s/{shared['token']}/")
+        asset = self.client.get(f"/s/{shared['token']}/og.jpg")
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(asset.status_code, 200)
+        asset.close()
+        # Assets leave the CDN together with the page
+        self.assertEqual(asset['Cache-Control'], f'public, max-age={settings.SHARE_PAGE_MAX_AGE}')
+        share = ShareLink.objects.get(token=shared['token'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/images/{self.image.pk}/share/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(default_storage.exists(share.og_image.name))
+        for url in (f"/s/{shared['token']}/", f"/s/{shared['token']}/og.jpg"):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response['Cache-Control'], 'no-store')
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_metrics_do_not_evict_otp_codes(self):
+        backend = CacheOTPBackend(ttl=60)
+        backend.issue('99110005', '111111')
+        phases = {phase: (0.01, 1) for phase in metrics.PHASES}
+        for view_name in metrics.view_names():
+            for seconds in metrics.BUCKETS:
+                metrics.record_request(view_name, seconds, phases)
+        metrics.flush(force=True)
+        self.assertEqual(backend.verify('99110005', '111111'), OTP_VALID)
+
+    def test_every_timed_phase_is_exported(self):
+        app_dir = Path(__file__).resolve().parent
+        timed_phases = {
+            phase
+            for path in app_dir.glob('*.py') if path.name != 'tests.py'
+            for phase in re.findall(r"\btimed\('(\w+)'\)", path.read_text())
+        }
+        self.assertIn('share', timed_phases)
+        self.assertLessEqual(timed_phases, set(metrics.PHASES))
+
+    def test_no_server_timing_header_by_default(self):
+        response = self.client.get('/api/packages/')
+        self.assertNotIn('Server-Timing', response)
+
+
+class ProfilingTests(TestCase):
+    @override_settings(PROFILING_SAMPLE_RATE=0.0)
+    async def test_unsampled_async_request_skips_staff_check(self):
+        with mock.patch('core.profiling.is_staff_request') as is_staff_request:
+            response = await self.async_client.get('/api/packages/')
+        self.assertEqual(response.status_code, 200)
+        is_staff_request.assert_not_called()
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_INTERVAL_MS=1)
+    async def test_async_request_samples_the_view_thread(self):
+        def slow_get(view, request):
+            time.sleep(0.1)
+            return Response({})
+
+        with mock.patch('core.views.PackageListView.get', slow_get):
+            await self.async_client.get('/api/packages/')
+        profile = await RequestProfile.objects.aget()
+        self.assertGreater(profile.sample_count, 0)
+        self.assertIn('slow_get', profile.folded_stacks)
+
+    def test_purge_keeps_recent_profiles(self):
+        fields = dict(url_name='packages', path='/api/packages/', method='GET', status_code=200,
+                      duration_ms=1, interval_ms=5, sample_count=0, folded_stacks='')
+        old = RequestProfile.objects.create(**fields)
+        recent = RequestProfile.objects.create(**fields)
+        RequestProfile.objects.filter(pk=old.pk).update(
+            created_at=old.created_at - timedelta(days=settings.PROFILING_RETENTION_DAYS + 1)
+        )
+        call_command('purge_request_profiles', stdout=io.StringIO())
+        self.assertEqual(list(RequestProfile.objects.values_list('pk', flat=True)), [recent.pk])
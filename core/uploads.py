@@ -0,0 +1,185 @@
+"""
+Resumable chunked uploads.
+
+Protocol:
+
+1. ``POST /api/uploads/`` with ``content_type`` and ``size`` creates an
+   ``UploadSession`` and returns its ``upload_id``.
+2. ``PUT /api/uploads/<upload_id>/`` with a ``Content-Range: bytes a-b/total``
+   header and the raw chunk as body. Chunks are written to a temporary file
+   at their offset as they stream in. A chunk may overlap bytes already
+   received (a retried chunk), but may not leave a gap.
+3. ``GET /api/uploads/<upload_id>/`` returns the current offset so a client
+   can resume after a dropped connection.
+4. ``POST /api/uploads/<upload_id>/complete/`` validates the assembled image,
+   moves it into ``default_storage`` and returns the upload key.
+   ``/api/generate/`` accepts the ``upload_id`` afterwards.
+
+A render copies the upload into ``original_images/`` and ``consume_upload``
+deletes the upload once the render is committed, so an upload (chunked or
+direct) backs at most one render.
+"""
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import UploadSession
+from .storage import UPLOAD_FORMATS, new_upload_key
+from .timing import timed
+
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Invalid chunk or session state; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def temp_path(session):
+    """Where chunks of ``session`` are assembled"""
+    return os.path.join(settings.CHUNKED_UPLOAD_TEMP_DIR, f"{session.pk}.part")
+
+
+def create_session(user, content_type, total_size, filename=''):
+    return UploadSession.objects.create(
+        user=user,
+        filename=filename[:255],
+        content_type=content_type,
+        total_size=total_size,
+        expires_at=timezone.now() + timedelta(seconds=settings.CHUNKED_UPLOAD_TTL),
+    )
+
+
+def parse_content_range(header, total_size):
+    """Return ``(start, end)`` from a Content-Range header (end inclusive)"""
+    match = CONTENT_RANGE_RE.match((header or '').strip())
+    if not match:
+        raise UploadError('Content-Range header must look like "bytes start-end/total"')
+    start, end, total = (int(group) for group in match.groups())
+    if total != total_size or start > end or end >= total_size:
+        raise UploadError('Content-Range does not match the upload size', status=416)
+    if end - start + 1 > settings.CHUNKED_UPLOAD_MAX_CHUNK:
+        raise UploadError('Chunk is too large', status=413)
+    return start, end
+
+
+def write_chunk(session, content_range, stream):
+    """
+    Write one chunk to the session's temporary file.
+
+    Returns the new number of contiguous bytes received.
+    """
+    if session.status != 'active' or session.is_expired():
+        raise UploadError('Upload session is closed', status=410)
+
+    start, end = parse_content_range(content_range, session.total_size)
+    if start > session.received_bytes:
+        # Refuse gaps so the received prefix is always contiguous
+        raise UploadError('Chunk starts after the current offset', status=416)
+
+    length = end - start + 1
+    path = temp_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    written = 0
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as target:
+        target.seek(start)
+        while stream is not None and written < length:
+            chunk = stream.read(min(COPY_BUFFER_SIZE, length - written))
+            if not chunk:
+                break
+            target.write(chunk)
+            written += len(chunk)
+
+    # start <= received_bytes, so whatever arrived extends the contiguous prefix,
+    # even when the client dropped mid-chunk
+    received = max(session.received_bytes, start + written)
+    UploadSession.objects.filter(pk=session.pk).update(
+        received_bytes=Greatest('received_bytes', received)
+    )
+    session.received_bytes = received
+
+    if written != length:
+        raise UploadError('Chunk body is shorter than its Content-Range')
+    return received
+
+
+def validation_error(session):
+    """Why the assembled file of ``session`` is not an acceptable image, or None"""
+    from PIL import Image
+
+    try:
+        with timed('codec'), Image.open(temp_path(session)) as image:
+            detected = image.format
+            image.verify()
+    except Exception:
+        return 'Uploaded file is not a valid image'
+    if detected != UPLOAD_FORMATS[session.content_type]:
+        return f'Uploaded file is {detected}, not {session.content_type}'
+    return None
+
+
+def finalize(session):
+    """Validate the assembled file and move it into default_storage"""
+    with transaction.atomic():
+        # Claim the session before touching the file. A concurrent finalize
+        # waits on the row until this one commits, then returns the same key.
+        claimed = UploadSession.objects.filter(pk=session.pk, status='active').update(status='complete')
+        if not claimed:
+            try:
+                session.refresh_from_db(fields=['status', 'upload_key'])
+            except UploadSession.DoesNotExist:
+                # A concurrent finalize rejected the file
+                raise UploadError('Uploaded file is not a valid image')
+            if session.status == 'complete':
+                return session.upload_key
+            raise UploadError('Upload was already used for a render', status=410)
+        # Raising below rolls the claim back
+        session.refresh_from_db(fields=['received_bytes'])
+        if session.is_expired():
+            raise UploadError('Upload session is closed', status=410)
+        if session.received_bytes != session.total_size:
+            raise UploadError('Upload is incomplete', status=409)
+
+        error = validation_error(session)
+        if error is None:
+            key = new_upload_key(session.user, session.content_type)
+            with timed('storage'), open(temp_path(session), 'rb') as assembled:
+                key = default_storage.save(key, File(assembled, name=os.path.basename(key)))
+            session.status = 'complete'
+            session.upload_key = key
+            session.save(update_fields=['status', 'upload_key'])
+
+    if error is not None:
+        discard(session)
+        session.delete()
+        raise UploadError(error)
+    discard(session)
+    return key
+
+
+def discard(session):
+    """Delete the temporary file of ``session``"""
+    try:
+        os.remove(temp_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def consume_upload(user, key):
+    """Spend an upload used by a render: its session is closed now, its file deleted after commit"""
+    UploadSession.objects.filter(user=user, upload_key=key, status='complete').update(status='used')
+    transaction.on_commit(lambda: default_storage.delete(key))
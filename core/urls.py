@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views, views_frontend
+from . import views, views_async, views_frontend, views_share
 
 app_name = 'core'
 
@@ -18,6 +18,7 @@ urlpatterns = [
     path('api/signup/', views.signup_view, name='signup'),
     path('api/send-otp/', views.send_otp_view, name='send_otp'),
     path('api/verify-otp/', views.verify_otp_view, name='verify_otp'),
+    path('api/token/refresh/', views.token_refresh_view, name='token_refresh'),
     
     # User management
     path('api/profile/', views.UserProfileView.as_view(), name='profile'),
@@ -25,11 +26,26 @@ urlpatterns = [
     
     # Credits & Packages
     path('api/packages/', views.PackageListView.as_view(), name='packages'),
-    path('api/purchase-credits/', views.PurchaseCreditsView.as_view(), name='purchase_credits'),
-    path('api/check-order-status/', views.check_order_status_view, name='check_order_status'),
-    path('api/qpay-webhook/', views.qpay_webhook_view, name='qpay_webhook'),
+    path('api/purchase-credits/', views_async.purchase_credits_view, name='purchase_credits'),
+    path('api/check-order-status/', views_async.check_order_status_view, name='check_order_status'),
+    path('api/qpay-webhook/', views_async.qpay_webhook_view, name='qpay_webhook'),
     
     # Image generation
     path('api/recent-images/', views.RecentImagesView.as_view(), name='recent_images'),
-    path('api/generate/', views.GenerateImageView.as_view(), name='generate_image'),
+    path('api/history/', views.ImageHistoryView.as_view(), name='image_history'),
+    path('api/export/', views.ExportView.as_view(), name='export'),
+    path('api/images/<int:pk>/share/', views.ShareLinkView.as_view(), name='share_link'),
+    path('api/generate/', views_async.generate_image_view, name='generate_image'),
+    path('api/upload-intent/', views.UploadIntentView.as_view(), name='upload_intent'),
+    path('api/uploads/direct/<str:token>/', views.direct_upload_view, name='direct_upload'),
+    path('api/uploads/', views.ChunkedUploadView.as_view(), name='chunked_upload'),
+    path('api/uploads/<uuid:upload_id>/', views.ChunkedUploadDetailView.as_view(), name='chunked_upload_detail'),
+    path('api/uploads/<uuid:upload_id>/complete/', views.ChunkedUploadCompleteView.as_view(), name='chunked_upload_complete'),
+    
+    # Public share pages (cacheable by a CDN)
+    path('s/<str:token>/', views_share.share_page, name='share'),
+    path('s/<str:token>/<str:asset>', views_share.share_asset, name='share_asset'),
+    
+    # Staff analytics
+    path('api/stats/<str:metric>/', views.RollupStatsView.as_view(), name='rollup_stats'),
 ]
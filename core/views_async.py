@@ -0,0 +1,398 @@
+"""
+Async API views for the endpoints that wait on upstream services.
+
+Gemini renders and QPay calls take seconds. As native async views they do not
+hold a worker thread while waiting, so under ASGI (uvicorn) one worker keeps
+many of them in flight; under WSGI they still work, one request at a time.
+
+DRF 3.14 has no async views, so these are plain Django views that follow the
+DRF behaviour of the views they replace: Bearer token or session
+authentication (with DRF's CSRF rule for sessions) and JSON responses. Simple
+queries use the async ORM; writes that must be atomic, multipart parsing and
+CPU-bound image work run through ``sync_to_async``. The Gemini SDK and Pillow are imported
+on first use (see ``core.warmup`` to load them before workers fork).
+"""
+import io
+import json
+import posixpath
+import uuid
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework import exceptions
+from rest_framework.authentication import CSRFCheck
+
+from . import qpay
+from .authentication import SignedTokenAuthentication
+from .imaging import encode_render, flatten_to_rgb
+from .models import CreditTransaction, GeneratedImage, Order, Package
+from .serializers import GeneratedImageSerializer, ImageGenerationSerializer, OrderSerializer
+from .timing import timed
+from .uploads import consume_upload
+
+
+token_authentication = SignedTokenAuthentication()
+
+
+def _csrf_failure(request):
+    """Reason the CSRF check fails for ``request``, or None (same check as DRF's SessionAuthentication)"""
+    check = CSRFCheck(lambda request: None)
+    check.process_request(request)
+    return check.process_view(request, None, (), {})
+
+
+async def authenticate(request):
+    """Bearer token first, then the session, like DEFAULT_AUTHENTICATION_CLASSES"""
+    result = token_authentication.authenticate(request)
+    if result is not None:
+        return result[0]
+
+    user = await request.auser()
+    if user.is_authenticated:
+        reason = _csrf_failure(request)
+        if reason:
+            raise exceptions.PermissionDenied(f'CSRF Failed: {reason}')
+    return user
+
+
+def error_response(exc):
+    response = JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response['WWW-Authenticate'] = token_authentication.authenticate_header(None)
+    return response
+
+
+def async_api_view(methods):
+    """Authenticated async API view; the async counterpart of @api_view + IsAuthenticated"""
+    def decorator(view_func):
+        @csrf_exempt  # Enforced in authenticate() for session users only, as DRF does
+        @require_http_methods(methods)
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                request.user = await authenticate(request)
+                if not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+            except exceptions.APIException as exc:
+                return error_response(exc)
+            return await view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def parse_form(request):
+    data = request.POST.copy()
+    data.update(request.FILES)
+    return data
+
+
+async def request_data(request):
+    """JSON body or form fields plus files, like DRF's ``request.data``"""
+    with timed('upload'):
+        if request.content_type == 'application/json':
+            try:
+                return json.loads(request.body or b'{}')
+            except ValueError as exc:
+                raise exceptions.ParseError(f'JSON parse error - {exc}')
+        # Multipart parsing reads and spools the whole upload; keep it off the event loop
+        return await sync_to_async(parse_form, thread_sensitive=False)(request)
+
+
+async def credit_balance(user):
+    totals = await CreditTransaction.objects.filter(user=user).aaggregate(
+        added=Sum('amount', filter=Q(transaction_type='add')),
+        used=Sum('amount', filter=Q(transaction_type='use')),
+    )
+    return (totals['added'] or 0) - (totals['used'] or 0)
+
+
+def prepare_generation_input(image, upload_key):
+    """
+    Return ``(original_image_file, pil_image)``: the original to store and the
+    RGB image sent to Gemini.
+    """
+    from PIL import Image
+
+    if upload_key:
+        # Photo was uploaded straight to storage. The render keeps its own copy
+        # and the upload is deleted once it is saved (save_generated_image), so
+        # no two renders share an original.
+        with default_storage.open(upload_key) as stored:
+            data = stored.read()
+        name = posixpath.basename(upload_key)
+    else:
+        image.seek(0)
+        data = image.read()
+        name = image.name
+    original_image_file = ContentFile(data, name=f"original_{uuid.uuid4().hex}_{name}")
+
+    uploaded_image = Image.open(io.BytesIO(data))
+
+    # Convert to RGB if necessary (remove alpha channel for compatibility)
+    uploaded_image = flatten_to_rgb(uploaded_image)
+
+    image_bytes = io.BytesIO()
+    uploaded_image.save(image_bytes, format='PNG')
+    image_bytes.seek(0)
+    return original_image_file, Image.open(image_bytes)
+
+
+def gemini_client():
+    """Gemini client; the SDK takes most of a second to import, so it is loaded here"""
+    from google import genai
+
+    return genai.Client(api_key=settings.GEMINI_API_KEY)
+
+
+def save_generated_image(user, files, fields, upload_key=''):
+    """Store the render and charge one credit; a direct upload it was made from is spent"""
+    generated_image = GeneratedImage(user=user, **fields)
+
+    # Write the files before the transaction so it only holds the row inserts
+    with timed('storage'):
+        for field, content in files.items():
+            if content is not None:
+                getattr(generated_image, field).save(content.name, content, save=False)
+
+    with transaction.atomic():
+        generated_image.save()
+        CreditTransaction.objects.create(
+            user=user,
+            amount=1,
+            transaction_type='use',
+            description=f"Generated {fields['style']} style image"
+        )
+        if upload_key:
+            consume_upload(user, upload_key)
+    return generated_image
+
+
+@async_api_view(['POST'])
+async def generate_image_view(request):
+    if await credit_balance(request.user) < 1:
+        return JsonResponse({
+            'error': 'Insufficient credits. Please purchase more credits to generate images.'
+        }, status=402)
+
+    try:
+        data = await request_data(request)
+    except exceptions.ParseError as exc:
+        return error_response(exc)
+    serializer = ImageGenerationSerializer(data=data, context={'request': request})
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    style = serializer.validated_data['style']
+    room_type = serializer.validated_data.get('room_type', '')
+    description = serializer.validated_data.get('description', '')
+
+    try:
+        with timed('codec'):
+            original_image_file, pil_image = await sync_to_async(prepare_generation_input, thread_sensitive=False)(
+                serializer.validated_data.get('image'),
+                serializer.validated_data.get('upload_key'),
+            )
+
+        text_input = f"""Using the provided image of a {room_type if room_type else 'room'} interior, change the entire room design to {style} style. Keep the exact room layout, floor plan, windows and doors positions unchanged. Preserve the architectural elements, dimensions, and proportions. Maintain realistic proportions, natural lighting, and professional interior design quality. Only change the furniture, decor, colors, materials, and styling while keeping all structural elements identical."""
+        if description:
+            text_input += f" Additional requirements: {description}"
+
+        try:
+            # In a thread, so the first (importing) call does not stall the event loop
+            client = await sync_to_async(gemini_client, thread_sensitive=False)()
+            with timed('gemini'):
+                async with client.aio as aio:
+                    response = await aio.models.generate_content(
+                        model="gemini-2.5-flash-image",
+                        contents=[text_input, pil_image],
+                    )
+            image_parts = [
+                part.inline_data.data
+                for part in response.candidates[0].content.parts
+                if part.inline_data
+            ]
+            if not image_parts:
+                raise Exception("No image data found in API response")
+        except Exception as e:
+            raise Exception(f"Failed to generate image with Gemini: {str(e)}")
+
+        # Re-encode with the configured output policy (WebP/AVIF...)
+        with timed('codec'):
+            generated_image_file, master_image_file, output_metadata = await sync_to_async(
+                encode_render, thread_sensitive=False
+            )(image_parts[0])
+        if not output_metadata['output_bytes']:
+            raise Exception("Generated image file is empty. Please check the API response.")
+
+        try:
+            generated_image = await sync_to_async(save_generated_image)(request.user, {
+                'original_image': original_image_file,
+                'generated_image': generated_image_file,
+                'master_image': master_image_file,
+            }, {
+                'style': style,
+                'room_type': room_type,
+                'description': description,
+                **output_metadata,
+            }, serializer.validated_data.get('upload_key', ''))
+        except Exception as save_error:
+            raise Exception(f"Failed to save generated image: {str(save_error)}")
+
+        return JsonResponse({
+            'message': 'Image generated successfully!',
+            'generated_image': GeneratedImageSerializer(generated_image).data
+        }, status=201)
+
+    except Exception as e:
+        return JsonResponse({
+            'error': f'Failed to generate image: {str(e)}'
+        }, status=500)
+
+
+@async_api_view(['POST'])
+async def purchase_credits_view(request):
+    try:
+        package_id = (await request_data(request)).get('package_id')
+    except exceptions.ParseError as exc:
+        return error_response(exc)
+
+    if not package_id:
+        return JsonResponse({
+            'error': 'package_id шаардлагатай'
+        }, status=400)
+
+    try:
+        package = await Package.objects.aget(id=package_id, is_active=True)
+    except (Package.DoesNotExist, ValueError):
+        return JsonResponse({
+            'error': 'Багц олдсонгүй'
+        }, status=404)
+
+    order = await Order.objects.acreate(
+        user=request.user,
+        package=package,
+        amount=package.price,
+        status='pending'
+    )
+
+    try:
+        async with qpay.client() as http:
+            qpay_response = await qpay.create_invoice(http, order, package)
+    except Exception as e:
+        order.status = 'failed'
+        await order.asave(update_fields=['status', 'updated_at'])
+        return JsonResponse({
+            'error': f'QPay invoice үүсгэхэд алдаа гарлаа: {str(e)}'
+        }, status=500)
+
+    order.qpay_invoice_id = qpay_response.get('invoice_id')
+    order.qpay_invoice_code = qpay_response.get('invoice_id')  # Using invoice_id as code
+    await order.asave(update_fields=['qpay_invoice_id', 'qpay_invoice_code', 'updated_at'])
+
+    return JsonResponse({
+        'message': 'QPay invoice амжилттай үүслээ',
+        'order': OrderSerializer(order).data,
+        'qpay_invoice': {
+            'invoice_id': qpay_response.get('invoice_id'),
+            'qr_text': qpay_response.get('qr_text'),
+            'qr_image': qpay_response.get('qr_image'),
+            'qPay_shortUrl': qpay_response.get('qPay_shortUrl'),
+            'urls': qpay_response.get('urls', [])
+        }
+    }, status=201)
+
+
+@transaction.atomic
+def mark_order_paid(order):
+    """Mark a pending order paid and add its credits; False if it was already handled"""
+    updated = Order.objects.filter(pk=order.pk, status='pending').update(
+        status='paid', updated_at=timezone.now()
+    )
+    if updated:
+        CreditTransaction.objects.create(
+            user_id=order.user_id,
+            amount=order.package.credits,
+            transaction_type='add',
+            description=f'Purchased {order.package.name} package - {order.package.credits} credits'
+        )
+    return bool(updated)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+async def qpay_webhook_view(request):
+    """QPay webhook to handle payment confirmations"""
+    invoice_id = request.GET.get('invoiceid')
+    if not invoice_id:
+        try:
+            invoice_id = (await request_data(request)).get('invoiceid')
+        except exceptions.ParseError:
+            invoice_id = None
+    if not invoice_id:
+        return HttpResponse('invoiceid шаардлагатай', status=400)
+
+    pending = Order.objects.select_related('package').filter(status='pending')
+    try:
+        # Try to find order by order.id (sender_invoice_no) or qpay_invoice_id
+        try:
+            order = await pending.aget(id=int(invoice_id))
+        except (Order.DoesNotExist, ValueError):
+            order = await pending.aget(qpay_invoice_id=invoice_id)
+    except Order.DoesNotExist:
+        return HttpResponse('Order олдсонгүй эсвэл аль хэдийн боловсруулагдсан', status=404)
+
+    if not order.qpay_invoice_id:
+        return HttpResponse('Order дээр QPay invoice ID байхгүй байна', status=400)
+
+    try:
+        async with qpay.client() as http:
+            check_data = await qpay.check_payment(http, order.qpay_invoice_id)
+    except qpay.QPayError as e:
+        return HttpResponse(str(e), status=500)
+    except Exception as e:
+        return HttpResponse(f'Webhook боловсруулах явцад алдаа: {str(e)}', status=500)
+
+    if check_data.get('paid_amount', 0) < order.amount:
+        return HttpResponse('Төлбөр хангалтгүй байна', status=400)
+
+    # A repeated callback finds the order already paid and adds nothing
+    await sync_to_async(mark_order_paid)(order)
+    return HttpResponse('qPay_webHookTest')
+
+
+@async_api_view(['GET'])
+async def check_order_status_view(request):
+    """Check order payment status"""
+    order_id = request.GET.get('order_id')
+
+    if not order_id:
+        return JsonResponse({
+            'error': 'order_id шаардлагатай'
+        }, status=400)
+
+    try:
+        order = await Order.objects.select_related('package').aget(id=int(order_id), user=request.user)
+    except Order.DoesNotExist:
+        return JsonResponse({
+            'error': 'Order олдсонгүй'
+        }, status=404)
+    except ValueError:
+        return JsonResponse({
+            'error': 'Буруу order_id'
+        }, status=400)
+
+    return JsonResponse({
+        'order_id': order.id,
+        'status': order.status,
+        'is_paid': order.status == 'paid',
+        'credits': order.package.credits if order.status == 'paid' else 0
+    })
@@ -7,7 +7,10 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
 
+from .pagecache import cache_anonymous_page
 
+
+@cache_anonymous_page('landing')
 def landing_view(request):
     """Landing page for marketing and conversion"""
     return render(request, 'landing.html')
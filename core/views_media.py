@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import Http404, HttpResponseRedirect
+from django.views.decorators.http import require_GET
+
+from .lifecycle import restore_original
+from .media import IMMUTABLE_MAX_AGE, has_valid_signature, serve_media
+from .models import GeneratedImage
+from .storage import is_user_upload_key
+
+
+def find_media_record(name):
+    """GeneratedImage that references stored file ``name``, if any"""
+    return GeneratedImage.objects.filter(
+        Q(original_image=name) | Q(generated_image=name) | Q(master_image=name)
+    ).only('id', 'user_id', 'original_image', 'original_archived_at').first()
+
+
+def user_can_access(user, name, record):
+    """Owner (or staff) check for a stored media file"""
+    if not user.is_authenticated:
+        return False
+    if user.is_staff:
+        return True
+    if is_user_upload_key(user, name):
+        return True
+    return record is not None and record.user_id == user.pk
+
+
+@require_GET
+def media_view(request, path):
+    """Serve a file from MEDIA_ROOT after checking ownership or a signed URL"""
+    record = find_media_record(path)
+    if not has_valid_signature(path, request.GET) and not user_can_access(request.user, path, record):
+        # 404 rather than 403 so file names can't be probed
+        raise Http404('File not found')
+
+    if record and record.original_archived_at and record.original_image.name == path:
+        # Original was moved to the cold tier; bring it back before serving
+        restore_original(record)
+
+    if settings.MEDIA_STORAGE != 'local':
+        # Object storage serves the bytes; hand out its (presigned) URL
+        return HttpResponseRedirect(default_storage.url(path))
+
+    return serve_media(path, f'private, max-age={IMMUTABLE_MAX_AGE}, immutable')
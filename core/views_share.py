@@ -0,0 +1,74 @@
+"""
+Public share pages (``/s/<token>/``).
+
+Nothing here looks at the session or the user, so responses carry no
+``Vary: Cookie`` and a CDN can cache them for every visitor. The page and its
+images are cached for ``SHARE_PAGE_MAX_AGE``, so a revoked link disappears
+from the CDN within that time. An unknown token is never cached: right after
+sharing, a lagging replica may not have the link yet.
+"""
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+from django.views.defaults import page_not_found
+
+from .media import serve_media
+from .models import ShareLink
+
+
+SHARE_ASSETS = {
+    'composite.webp': 'composite',
+    'og.jpg': 'og_image',
+}
+
+
+def get_share(token):
+    return ShareLink.objects.select_related('image').only(
+        'token', 'composite', 'og_image', 'created_at',
+        'image__style', 'image__room_type', 'image__output_width', 'image__output_height',
+    ).filter(token=token).first()
+
+
+def share_not_found(request):
+    response = page_not_found(request, Http404('Share link not found'))
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def cache_publicly(response):
+    patch_cache_control(response, public=True, max_age=settings.SHARE_PAGE_MAX_AGE)
+    return response
+
+
+@require_GET
+def share_page(request, token):
+    share = get_share(token)
+    if share is None:
+        return share_not_found(request)
+    response = render(request, 'share.html', {
+        'share': share,
+        'page_url': request.build_absolute_uri(reverse('core:share', args=[token])),
+        'composite_url': reverse('core:share_asset', args=[token, 'composite.webp']),
+        'og_image_url': request.build_absolute_uri(reverse('core:share_asset', args=[token, 'og.jpg'])),
+    })
+    return cache_publicly(response)
+
+
+@require_GET
+def share_asset(request, token, asset):
+    field = SHARE_ASSETS.get(asset)
+    share = get_share(token) if field else None
+    if field is None or share is None:
+        return share_not_found(request)
+    name = getattr(share, field).name
+
+    # Not immutable: a revoked link's images must leave the CDN with its page
+    if settings.MEDIA_STORAGE != 'local':
+        # Object storage (or its CDN) serves the bytes
+        return cache_publicly(HttpResponseRedirect(default_storage.url(name)))
+
+    return serve_media(name, f'public, max-age={settings.SHARE_PAGE_MAX_AGE}')
@@ -0,0 +1,38 @@
+"""
+Boot-time warm-up for preforking servers.
+
+The views import the Gemini SDK, Pillow and httpx on first use, so
+``manage.py`` commands and tests never pay for them. A server worker would
+instead pay on its first generation request. ``warm_up()`` imports
+``WARMUP_MODULES``, registers the Pillow plugins and loads the URLconf up
+front; called in a master that forks afterwards, the workers share those
+pages copy-on-write. It does not open database connections, which must not
+be shared across a fork.
+"""
+import importlib
+import logging
+import time
+
+from django.conf import settings
+from django.urls import get_resolver
+
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    started = time.perf_counter()
+    for module in settings.WARMUP_MODULES:
+        importlib.import_module(module)
+
+    from PIL import Image
+
+    Image.init()
+    get_resolver().url_patterns
+    logger.info("Warm-up finished in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+def warm_up_if_enabled():
+    """Called from the WSGI/ASGI modules once the application is created"""
+    if settings.WARMUP_ON_BOOT:
+        warm_up()
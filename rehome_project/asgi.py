@@ -11,6 +11,10 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from core.warmup import warm_up_if_enabled
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rehome_project.settings')
 
 application = get_asgi_application()
+
+warm_up_if_enabled()
@@ -45,14 +45,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.timing.ServerTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'rehome_project.urls'
@@ -77,13 +80,123 @@ WSGI_APPLICATION = 'rehome_project.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# DB_ENGINE=sqlite (default, single server) or postgresql. Set DB_REPLICA_HOST
+# to send the read-only views in DB_REPLICA_VIEWS to a streaming replica.
+
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='rehome'),
+            'USER': config('DB_USER', default='rehome'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            # Keep connections open between requests instead of reconnecting each time
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if config('DB_POOL', default=False, cast=bool):
+        # psycopg 3 connection pool, shared by the threads of a process (ASGI);
+        # Django requires CONN_MAX_AGE = 0 with it
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+
+    DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+    if DB_REPLICA_HOST:
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': DB_REPLICA_HOST,
+            'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    # WAL lets readers run while a write is in progress; NORMAL sync is safe
+    # with WAL and avoids an fsync per commit. WAL is stored in the database
+    # file itself, so it is opt-in (DB_SQLITE_WAL) for the server's database
+    # rather than switched on by whatever command connects first.
+    DB_SQLITE_WAL = config('DB_SQLITE_WAL', default=False, cast=bool)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                'init_command': (
+                    ('PRAGMA journal_mode=WAL;PRAGMA synchronous=NORMAL;' if DB_SQLITE_WAL else '')
+                    + 'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA mmap_size=134217728;'
+                    'PRAGMA cache_size=-20000;'
+                ),
+                # Take the write lock when a transaction starts, so concurrent
+                # writers wait for it (up to "timeout" seconds) instead of failing
+                # with "database is locked" halfway through
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': config('DB_TIMEOUT', default=20, cast=int),
+            },
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+
+# URL names of read-only views served from the replica
+DB_REPLICA_VIEWS = ['core:dashboard', 'core:recent_images', 'core:packages', 'core:rollup_stats', 'core:image_history', 'core:share', 'core:share_asset']
+
+# After a write, a client reads from the primary for this long so it sees its
+# own changes despite replication lag
+DB_REPLICA_PIN_SECONDS = config('DB_REPLICA_PIN_SECONDS', default=5, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Set REDIS_URL in production so every worker process shares the same cache
+# (OTP codes, rate limits). Without it each process keeps its own local cache.
+# Metrics counters get their own alias: they never expire, and in the local
+# cache they would otherwise push OTP codes and rate-limit counters out.
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'metrics': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'metrics',
+        },
+        'thumbnails': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'thumbnails',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'metrics': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'metrics',
+            # One key per view, phase and bucket
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        },
+        # Admin thumbnails are culled here instead of OTP codes and counters
+        'thumbnails': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'thumbnails',
+        },
     }
-}
 
 
 # Password validation
@@ -127,6 +240,82 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media storage: 'local' (MEDIA_ROOT) or 's3' for any S3-compatible object
+# store (AWS S3, MinIO, R2...). 's3' requires django-storages[s3].
+MEDIA_STORAGE = config('MEDIA_STORAGE', default='local')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    # Hashed names + precompressed .gz/.br variants written by collectstatic.
+    # Development serves the plain files so no collectstatic run is needed.
+    'staticfiles': {
+        'BACKEND': config(
+            'STATICFILES_BACKEND',
+            default='django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'core.staticfiles.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
+if MEDIA_STORAGE == 's3':
+    STORAGES['default'] = {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': config('S3_BUCKET_NAME', default='rehome-media'),
+            'endpoint_url': config('S3_ENDPOINT_URL', default=''),
+            'access_key': config('S3_ACCESS_KEY', default=''),
+            'secret_key': config('S3_SECRET_KEY', default=''),
+            'region_name': config('S3_REGION_NAME', default=''),
+            'location': config('S3_LOCATION', default=''),
+            'file_overwrite': False,
+            'querystring_auth': True,
+        },
+    }
+
+# Cold tier for old originals (see core.lifecycle). Point COLD_STORAGE_BACKEND
+# at e.g. storages.backends.s3.S3Storage with a cheaper storage class in production.
+STORAGES['cold'] = {
+    'BACKEND': config('COLD_STORAGE_BACKEND', default='django.core.files.storage.FileSystemStorage'),
+    'OPTIONS': {
+        'location': config('COLD_STORAGE_ROOT', default=str(BASE_DIR / 'media_cold')),
+    },
+}
+
+# Media lifecycle: originals older than this are archived to the cold tier;
+# unreferenced files younger than the grace period are never swept, so
+# in-flight saves are left alone.
+MEDIA_ARCHIVE_AFTER_DAYS = config('MEDIA_ARCHIVE_AFTER_DAYS', default=90, cast=int)
+MEDIA_ORPHAN_GRACE_HOURS = config('MEDIA_ORPHAN_GRACE_HOURS', default=48, cast=int)
+
+# Direct uploads: clients get a presigned target from /api/upload-intent/.
+# LocalUploadBackend is a stand-in that receives the upload in Django.
+UPLOAD_BACKEND = config(
+    'UPLOAD_BACKEND',
+    default='core.storage.S3UploadBackend' if MEDIA_STORAGE == 's3' else 'core.storage.LocalUploadBackend'
+)
+UPLOAD_MAX_BYTES = config('UPLOAD_MAX_BYTES', default=15 * 1024 * 1024, cast=int)
+UPLOAD_URL_TTL = config('UPLOAD_URL_TTL', default=900, cast=int)
+
+# Resumable chunked uploads (/api/uploads/). Chunks are assembled in
+# CHUNKED_UPLOAD_TEMP_DIR, which must be shared by all app servers.
+CHUNKED_UPLOAD_TEMP_DIR = config('CHUNKED_UPLOAD_TEMP_DIR', default=str(BASE_DIR / 'tmp' / 'uploads'))
+CHUNKED_UPLOAD_CHUNK_SIZE = config('CHUNKED_UPLOAD_CHUNK_SIZE', default=1024 * 1024, cast=int)
+CHUNKED_UPLOAD_MAX_CHUNK = config('CHUNKED_UPLOAD_MAX_CHUNK', default=8 * 1024 * 1024, cast=int)
+CHUNKED_UPLOAD_TTL = config('CHUNKED_UPLOAD_TTL', default=24 * 3600, cast=int)
+
+# Media delivery: 'django' streams files from Python (development), 'nginx'
+# answers with X-Accel-Redirect to MEDIA_ACCEL_PREFIX, which must be an
+# `internal` location aliased to MEDIA_ROOT, 'apache' answers with X-Sendfile
+# (mod_xsendfile).
+MEDIA_DELIVERY = config('MEDIA_DELIVERY', default='django')
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
+# Serialize image URLs as expiring signed URLs (needed by token-auth clients,
+# whose <img> requests carry no session)
+MEDIA_SIGNED_URLS = config('MEDIA_SIGNED_URLS', default=False, cast=bool)
+MEDIA_URL_TTL = config('MEDIA_URL_TTL', default=3600, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -135,11 +324,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'core.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Number of trusted reverse proxies in front of the app; used to pick the
+    # client IP for throttling. 0 means REMOTE_ADDR (X-Forwarded-For is ignored).
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
 # CORS settings
@@ -158,3 +351,113 @@ QPAY_USERNAME = config('QPAY_USERNAME', default='LIFE_MART')
 QPAY_PASSWORD = config('QPAY_PASSWORD', default='VajrMvGY')
 QPAY_INVOICE_CODE = config('QPAY_INVOICE_CODE', default='LIFE_MART_INVOICE')
 QPAY_CALLBACK_BASE_URL = config('QPAY_CALLBACK_BASE_URL', default='http://localhost:8000')
+QPAY_TIMEOUT = config('QPAY_TIMEOUT', default=15, cast=float)  # seconds per QPay API call
+
+# OTP settings
+# CacheOTPBackend stores codes in the cache with native expiry; it needs a cache
+# shared by all workers, so it is the default only with REDIS_URL.
+# DatabaseOTPBackend keeps the legacy OTPCode table behaviour.
+OTP_BACKEND = config(
+    'OTP_BACKEND',
+    default='core.otp.CacheOTPBackend' if REDIS_URL else 'core.otp.DatabaseOTPBackend'
+)
+OTP_CACHE_ALIAS = config('OTP_CACHE_ALIAS', default='default')
+OTP_TTL_SECONDS = config('OTP_TTL_SECONDS', default=300, cast=int)
+
+# OTP rate limits: (max requests, window in seconds) per identifier and per client IP
+RATELIMIT_CACHE_ALIAS = config('RATELIMIT_CACHE_ALIAS', default='default')
+OTP_RATE_LIMITS = {
+    'send': {
+        'identifier': (config('OTP_SEND_LIMIT_PER_IDENTIFIER', default=5, cast=int), 3600),
+        'ip': (config('OTP_SEND_LIMIT_PER_IP', default=20, cast=int), 3600),
+    },
+    'verify': {
+        'identifier': (config('OTP_VERIFY_LIMIT_PER_IDENTIFIER', default=10, cast=int), 900),
+        'ip': (config('OTP_VERIFY_LIMIT_PER_IP', default=50, cast=int), 900),
+    },
+}
+
+# Signed API tokens (optional). When enabled, /api/verify-otp/ called with
+# {"auth": "token"} returns an access/refresh pair instead of creating a session.
+# Access tokens are not checked against the database, so a deactivated user
+# keeps access until the token expires. Refresh tokens work once; logout and a
+# password change revoke them.
+API_TOKEN_AUTH = config('API_TOKEN_AUTH', default=False, cast=bool)
+API_TOKEN_ACCESS_TTL = config('API_TOKEN_ACCESS_TTL', default=900, cast=int)
+API_TOKEN_REFRESH_TTL = config('API_TOKEN_REFRESH_TTL', default=14 * 24 * 3600, cast=int)
+
+# Encoding of generated renders. format: WEBP, AVIF (falls back to WEBP when no
+# encoder is available), JPEG or PNG. effort: 0 (fastest) .. 6 (smallest).
+# keep_master stores the untouched model output next to the encoded render.
+RENDER_OUTPUT = {
+    'format': config('RENDER_OUTPUT_FORMAT', default='WEBP'),
+    'quality': config('RENDER_OUTPUT_QUALITY', default=82, cast=int),
+    'effort': config('RENDER_OUTPUT_EFFORT', default=4, cast=int),
+    'keep_master': config('RENDER_KEEP_MASTER', default=False, cast=bool),
+}
+
+# Responsive renditions of bundled images (manage.py build_renditions)
+RENDITIONS = {
+    'sources': ['img', 'interior_styles'],
+    'output_dir': 'renditions',
+    'widths': [192, 384, 640, 960, 1280],
+    # AVIF reaches the same visual quality at a lower setting
+    'quality': {'AVIF': 55, 'WEBP': 72, 'JPEG': 78},
+    'effort': config('RENDITIONS_EFFORT', default=6, cast=int),
+}
+
+# Full-page cache for anonymous visitors (core.pagecache). Bump
+# PAGE_CACHE_VERSION on deploy or run `manage.py purge_page_cache`.
+PAGE_CACHE_ENABLED = config('PAGE_CACHE_ENABLED', default=not DEBUG, cast=bool)
+PAGE_CACHE_ALIAS = config('PAGE_CACHE_ALIAS', default='default')
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=600, cast=int)
+PAGE_CACHE_VERSION = config('PAGE_CACHE_VERSION', default='1')
+PAGE_CACHE_PAGES = ['landing']
+
+# Request timing (Server-Timing header) and Prometheus metrics at /metrics.
+# Scrapers send "Authorization: Bearer <METRICS_TOKEN>"; without a token only
+# staff sessions can read the endpoint. The header exposes internal timings on
+# public (CDN-cached) responses too, so it is off unless enabled.
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=False, cast=bool)
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_CACHE_ALIAS = config('METRICS_CACHE_ALIAS', default='metrics')
+METRICS_FLUSH_SECONDS = config('METRICS_FLUSH_SECONDS', default=10, cast=int)
+
+# Sampling profiler (core.profiling). Profiles PROFILING_SAMPLE_RATE of all
+# requests, plus staff requests sending the PROFILING_HEADER header; results
+# are listed under "Request profiles" in the admin. Run
+# `manage.py purge_request_profiles` daily to drop rows older than
+# PROFILING_RETENTION_DAYS.
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_HEADER = config('PROFILING_HEADER', default='X-Profile')
+PROFILING_INTERVAL_MS = config('PROFILING_INTERVAL_MS', default=5, cast=int)
+PROFILING_RETENTION_DAYS = config('PROFILING_RETENTION_DAYS', default=14, cast=int)
+
+# Heavy SDKs (Gemini, Pillow, httpx) load on first use. With a preforking
+# server that imports the app once in its master (gunicorn --preload), set
+# WARMUP_ON_BOOT so the master loads them and every worker inherits them.
+WARMUP_ON_BOOT = config('WARMUP_ON_BOOT', default=False, cast=bool)
+WARMUP_MODULES = [
+    'google.genai',
+    'httpx',
+    'PIL.Image',
+    'core.views_async',
+]
+
+# Admin changelists of tables above this many rows show an estimated total
+# instead of running COUNT(*) (core.pagination)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100000, cast=int)
+ADMIN_THUMBNAIL_CACHE_ALIAS = config('ADMIN_THUMBNAIL_CACHE_ALIAS', default='thumbnails')
+
+# Analytics rollups (manage.py update_rollups, from cron). Rows newer than
+# this are left for the next run so late commits are not skipped.
+ROLLUP_LAG_SECONDS = config('ROLLUP_LAG_SECONDS', default=300, cast=int)
+
+# Public share links (core.sharing). The before/after composite is built once
+# at this height; share pages and their images may be cached by a CDN for
+# SHARE_PAGE_MAX_AGE, which is also how long a revoked link can stay visible
+# there.
+SHARE_COMPOSITE_HEIGHT = config('SHARE_COMPOSITE_HEIGHT', default=720, cast=int)
+SHARE_IMAGE_QUALITY = config('SHARE_IMAGE_QUALITY', default=80, cast=int)
+SHARE_PAGE_MAX_AGE = config('SHARE_PAGE_MAX_AGE', default=3600, cast=int)
@@ -17,13 +17,15 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from core.metrics import metrics_view
+from core.views_media import media_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('core.urls')),
+    # Media is always served through an ownership check; the bytes are sent by
+    # the front web server when MEDIA_DELIVERY is nginx/apache
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", media_view, name='media'),
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
 ]
-
-# Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
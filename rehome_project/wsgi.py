@@ -11,6 +11,10 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from core.warmup import warm_up_if_enabled
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rehome_project.settings')
 
 application = get_wsgi_application()
+
+warm_up_if_enabled()
@@ -0,0 +1,10 @@
+// Authentication check
+fetch('/api/dashboard/')
+    .then(response => {
+        if (!response.ok) {
+            window.location.href = '/';
+        }
+    })
+    .catch(() => {
+        window.location.href = '/';
+    });
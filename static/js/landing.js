@@ -0,0 +1,1143 @@
+// Interior style data with image URLs
+const interiorStyles = [
+    { "en": "Minimalist Haven", "mn": "Минималист орчин", "image": "/static/interior_styles/minimalist-haven.webp" },
+    { "en": "Modern Fusion", "mn": "Орчин үеийн хослол", "image": "/static/interior_styles/modern-fusion.webp" },
+    { "en": "Contemporary Elegance", "mn": "Орчин үеийн тансаг байдал", "image": "/static/interior_styles/contemporary-elegance.webp" },
+    { "en": "Industrial Loft", "mn": "Аж үйлдвэрийн хэв маяг", "image": "/static/interior_styles/industrial-loft.webp" },
+    { "en": "Bohemian Oasis", "mn": "Богемийн уур амьсгал", "image": "/static/interior_styles/bohemian-oasis.webp" },
+    { "en": "Coastal Breeze", "mn": "Далайн эргийн сэрүүн уур амьсгал", "image": "/static/interior_styles/coastal-breeze.webp" },
+    { "en": "Desert Retreat", "mn": "Цөлийн амралтын хэв маяг", "image": "/static/interior_styles/desert-retreat.webp" },
+    { "en": "Mountain Escape", "mn": "Уулын амралтын хэв маяг", "image": "/static/interior_styles/mountain-escape.webp" },
+    { "en": "Victorian Elegance", "mn": "Викториан тансаг байдал", "image": "/static/interior_styles/victorian-elegance.webp" },
+    { "en": "Art Deco Glamour", "mn": "Арт Деко гоёл чимэглэл", "image": "/static/interior_styles/art-deco-glamour.webp" },
+    { "en": "Mid-Century Modern", "mn": "20-р зууны дунд үеийн орчин үеийн хэв маяг", "image": "/static/interior_styles/mid-century-modern.webp" },
+    { "en": "French Country Charm", "mn": "Франц загварын хөдөөгийн хэв маяг", "image": "/static/interior_styles/french-country-charm.webp" },
+    { "en": "Colonial Classic", "mn": "Колони хэв маягийн сонгодог орчин", "image": "/static/interior_styles/colonial-classic.webp" },
+    { "en": "Scandinavian Sanctuary", "mn": "Скандинав минимал орчин", "image": "/static/interior_styles/scandinavian-sanctuary.webp" },
+    { "en": "Japanese Zen", "mn": "Япон Зэн хэв маяг", "image": "/static/interior_styles/japanese-zen.webp" }
+];
+
+// Selected values
+let selectedRoomType = '';
+let selectedRoomTypeMn = '';
+let selectedInteriorStyle = '';
+
+// Initialize room type buttons
+function initializeRoomTypes() {
+    document.querySelectorAll('.room-type-btn').forEach(btn => {
+        btn.addEventListener('click', function() {
+            // Check authentication
+            if (!isAuthenticated) {
+                openLoginModal();
+                return;
+            }
+
+            const roomMn = this.dataset.roomMn;
+            const roomEn = this.dataset.roomEn;
+
+            selectedRoomType = roomEn;
+            selectedRoomTypeMn = roomMn;
+
+            // Remove all active states first
+            document.querySelectorAll('.room-type-btn').forEach(b => {
+                // Temporarily disable transition
+                b.style.transition = 'none';
+                b.classList.remove('bg-primary-600', 'text-white');
+                b.classList.add('bg-gray-700', 'text-gray-300');
+                // Re-enable transition after a brief moment
+                setTimeout(() => {
+                    b.style.transition = '';
+                }, 10);
+            });
+
+            // Add active state to clicked button
+            this.style.transition = 'none';
+            this.classList.remove('bg-gray-700', 'text-gray-300');
+            this.classList.add('bg-primary-600', 'text-white');
+            setTimeout(() => {
+                this.style.transition = '';
+            }, 10);
+        });
+    });
+}
+
+// Responsive variants of the style images (from build_renditions), keyed by static path
+const styleRenditions = JSON.parse(document.getElementById('style-renditions')?.textContent || '{}');
+
+function styleImageSources(style) {
+    const variants = styleRenditions[style.image.replace(/^\/static\//, '')] || [];
+    return variants.map(([type, srcset]) => `<source type="${type}" srcset="${srcset}" sizes="(min-width: 640px) 33vw, 50vw">`).join('');
+}
+
+// Populate interior styles
+function populateInteriorStyles(showAll = false) {
+    const container = document.getElementById('interior-style-container');
+    if (!container) return;
+
+    let html = '';
+    const stylesToShow = showAll ? interiorStyles : interiorStyles.slice(0, 3);
+
+    stylesToShow.forEach((style, index) => {
+        html += `<button class="interior-style-btn bg-gray-700 rounded-lg p-4 text-center cursor-pointer hover:bg-gray-600 transition-all overflow-hidden group border-2 border-transparent" data-style="${style.en}" data-index="${index}">
+            <div class="w-full h-32 rounded mb-2 overflow-hidden bg-gray-600">
+                <picture class="block w-full h-full">${styleImageSources(style)}
+                    <img src="${style.image}" alt="${style.mn}" class="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300" onerror="this.src='data:image/svg+xml,%3Csvg xmlns=\\'http://www.w3.org/2000/svg\\' width=\\'400\\' height=\\'300\\'%3E%3Crect fill=\\'%234b5563\\' width=\\'400\\' height=\\'300\\'/%3E%3C/svg%3E'">
+                </picture>
+            </div>
+            <p class="text-sm font-medium text-white">${style.mn}</p>
+            <p class="text-xs text-gray-400 mt-1">${style.en}</p>
+        </button>`;
+    });
+
+    container.innerHTML = html;
+
+    // Add click handlers
+    document.querySelectorAll('.interior-style-btn').forEach(btn => {
+        btn.addEventListener('click', function() {
+            // Check authentication
+            if (!isAuthenticated) {
+                openLoginModal();
+                return;
+            }
+
+            document.querySelectorAll('.interior-style-btn').forEach(b => {
+                b.classList.remove('border-primary-500', 'bg-primary-600');
+                b.classList.add('border-transparent', 'bg-gray-700');
+            });
+            this.classList.add('border-primary-500', 'bg-primary-600');
+            this.classList.remove('border-transparent', 'bg-gray-700');
+
+            selectedInteriorStyle = this.dataset.style;
+        });
+    });
+}
+
+// Initialize room types
+initializeRoomTypes();
+
+// Populate interior styles (show only first 3)
+populateInteriorStyles(false);
+
+// See more/less buttons for interior styles
+const seeMoreBtn = document.getElementById('see-more-styles-btn');
+const seeLessBtn = document.getElementById('see-less-styles-btn');
+
+if (seeMoreBtn) {
+    seeMoreBtn.addEventListener('click', function() {
+        populateInteriorStyles(true);
+        seeMoreBtn.classList.add('hidden');
+        if (seeLessBtn) seeLessBtn.classList.remove('hidden');
+    });
+}
+
+if (seeLessBtn) {
+    seeLessBtn.addEventListener('click', function() {
+        populateInteriorStyles(false);
+        seeLessBtn.classList.add('hidden');
+        if (seeMoreBtn) seeMoreBtn.classList.remove('hidden');
+    });
+}
+
+// Image upload preview
+const imageInput = document.getElementById('image');
+const imagePreview = document.getElementById('image-preview');
+const previewImg = document.getElementById('preview-img');
+const uploadArea = document.getElementById('upload-area');
+const submitText = document.getElementById('submit-text');
+const loadingText = document.getElementById('loading-text');
+const result = document.getElementById('result');
+const generateBtn = document.getElementById('generate-btn');
+
+// Check if user is authenticated
+const isAuthenticated = document.body.dataset.authenticated === 'true';
+
+imageInput.addEventListener('change', function(e) {
+    const file = e.target.files[0];
+    if (file) {
+        // Check authentication before allowing image selection
+        if (!isAuthenticated) {
+            imageInput.value = '';
+            openSignupModal();
+            return;
+        }
+
+        const reader = new FileReader();
+        reader.onload = function(e) {
+            previewImg.src = e.target.result;
+            imagePreview.classList.remove('hidden');
+            uploadArea.classList.add('hidden');
+        };
+        reader.readAsDataURL(file);
+    }
+});
+
+// Remove image button
+const removeImageBtn = document.getElementById('remove-image-btn');
+if (removeImageBtn) {
+    removeImageBtn.addEventListener('click', function(e) {
+        e.preventDefault();
+        imageInput.value = '';
+        imagePreview.classList.add('hidden');
+        uploadArea.classList.remove('hidden');
+    });
+}
+
+// Generate button
+generateBtn.addEventListener('click', async function(e) {
+    e.preventDefault();
+
+    // Check authentication
+    if (!isAuthenticated) {
+        openSignupModal();
+        return;
+    }
+
+    // Check for image
+    if (!imageInput.files[0]) {
+        alert('Зураг байршуулна уу');
+        return;
+    }
+
+    if (!selectedRoomType) {
+        alert('Өрөөний төрөл сонгоно уу');
+        return;
+    }
+
+    if (!selectedInteriorStyle) {
+        alert('Интерьерийн хэв маяг сонгоно уу');
+        return;
+    }
+
+    // Show loading state
+    if (submitText) submitText.classList.add('hidden');
+    if (loadingText) loadingText.classList.remove('hidden');
+    generateBtn.disabled = true;
+
+    // Show result section immediately and scroll to top
+    showResultSection();
+
+    // Prepare form data
+    const formData = new FormData();
+    formData.append('image', imageInput.files[0]);
+    formData.append('room_type', selectedRoomType);
+    formData.append('style', selectedInteriorStyle);
+    formData.append('description', document.getElementById('description').value || '');
+
+    try {
+        const response = await fetch('/api/generate/', {
+            method: 'POST',
+            body: formData,
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken'),
+            },
+        });
+
+        const data = await response.json();
+
+        if (response.ok) {
+            if (data.generated_image) {
+                updateGeneratedImage(data.generated_image);
+            } else {
+                console.error('Generated image data is missing');
+                alert('Зураг үүсгэхэд алдаа гарлаа');
+            }
+        } else {
+            alert('Алдаа: ' + data.error);
+        }
+    } catch (error) {
+        alert('Алдаа: ' + error.message);
+    } finally {
+        if (submitText) submitText.classList.remove('hidden');
+        if (loadingText) loadingText.classList.add('hidden');
+        generateBtn.disabled = false;
+    }
+});
+
+// Modal functions
+function openLoginModal() {
+    document.getElementById('loginModal').classList.remove('hidden');
+    document.body.style.overflow = 'hidden';
+}
+
+function closeLoginModal() {
+    document.getElementById('loginModal').classList.add('hidden');
+    document.body.style.overflow = 'auto';
+}
+
+function openSignupModal() {
+    document.getElementById('signupModal').classList.remove('hidden');
+    document.body.style.overflow = 'hidden';
+}
+
+function closeSignupModal() {
+    document.getElementById('signupModal').classList.add('hidden');
+    document.body.style.overflow = 'auto';
+}
+
+// Close modal on background click
+document.getElementById('loginModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        closeLoginModal();
+    }
+});
+
+document.getElementById('signupModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        closeSignupModal();
+    }
+});
+
+// Get CSRF token
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// Result section functions
+function showResultSection() {
+    const imageFile = imageInput.files[0];
+    const originalSrc = previewImg.src || (imageFile ? URL.createObjectURL(imageFile) : '');
+
+    const roomTypeText = selectedRoomTypeMn || selectedRoomType || 'Зочны өрөө';
+
+    let styleText = selectedInteriorStyle || 'Загвар';
+    const styleObj = interiorStyles.find(s => s.en === selectedInteriorStyle || s.mn === selectedInteriorStyle);
+    if (styleObj) {
+        styleText = styleObj.mn;
+    }
+
+    const originalImg = document.getElementById('result-original-img');
+    const originalContainer = originalImg?.closest('.bg-gray-700');
+    const generatedContainer = document.getElementById('generated-container');
+
+    if (originalImg && originalSrc) {
+        originalImg.src = originalSrc;
+
+        // When original image loads, match its height to generated container
+        originalImg.onload = function() {
+            if (originalContainer && generatedContainer) {
+                // Get the natural aspect ratio of the original image
+                const aspectRatio = originalImg.naturalHeight / originalImg.naturalWidth;
+                // Get the width of the container (they should be same width in grid)
+                const containerWidth = originalContainer.offsetWidth;
+                // Calculate height based on aspect ratio
+                const calculatedHeight = containerWidth * aspectRatio;
+                // Set both containers to the same height
+                originalContainer.style.height = calculatedHeight + 'px';
+                generatedContainer.style.height = calculatedHeight + 'px';
+            }
+        };
+    }
+
+    const resultTitle = document.getElementById('result-title');
+    if (resultTitle) {
+        resultTitle.textContent = roomTypeText + ', ' + styleText;
+    }
+
+    if (result) {
+        result.classList.remove('hidden');
+        window.scrollTo({ top: 0, behavior: 'smooth' });
+        startProgressSimulation(null);
+    }
+}
+
+function updateGeneratedImage(generatedImage) {
+    let generatedImageUrl = '';
+
+    if (typeof generatedImage === 'object' && generatedImage !== null) {
+        generatedImageUrl = generatedImage.generated_image || generatedImage.url || '';
+    } else if (typeof generatedImage === 'string') {
+        generatedImageUrl = generatedImage;
+    }
+
+    if (generatedImageUrl) {
+        const generatedImg = document.getElementById('result-generated-img');
+        const progressContainer = document.getElementById('progress-container');
+
+        if (generatedImg && progressContainer) {
+            if (window.progressInterval) {
+                window.pendingGeneratedImageUrl = generatedImageUrl;
+            } else {
+                generatedImg.src = generatedImageUrl;
+                generatedImg.onload = () => {
+                    progressContainer.classList.add('hidden');
+                    generatedImg.classList.remove('hidden');
+
+                    // Match generated image height to original image height
+                    const originalImg = document.getElementById('result-original-img');
+                    const originalContainer = originalImg?.closest('.bg-gray-700');
+                    const generatedContainer = document.getElementById('generated-container');
+
+                    if (originalContainer && generatedContainer && originalImg.complete) {
+                        // Get the natural aspect ratio of the original image
+                        const aspectRatio = originalImg.naturalHeight / originalImg.naturalWidth;
+                        // Get the width of the container
+                        const containerWidth = originalContainer.offsetWidth;
+                        // Calculate height based on aspect ratio
+                        const calculatedHeight = containerWidth * aspectRatio;
+                        // Set both containers to the same height
+                        originalContainer.style.height = calculatedHeight + 'px';
+                        generatedContainer.style.height = calculatedHeight + 'px';
+                    }
+
+                    const watermarkOverlay = document.getElementById('watermark-overlay');
+                    if (watermarkOverlay) {
+                        watermarkOverlay.classList.remove('hidden');
+                    }
+                    const downloadGeneratedBtn = document.getElementById('download-generated-btn');
+                    const downloadComparedBtn = document.getElementById('download-compared-btn');
+                    if (downloadGeneratedBtn) downloadGeneratedBtn.classList.remove('hidden');
+                    if (downloadComparedBtn) downloadComparedBtn.classList.remove('hidden');
+                };
+            }
+        }
+    }
+}
+
+function startProgressSimulation(generatedImageUrl) {
+    const progressBar = document.getElementById('progress-bar');
+    const progressText = document.getElementById('progress-text');
+    const progressContainer = document.getElementById('progress-container');
+    const generatedImg = document.getElementById('result-generated-img');
+
+    if (!progressBar || !progressText || !progressContainer || !generatedImg) {
+        return;
+    }
+
+    if (window.progressInterval) {
+        clearInterval(window.progressInterval);
+    }
+
+    progressBar.style.width = '0%';
+    progressText.textContent = '0%';
+    progressContainer.classList.remove('hidden');
+    generatedImg.classList.add('hidden');
+
+    let progress = 0;
+    window.progressInterval = setInterval(() => {
+        progress += Math.random() * 15;
+        if (progress > 100) progress = 100;
+
+        progressBar.style.width = progress + '%';
+        progressText.textContent = progress.toFixed(2) + '%';
+
+        if (progress >= 100) {
+            clearInterval(window.progressInterval);
+            window.progressInterval = null;
+
+            setTimeout(() => {
+                const imageUrl = window.pendingGeneratedImageUrl || generatedImageUrl;
+
+                if (imageUrl) {
+                    generatedImg.src = imageUrl;
+                    generatedImg.onload = () => {
+                        progressContainer.classList.add('hidden');
+                        generatedImg.classList.remove('hidden');
+
+                        // Match generated image height to original image height
+                        const originalImg = document.getElementById('result-original-img');
+                        const originalContainer = originalImg?.closest('.bg-gray-700');
+                        const generatedContainer = document.getElementById('generated-container');
+
+                        if (originalContainer && generatedContainer && originalImg.complete) {
+                            // Get the natural aspect ratio of the original image
+                            const aspectRatio = originalImg.naturalHeight / originalImg.naturalWidth;
+                            // Get the width of the container
+                            const containerWidth = originalContainer.offsetWidth;
+                            // Calculate height based on aspect ratio
+                            const calculatedHeight = containerWidth * aspectRatio;
+                            // Set both containers to the same height
+                            originalContainer.style.height = calculatedHeight + 'px';
+                            generatedContainer.style.height = calculatedHeight + 'px';
+                        }
+
+                        const watermarkOverlay = document.getElementById('watermark-overlay');
+                        if (watermarkOverlay) {
+                            watermarkOverlay.classList.remove('hidden');
+                        }
+                        const downloadGeneratedBtn = document.getElementById('download-generated-btn');
+                        const downloadComparedBtn = document.getElementById('download-compared-btn');
+                        if (downloadGeneratedBtn) downloadGeneratedBtn.classList.remove('hidden');
+                        if (downloadComparedBtn) downloadComparedBtn.classList.remove('hidden');
+                    };
+                    generatedImg.onerror = () => {
+                        progressText.textContent = 'Алдаа гарлаа';
+                    };
+                    window.pendingGeneratedImageUrl = null;
+                } else {
+                    progressText.textContent = 'Хүлээж байна...';
+                }
+            }, 500);
+        }
+    }, 200);
+}
+
+// Download functions
+function downloadGeneratedImage() {
+    const generatedImg = document.getElementById('result-generated-img');
+    if (!generatedImg || !generatedImg.src) {
+        alert('Зураг олдсонгүй');
+        return;
+    }
+
+    const canvas = document.createElement('canvas');
+    const ctx = canvas.getContext('2d');
+    const img = new Image();
+    img.crossOrigin = 'anonymous';
+
+    img.onload = () => {
+        canvas.width = img.width;
+        canvas.height = img.height;
+        ctx.drawImage(img, 0, 0);
+
+        const watermarkText = 'www.rehome.today';
+        const fontSize = Math.max(16, img.width / 40);
+        ctx.font = `${fontSize}px Arial`;
+        ctx.fillStyle = 'rgba(0, 0, 0, 0.6)';
+
+        const textMetrics = ctx.measureText(watermarkText);
+        const textWidth = textMetrics.width;
+        const textHeight = fontSize;
+        const padding = 10;
+
+        ctx.fillRect(
+            img.width - textWidth - padding * 2,
+            img.height - textHeight - padding * 2,
+            textWidth + padding * 2,
+            textHeight + padding * 2
+        );
+
+        ctx.fillStyle = 'white';
+        ctx.fillText(
+            watermarkText,
+            img.width - textWidth - padding,
+            img.height - padding
+        );
+
+        canvas.toBlob((blob) => {
+            const url = URL.createObjectURL(blob);
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = 'rehome-generated-' + Date.now() + '.png';
+            document.body.appendChild(a);
+            a.click();
+            document.body.removeChild(a);
+            URL.revokeObjectURL(url);
+        }, 'image/png');
+    };
+
+    img.onerror = () => {
+        const a = document.createElement('a');
+        a.href = generatedImg.src;
+        a.download = 'rehome-generated-' + Date.now() + '.png';
+        document.body.appendChild(a);
+        a.click();
+        document.body.removeChild(a);
+    };
+
+    img.src = generatedImg.src;
+}
+
+function downloadComparedImage() {
+    const originalImg = document.getElementById('result-original-img');
+    const generatedImg = document.getElementById('result-generated-img');
+
+    if (!originalImg || !originalImg.src || !generatedImg || !generatedImg.src) {
+        alert('Зураг олдсонгүй');
+        return;
+    }
+
+    const img1 = new Image();
+    const img2 = new Image();
+    img1.crossOrigin = 'anonymous';
+    img2.crossOrigin = 'anonymous';
+
+    let loadedCount = 0;
+    const onImageLoad = () => {
+        loadedCount++;
+        if (loadedCount === 2) {
+            const canvas = document.createElement('canvas');
+            const ctx = canvas.getContext('2d');
+
+            const maxHeight = Math.max(img1.height, img2.height);
+            const scale1 = maxHeight / img1.height;
+            const scale2 = maxHeight / img2.height;
+            const scaledWidth1 = img1.width * scale1;
+            const scaledWidth2 = img2.width * scale2;
+            const totalWidth = scaledWidth1 + scaledWidth2;
+
+            canvas.width = totalWidth;
+            canvas.height = maxHeight;
+
+            ctx.fillStyle = '#374151';
+            ctx.fillRect(0, 0, canvas.width, canvas.height);
+            ctx.drawImage(img1, 0, 0, scaledWidth1, maxHeight);
+            ctx.drawImage(img2, scaledWidth1, 0, scaledWidth2, maxHeight);
+
+            const watermarkText = 'www.rehome.today';
+            const fontSize = Math.max(16, maxHeight / 40);
+            ctx.font = `${fontSize}px Arial`;
+            ctx.fillStyle = 'rgba(0, 0, 0, 0.6)';
+
+            const textMetrics = ctx.measureText(watermarkText);
+            const textWidth = textMetrics.width;
+            const textHeight = fontSize;
+            const padding = 10;
+
+            ctx.fillRect(
+                scaledWidth1 + scaledWidth2 - textWidth - padding * 2,
+                maxHeight - textHeight - padding * 2,
+                textWidth + padding * 2,
+                textHeight + padding * 2
+            );
+
+            ctx.fillStyle = 'white';
+            ctx.fillText(
+                watermarkText,
+                scaledWidth1 + scaledWidth2 - textWidth - padding,
+                maxHeight - padding
+            );
+
+            canvas.toBlob((blob) => {
+                const url = URL.createObjectURL(blob);
+                const a = document.createElement('a');
+                a.href = url;
+                a.download = 'rehome-compared-' + Date.now() + '.png';
+                document.body.appendChild(a);
+                a.click();
+                document.body.removeChild(a);
+                URL.revokeObjectURL(url);
+            }, 'image/png');
+        }
+    };
+
+    img1.onload = onImageLoad;
+    img2.onload = onImageLoad;
+    img1.onerror = () => {
+        alert('Анхны зураг ачаалж чадсангүй');
+    };
+    img2.onerror = () => {
+        alert('Үүсгэсэн зураг ачаалж чадсангүй');
+    };
+
+    img1.src = originalImg.src;
+    img2.src = generatedImg.src;
+}
+
+// Set up download button event listeners
+const downloadGeneratedBtn = document.getElementById('download-generated-btn');
+const downloadComparedBtn = document.getElementById('download-compared-btn');
+
+if (downloadGeneratedBtn) {
+    downloadGeneratedBtn.addEventListener('click', downloadGeneratedImage);
+}
+
+if (downloadComparedBtn) {
+    downloadComparedBtn.addEventListener('click', downloadComparedImage);
+}
+
+// Login OTP flow
+let loginPhoneOrEmail = '';
+
+// Send OTP for login
+document.getElementById('loginSendOtpBtn').addEventListener('click', async function() {
+    loginPhoneOrEmail = document.getElementById('loginPhoneOrEmail').value.trim();
+    const errorDiv = document.getElementById('loginError');
+
+    if (!loginPhoneOrEmail) {
+        errorDiv.textContent = 'Утасны дугаар оруулна уу';
+        errorDiv.classList.remove('hidden');
+        return;
+    }
+
+    // Validate phone number (only digits, 8 digits)
+    const phoneRegex = /^[0-9]{8}$/;
+    if (!phoneRegex.test(loginPhoneOrEmail)) {
+        errorDiv.textContent = 'Утасны дугаар зөв биш байна. Зөвхөн тоо оруулна уу (8 орон)';
+        errorDiv.classList.remove('hidden');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/send-otp/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken'),
+            },
+            body: JSON.stringify({
+                phone_or_email: loginPhoneOrEmail
+            })
+        });
+
+        const data = await response.json();
+
+        if (response.ok) {
+            // Hide step 1, show step 2
+            document.getElementById('loginStep1').classList.add('hidden');
+            document.getElementById('loginStep2').classList.remove('hidden');
+            errorDiv.classList.add('hidden');
+            document.getElementById('loginOtpCode').focus();
+        } else {
+            errorDiv.textContent = data.error || 'OTP код илгээхэд алдаа гарлаа';
+            errorDiv.classList.remove('hidden');
+        }
+    } catch (error) {
+        errorDiv.textContent = 'Сүлжээний алдаа. Дахин оролдоно уу.';
+        errorDiv.classList.remove('hidden');
+    }
+});
+
+// Verify OTP for login
+document.getElementById('loginVerifyOtpBtn').addEventListener('click', async function() {
+    const otpCode = document.getElementById('loginOtpCode').value.trim();
+    const errorDiv = document.getElementById('loginOtpError');
+
+    if (!otpCode || otpCode.length !== 6) {
+        errorDiv.textContent = 'OTP код оруулна уу (6 орон)';
+        errorDiv.classList.remove('hidden');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/verify-otp/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken'),
+            },
+            body: JSON.stringify({
+                phone_or_email: loginPhoneOrEmail,
+                otp_code: otpCode
+            })
+        });
+
+        const data = await response.json();
+
+        if (response.ok) {
+            window.location.href = '/app/';
+        } else {
+            errorDiv.textContent = data.error || 'OTP код буруу байна';
+            errorDiv.classList.remove('hidden');
+        }
+    } catch (error) {
+        errorDiv.textContent = 'Сүлжээний алдаа. Дахин оролдоно уу.';
+        errorDiv.classList.remove('hidden');
+    }
+});
+
+// Back button for login
+document.getElementById('loginBackBtn').addEventListener('click', function() {
+    document.getElementById('loginStep2').classList.add('hidden');
+    document.getElementById('loginStep1').classList.remove('hidden');
+    document.getElementById('loginOtpError').classList.add('hidden');
+    document.getElementById('loginOtpCode').value = '';
+});
+
+// Signup OTP flow
+let signupPhoneOrEmail = '';
+
+// Send OTP for signup
+document.getElementById('signupSendOtpBtn').addEventListener('click', async function() {
+    signupPhoneOrEmail = document.getElementById('signupPhoneOrEmail').value.trim();
+    const errorDiv = document.getElementById('signupError');
+
+    if (!signupPhoneOrEmail) {
+        errorDiv.textContent = 'Утасны дугаар оруулна уу';
+        errorDiv.classList.remove('hidden');
+        return;
+    }
+
+    // Validate phone number (only digits, 8 digits)
+    const phoneRegex = /^[0-9]{8}$/;
+    if (!phoneRegex.test(signupPhoneOrEmail)) {
+        errorDiv.textContent = 'Утасны дугаар зөв биш байна. Зөвхөн тоо оруулна уу (8 орон)';
+        errorDiv.classList.remove('hidden');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/send-otp/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCookie('csrftoken'),
+                },
+                body: JSON.stringify({
+                phone_or_email: signupPhoneOrEmail
+                })
+            });
+
+        const data = await response.json();
+
+        if (response.ok) {
+            // Hide step 1, show step 2
+            document.getElementById('signupStep1').classList.add('hidden');
+            document.getElementById('signupStep2').classList.remove('hidden');
+            errorDiv.classList.add('hidden');
+            document.getElementById('signupOtpCode').focus();
+            } else {
+            errorDiv.textContent = data.error || 'OTP код илгээхэд алдаа гарлаа';
+            errorDiv.classList.remove('hidden');
+        }
+    } catch (error) {
+        errorDiv.textContent = 'Сүлжээний алдаа. Дахин оролдоно уу.';
+        errorDiv.classList.remove('hidden');
+    }
+});
+
+// Verify OTP for signup
+document.getElementById('signupVerifyOtpBtn').addEventListener('click', async function() {
+    const otpCode = document.getElementById('signupOtpCode').value.trim();
+    const errorDiv = document.getElementById('signupOtpError');
+
+    if (!otpCode || otpCode.length !== 6) {
+        errorDiv.textContent = 'OTP код оруулна уу (6 орон)';
+        errorDiv.classList.remove('hidden');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/verify-otp/', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken'),
+        },
+                body: JSON.stringify({
+                phone_or_email: signupPhoneOrEmail,
+                otp_code: otpCode
+    })
+            });
+
+        const data = await response.json();
+
+        if (response.ok) {
+                window.location.href = '/app/';
+            } else {
+            errorDiv.textContent = data.error || 'OTP код буруу байна';
+            errorDiv.classList.remove('hidden');
+        }
+    } catch (error) {
+        errorDiv.textContent = 'Сүлжээний алдаа. Дахин оролдоно уу.';
+        errorDiv.classList.remove('hidden');
+    }
+});
+
+// Back button for signup
+document.getElementById('signupBackBtn').addEventListener('click', function() {
+    document.getElementById('signupStep2').classList.add('hidden');
+    document.getElementById('signupStep1').classList.remove('hidden');
+    document.getElementById('signupOtpError').classList.add('hidden');
+    document.getElementById('signupOtpCode').value = '';
+});
+
+// Logout function
+function logout() {
+    window.location.href = '/logout/';
+}
+
+// Load packages from API
+async function loadPackages() {
+    try {
+        const response = await fetch('/api/packages/');
+        const data = await response.json();
+
+        const container = document.getElementById('packages-container');
+        if (!container) return;
+
+        if (data.packages && data.packages.length > 0) {
+            container.innerHTML = '';
+
+            data.packages.forEach((pkg, index) => {
+                const isPopular = index === 1; // Second package is popular
+                const packageCard = document.createElement('div');
+                packageCard.className = `bg-gray-800 rounded-2xl p-8 border ${isPopular ? 'border-2 border-primary-500' : 'border-gray-700'} hover:border-primary-500 transition-colors relative overflow-visible`;
+
+                let badgeHtml = '';
+                if (isPopular) {
+                    badgeHtml = `
+                        <div class="absolute -top-3 left-4 bg-primary-500 text-white text-xs px-3 py-1.5 rounded-full font-semibold z-10 shadow-lg">
+                            Эрэлттэй
+                        </div>
+                    `;
+                }
+
+                packageCard.innerHTML = `
+                    ${badgeHtml}
+                    <div class="text-center mb-6">
+                        <h3 class="text-2xl font-bold text-white mb-2">${pkg.name}</h3>
+                        <div class="text-4xl font-bold text-white mb-1">${pkg.price.toLocaleString()}₮</div>
+                        <p class="text-gray-400 text-sm">Нэг удаагийн төлбөр</p>
+                    </div>
+                    <ul class="space-y-4 mb-8">
+                        <li class="flex items-start">
+                            <svg class="w-5 h-5 text-green-400 mr-2 mt-0.5 flex-shrink-0" fill="currentColor" viewBox="0 0 20 20">
+                                <path fill-rule="evenodd" d="M10 18a8 8 0 100-16 8 8 0 000 16zm3.707-9.293a1 1 0 00-1.414-1.414L9 10.586 7.707 9.293a1 1 0 00-1.414 1.414l2 2a1 1 0 001.414 0l4-4z" clip-rule="evenodd" />
+                            </svg>
+                            <span class="text-gray-300 text-sm">${pkg.credits} кредит</span>
+                        </li>
+                        <li class="flex items-start">
+                            <svg class="w-5 h-5 text-green-400 mr-2 mt-0.5 flex-shrink-0" fill="currentColor" viewBox="0 0 20 20">
+                                <path fill-rule="evenodd" d="M10 18a8 8 0 100-16 8 8 0 000 16zm3.707-9.293a1 1 0 00-1.414-1.414L9 10.586 7.707 9.293a1 1 0 00-1.414 1.414l2 2a1 1 0 001.414 0l4-4z" clip-rule="evenodd" />
+                            </svg>
+                            <span class="text-gray-300 text-sm">Бүх төрлийн интерьер</span>
+                        </li>
+                        <li class="flex items-start">
+                            <svg class="w-5 h-5 text-green-400 mr-2 mt-0.5 flex-shrink-0" fill="currentColor" viewBox="0 0 20 20">
+                                <path fill-rule="evenodd" d="M10 18a8 8 0 100-16 8 8 0 000 16zm3.707-9.293a1 1 0 00-1.414-1.414L9 10.586 7.707 9.293a1 1 0 00-1.414 1.414l2 2a1 1 0 001.414 0l4-4z" clip-rule="evenodd" />
+                            </svg>
+                            <span class="text-gray-300 text-sm">HD чанар</span>
+                        </li>
+                    </ul>
+                    <button onclick="purchasePackage(${pkg.id})" class="w-full ${isPopular ? 'bg-primary-600 hover:bg-primary-700' : 'bg-gray-700 hover:bg-gray-600'} text-white py-3 rounded-lg font-semibold transition-colors">
+                        Сонгох
+                    </button>
+                `;
+
+                container.appendChild(packageCard);
+            });
+        } else {
+            container.innerHTML = '<div class="text-center text-gray-400 py-8 col-span-full">Багц олдсонгүй</div>';
+        }
+    } catch (error) {
+        console.error('Error loading packages:', error);
+        const container = document.getElementById('packages-container');
+        if (container) {
+            container.innerHTML = '<div class="text-center text-red-400 py-8 col-span-full">Багцуудыг ачаалахад алдаа гарлаа</div>';
+        }
+    }
+}
+
+// Global variable to store current order ID and polling interval
+let currentOrderId = null;
+let paymentPollingInterval = null;
+
+// Open packages modal (scroll to pricing section)
+function openPackagesModal() {
+    const pricingSection = document.getElementById('pricing');
+    if (pricingSection) {
+        pricingSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
+    }
+}
+
+// Purchase package
+async function purchasePackage(packageId) {
+    if (!isAuthenticated) {
+        openSignupModal();
+        return;
+    }
+
+    // Stop any existing polling
+    stopPaymentPolling();
+
+    // Show loading state
+    openQPayModal();
+    showQPayLoading();
+
+    try {
+        const response = await fetch('/api/purchase-credits/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken'),
+            },
+            body: JSON.stringify({
+                package_id: packageId
+            })
+        });
+
+        const data = await response.json();
+
+        if (response.ok && data.qpay_invoice && data.order) {
+            // Store order ID for polling
+            currentOrderId = data.order.id;
+            // Show QPay payment info
+            showQPayPayment(data.qpay_invoice);
+            // Start polling for payment status
+            startPaymentPolling();
+        } else {
+            showQPayError(data.error || 'Төлбөрийн мэдээлэл авахад алдаа гарлаа');
+        }
+    } catch (error) {
+        console.error('Error purchasing package:', error);
+        showQPayError('Сүлжээний алдаа. Дахин оролдоно уу.');
+    }
+}
+
+// QPay Modal functions
+function openQPayModal() {
+    document.getElementById('qpayPaymentModal').classList.remove('hidden');
+    document.body.style.overflow = 'hidden';
+}
+
+function closeQPayModal() {
+    document.getElementById('qpayPaymentModal').classList.add('hidden');
+    document.body.style.overflow = 'auto';
+    // Stop polling
+    stopPaymentPolling();
+    // Reset modal state
+    document.getElementById('qpay-loading').classList.remove('hidden');
+    document.getElementById('qpay-qr-section').classList.add('hidden');
+    document.getElementById('qpay-apps-section').classList.add('hidden');
+    document.getElementById('qpay-error').classList.add('hidden');
+    document.getElementById('qpay-success').classList.add('hidden');
+    currentOrderId = null;
+}
+
+function showQPayLoading() {
+    document.getElementById('qpay-loading').classList.remove('hidden');
+    document.getElementById('qpay-qr-section').classList.add('hidden');
+    document.getElementById('qpay-apps-section').classList.add('hidden');
+    document.getElementById('qpay-error').classList.add('hidden');
+}
+
+function showQPayPayment(qpayInvoice) {
+    document.getElementById('qpay-loading').classList.add('hidden');
+    document.getElementById('qpay-error').classList.add('hidden');
+
+    // Show QR code
+    if (qpayInvoice.qr_image) {
+        document.getElementById('qpay-qr-image').src = 'data:image/png;base64,' + qpayInvoice.qr_image;
+        document.getElementById('qpay-qr-section').classList.remove('hidden');
+    }
+
+    // Show short URL
+    if (qpayInvoice.qPay_shortUrl) {
+        const shortUrlLink = document.getElementById('qpay-short-url');
+        shortUrlLink.href = qpayInvoice.qPay_shortUrl;
+        shortUrlLink.textContent = qpayInvoice.qPay_shortUrl;
+    }
+
+    // Show payment apps
+    if (qpayInvoice.urls && qpayInvoice.urls.length > 0) {
+        const appsGrid = document.getElementById('qpay-apps-grid');
+        appsGrid.innerHTML = '';
+
+        qpayInvoice.urls.forEach(app => {
+            const appCard = document.createElement('a');
+            appCard.href = app.link;
+            appCard.target = '_blank';
+            appCard.className = 'bg-gray-700 rounded-lg p-4 hover:bg-gray-600 transition-colors text-center';
+            appCard.innerHTML = `
+                <img src="${app.logo}" alt="${app.name}" class="w-12 h-12 mx-auto mb-2 rounded" onerror="this.src='data:image/svg+xml,%3Csvg xmlns=\\'http://www.w3.org/2000/svg\\' width=\\'48\\' height=\\'48\\'%3E%3Crect fill=\\'%234b5563\\' width=\\'48\\' height=\\'48\\'/%3E%3C/svg%3E'">
+                <p class="text-white text-sm font-semibold">${app.name}</p>
+                <p class="text-gray-400 text-xs mt-1">${app.description}</p>
+            `;
+            appsGrid.appendChild(appCard);
+        });
+
+        document.getElementById('qpay-apps-section').classList.remove('hidden');
+    }
+}
+
+function showQPayError(message) {
+    document.getElementById('qpay-loading').classList.add('hidden');
+    document.getElementById('qpay-qr-section').classList.add('hidden');
+    document.getElementById('qpay-apps-section').classList.add('hidden');
+    document.getElementById('qpay-success').classList.add('hidden');
+    document.getElementById('qpay-error').classList.remove('hidden');
+    document.getElementById('qpay-error').textContent = message;
+    stopPaymentPolling();
+}
+
+function showQPaySuccess(credits) {
+    document.getElementById('qpay-loading').classList.add('hidden');
+    document.getElementById('qpay-qr-section').classList.add('hidden');
+    document.getElementById('qpay-apps-section').classList.add('hidden');
+    document.getElementById('qpay-error').classList.add('hidden');
+    document.getElementById('qpay-success').classList.remove('hidden');
+    document.getElementById('qpay-success-credits').textContent = `${credits} кредит дансанд нэмэгдлээ.`;
+    stopPaymentPolling();
+
+    // Reload page after 2 seconds to update credit balance
+    setTimeout(() => {
+        window.location.reload();
+    }, 2000);
+}
+
+// Payment status polling
+function startPaymentPolling() {
+    if (!currentOrderId) return;
+
+    // Check immediately
+    checkPaymentStatus();
+
+    // Then check every 3 seconds
+    paymentPollingInterval = setInterval(() => {
+        checkPaymentStatus();
+    }, 3000);
+}
+
+function stopPaymentPolling() {
+    if (paymentPollingInterval) {
+        clearInterval(paymentPollingInterval);
+        paymentPollingInterval = null;
+    }
+}
+
+async function checkPaymentStatus() {
+    if (!currentOrderId) return;
+
+    try {
+        const response = await fetch(`/api/check-order-status/?order_id=${currentOrderId}`, {
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken'),
+            }
+        });
+
+        const data = await response.json();
+
+        if (response.ok && data.is_paid) {
+            // Payment successful
+            showQPaySuccess(data.credits);
+        }
+    } catch (error) {
+        console.error('Error checking payment status:', error);
+        // Don't show error, just continue polling
+    }
+}
+
+// Close QPay modal on background click
+document.getElementById('qpayPaymentModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        closeQPayModal();
+    }
+});
+
+// Load credit balance for authenticated users
+async function loadCreditBalance() {
+    if (!isAuthenticated) {
+        return;
+    }
+    try {
+        const response = await fetch('/api/dashboard/');
+        const data = await response.json();
+        const creditBalanceEl = document.getElementById('nav-credit-balance');
+        if (creditBalanceEl) {
+            creditBalanceEl.textContent = data.credit_balance || 0;
+        }
+    } catch (error) {
+        console.error('Error loading credit balance:', error);
+        const creditBalanceEl = document.getElementById('nav-credit-balance');
+        if (creditBalanceEl) {
+            creditBalanceEl.textContent = '0';
+        }
+    }
+}
+
+// Load packages on page load
+document.addEventListener('DOMContentLoaded', function() {
+    loadPackages();
+    loadCreditBalance();
+});
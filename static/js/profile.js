@@ -0,0 +1,737 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Load account data
+    loadAccountData();
+
+    function loadAccountData() {
+        fetch('/api/dashboard/')
+            .then(response => response.json())
+            .then(data => {
+                // Update header
+                if (data.user) {
+                    document.getElementById('header-username').textContent = data.user.username || 'User';
+                    document.getElementById('header-email').textContent = data.user.email || 'email@example.com';
+                    const username = data.user.username || 'U';
+                    document.getElementById('user-initial').textContent = username.charAt(0).toUpperCase();
+                }
+                document.getElementById('credit-balance').textContent = data.credit_balance;
+
+                // Update profile section
+                if (data.user) {
+                    document.getElementById('profile-username').textContent = data.user.username || 'User';
+                    document.getElementById('profile-email').textContent = data.user.email || 'Email байхгүй';
+                    const username = data.user.username || 'U';
+                    document.getElementById('profile-user-initial').textContent = username.charAt(0).toUpperCase();
+
+                    document.getElementById('account-username-display').textContent = data.user.username || '-';
+                    document.getElementById('account-email-display').textContent = data.user.email || 'Email байхгүй';
+
+                    // Set date joined
+                    if (data.user.date_joined) {
+                        const dateJoined = new Date(data.user.date_joined);
+                        document.getElementById('account-date-joined').textContent = dateJoined.toLocaleDateString('mn-MN', {
+                            year: 'numeric',
+                            month: 'long',
+                            day: 'numeric'
+                        });
+                    }
+                }
+
+                // Update credit balance
+                document.getElementById('profile-credit-balance').textContent = data.credit_balance;
+                document.getElementById('modal-credit-balance').textContent = data.credit_balance;
+
+                // Load transactions
+                loadTransactions(data.recent_transactions || []);
+
+                // Load images
+                loadImages(data.generated_images || []);
+            })
+            .catch(error => {
+                console.error('Error loading account data:', error);
+            });
+    }
+
+    function loadTransactions(transactions) {
+        const container = document.getElementById('transactions-list');
+
+        if (transactions.length === 0) {
+            container.innerHTML = '<div class="px-4 py-8 text-gray-400 text-center">Гүйлгээ байхгүй</div>';
+            return;
+        }
+
+        container.innerHTML = transactions.map(transaction => {
+            const typeClass = transaction.transaction_type === 'add' ? 'text-green-400' : 'text-red-400';
+            const typeIcon = transaction.transaction_type === 'add' ? '+' : '-';
+            const date = new Date(transaction.created_at).toLocaleDateString('mn-MN', {
+                year: 'numeric',
+                month: 'long',
+                day: 'numeric',
+                hour: '2-digit',
+                minute: '2-digit'
+            });
+
+            return `
+                <div class="px-4 py-4 flex items-center justify-between hover:bg-gray-600 transition-colors">
+                    <div class="flex items-center space-x-4">
+                        <div class="flex-shrink-0">
+                            <div class="w-10 h-10 ${transaction.transaction_type === 'add' ? 'bg-green-900' : 'bg-red-900'} rounded-full flex items-center justify-center">
+                                <span class="text-lg font-medium ${typeClass}">${typeIcon}</span>
+                            </div>
+                        </div>
+                        <div>
+                            <p class="text-sm font-medium text-white">${transaction.description || 'Гүйлгээ'}</p>
+                            <p class="text-sm text-gray-400">${date}</p>
+                        </div>
+                    </div>
+                    <div class="text-right">
+                        <div class="text-lg font-semibold ${typeClass}">
+                            ${typeIcon}${transaction.amount} кредит
+                        </div>
+                    </div>
+                </div>
+            `;
+        }).join('');
+    }
+
+    function loadImages(images) {
+        const container = document.getElementById('images-grid');
+        const noImages = document.getElementById('no-images');
+
+        if (images.length === 0) {
+            container.classList.add('hidden');
+            noImages.classList.remove('hidden');
+            return;
+        }
+
+        container.classList.remove('hidden');
+        noImages.classList.add('hidden');
+
+        container.innerHTML = images.map((image, index) => {
+            const date = new Date(image.created_at).toLocaleDateString('mn-MN');
+            const imageId = `image-${index}`;
+
+            return `
+                <div class="bg-gray-700 rounded-lg overflow-hidden hover:shadow-lg transition-shadow cursor-pointer image-card" 
+                     data-original="${image.original_image}" 
+                     data-generated="${image.generated_image}" 
+                     data-style="${image.style}">
+                    <div class="aspect-w-16 aspect-h-12 bg-gray-600">
+                        <img src="${image.generated_image}" alt="Generated design" class="w-full h-48 object-cover">
+                    </div>
+                    <div class="p-4">
+                        <h4 class="text-sm font-medium text-white capitalize">${image.style} Загвар</h4>
+                        ${image.room_type ? `<p class="text-xs text-gray-400 mt-1">${image.room_type}</p>` : ''}
+                        <p class="text-sm text-gray-400 mt-1">${date}</p>
+                        <button class="compare-btn mt-2 text-primary-400 hover:text-primary-300 text-sm font-medium" 
+                                data-original="${image.original_image}" 
+                                data-generated="${image.generated_image}" 
+                                data-style="${image.style}">
+                            Харьцуулах
+                        </button>
+                    </div>
+                </div>
+            `;
+        }).join('');
+
+        // Add event listeners to image cards
+        container.querySelectorAll('.image-card').forEach(card => {
+            card.addEventListener('click', function(e) {
+                if (!e.target.classList.contains('compare-btn') && !e.target.closest('.compare-btn')) {
+                    const original = this.dataset.original;
+                    const generated = this.dataset.generated;
+                    const style = this.dataset.style;
+                    if (original && generated && style) {
+                        console.log('Opening comparison modal:', { original, generated, style });
+                        window.showComparison(original, generated, style);
+                    } else {
+                        console.error('Missing image data:', { original, generated, style });
+                    }
+                }
+            });
+        });
+
+        // Add event listeners to compare buttons
+        container.querySelectorAll('.compare-btn').forEach(btn => {
+            btn.addEventListener('click', function(e) {
+                e.stopPropagation();
+                e.preventDefault();
+                const original = this.dataset.original;
+                const generated = this.dataset.generated;
+                const style = this.dataset.style;
+                if (original && generated && style) {
+                    console.log('Opening comparison modal from button:', { original, generated, style });
+                    window.showComparison(original, generated, style);
+                } else {
+                    console.error('Missing image data:', { original, generated, style });
+                }
+            });
+        });
+    }
+
+    // Global variables for payment
+    let currentOrderId = null;
+    let paymentPollingInterval = null;
+
+    // Make functions globally accessible
+    window.purchaseCredits = async function() {
+        console.log('purchaseCredits called');
+        const modal = document.getElementById('purchase-modal');
+        if (!modal) {
+            console.error('Purchase modal not found');
+            return;
+        }
+        modal.classList.remove('hidden');
+        console.log('Modal should be visible now');
+        await loadPackagesForPurchase();
+    };
+
+    window.closePurchaseModal = function() {
+        document.getElementById('purchase-modal').classList.add('hidden');
+    };
+
+    window.purchasePackage = async function(packageId) {
+        // Close purchase modal
+        closePurchaseModal();
+
+        // Show QPay payment modal
+        openQPayPaymentModal();
+        showQPayLoading();
+
+        try {
+            const response = await fetch('/api/purchase-credits/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCookie('csrftoken'),
+                },
+                body: JSON.stringify({
+                    package_id: packageId
+                })
+            });
+
+            const data = await response.json();
+
+            if (response.ok && data.qpay_invoice && data.order) {
+                // Store order ID for polling
+                currentOrderId = data.order.id;
+                // Show QPay payment info
+                showQPayPayment(data.qpay_invoice);
+                // Start polling for payment status
+                startPaymentPolling();
+            } else {
+                showQPayError(data.error || 'Төлбөрийн мэдээлэл авахад алдаа гарлаа');
+            }
+        } catch (error) {
+            console.error('Error purchasing package:', error);
+            showQPayError('Сүлжээний алдаа. Дахин оролдоно уу.');
+        }
+    };
+
+    // Load packages for purchase modal
+    async function loadPackagesForPurchase() {
+        try {
+            const response = await fetch('/api/packages/');
+            const data = await response.json();
+
+            const container = document.getElementById('packages-list');
+            if (!container) return;
+
+            if (data.packages && data.packages.length > 0) {
+                container.innerHTML = '';
+
+                data.packages.forEach((pkg, index) => {
+                    const isPopular = index === 1; // Second package is popular
+                    const packageCard = document.createElement('div');
+                    packageCard.className = `bg-gray-700 rounded-lg p-6 border ${isPopular ? 'border-2 border-primary-500' : 'border-gray-600'} hover:border-primary-500 transition-colors relative overflow-visible`;
+
+                    let badgeHtml = '';
+                    if (isPopular) {
+                        badgeHtml = `
+                            <div class="absolute -top-3 left-4 bg-primary-500 text-white text-xs px-3 py-1.5 rounded-full font-semibold z-10 shadow-lg">
+                                Эрэлттэй
+                            </div>
+                        `;
+                    }
+
+                    packageCard.innerHTML = `
+                        ${badgeHtml}
+                        <div class="text-center mb-4">
+                            <h4 class="text-xl font-bold text-white mb-2">${pkg.name}</h4>
+                            <div class="text-3xl font-bold text-white mb-1">${pkg.price.toLocaleString()}₮</div>
+                            <p class="text-gray-400 text-sm">${pkg.credits} кредит</p>
+                        </div>
+                        <ul class="space-y-2 mb-4 text-sm text-gray-300">
+                            <li class="flex items-center">
+                                <svg class="w-4 h-4 text-green-400 mr-2" fill="currentColor" viewBox="0 0 20 20">
+                                    <path fill-rule="evenodd" d="M10 18a8 8 0 100-16 8 8 0 000 16zm3.707-9.293a1 1 0 00-1.414-1.414L9 10.586 7.707 9.293a1 1 0 00-1.414 1.414l2 2a1 1 0 001.414 0l4-4z" clip-rule="evenodd" />
+                                </svg>
+                                ${pkg.credits} кредит
+                            </li>
+                            <li class="flex items-center">
+                                <svg class="w-4 h-4 text-green-400 mr-2" fill="currentColor" viewBox="0 0 20 20">
+                                    <path fill-rule="evenodd" d="M10 18a8 8 0 100-16 8 8 0 000 16zm3.707-9.293a1 1 0 00-1.414-1.414L9 10.586 7.707 9.293a1 1 0 00-1.414 1.414l2 2a1 1 0 001.414 0l4-4z" clip-rule="evenodd" />
+                                </svg>
+                                Бүх төрлийн интерьер
+                            </li>
+                        </ul>
+                        <button onclick="purchasePackage(${pkg.id})" class="w-full ${isPopular ? 'bg-primary-600 hover:bg-primary-700' : 'bg-gray-600 hover:bg-gray-500'} text-white py-2 rounded-lg font-semibold transition-colors">
+                            Сонгох
+                        </button>
+                    `;
+                    container.appendChild(packageCard);
+                });
+            } else {
+                container.innerHTML = '<div class="text-center text-gray-400 py-8 col-span-full">Багц олдсонгүй</div>';
+            }
+        } catch (error) {
+            console.error('Error loading packages:', error);
+            const container = document.getElementById('packages-list');
+            if (container) {
+                container.innerHTML = '<div class="text-center text-red-400 py-8 col-span-full">Багцуудыг ачаалахад алдаа гарлаа</div>';
+            }
+        }
+    }
+
+
+    // QPay Payment Modal functions
+    window.openQPayPaymentModal = function() {
+        document.getElementById('qpay-payment-modal').classList.remove('hidden');
+    };
+
+    window.closeQPayPaymentModal = function() {
+        document.getElementById('qpay-payment-modal').classList.add('hidden');
+        stopPaymentPolling();
+        // Reset modal state
+        document.getElementById('qpay-loading').classList.remove('hidden');
+        document.getElementById('qpay-qr-section').classList.add('hidden');
+        document.getElementById('qpay-apps-section').classList.add('hidden');
+        document.getElementById('qpay-error').classList.add('hidden');
+        document.getElementById('qpay-success').classList.add('hidden');
+        currentOrderId = null;
+    };
+
+    function showQPayLoading() {
+        document.getElementById('qpay-loading').classList.remove('hidden');
+        document.getElementById('qpay-qr-section').classList.add('hidden');
+        document.getElementById('qpay-apps-section').classList.add('hidden');
+        document.getElementById('qpay-error').classList.add('hidden');
+        document.getElementById('qpay-success').classList.add('hidden');
+    }
+
+    function showQPayPayment(qpayInvoice) {
+        document.getElementById('qpay-loading').classList.add('hidden');
+        document.getElementById('qpay-error').classList.add('hidden');
+
+        // Show QR code
+        if (qpayInvoice.qr_image) {
+            document.getElementById('qpay-qr-image').src = 'data:image/png;base64,' + qpayInvoice.qr_image;
+            document.getElementById('qpay-qr-section').classList.remove('hidden');
+        }
+
+        // Show short URL
+        if (qpayInvoice.qPay_shortUrl) {
+            const shortUrlLink = document.getElementById('qpay-short-url');
+            shortUrlLink.href = qpayInvoice.qPay_shortUrl;
+            shortUrlLink.textContent = qpayInvoice.qPay_shortUrl;
+        }
+
+        // Show payment apps
+        if (qpayInvoice.urls && qpayInvoice.urls.length > 0) {
+            const appsGrid = document.getElementById('qpay-apps-grid');
+            appsGrid.innerHTML = '';
+
+            qpayInvoice.urls.forEach(app => {
+                const appCard = document.createElement('a');
+                appCard.href = app.link;
+                appCard.target = '_blank';
+                appCard.className = 'bg-gray-700 rounded-lg p-4 hover:bg-gray-600 transition-colors text-center';
+                appCard.innerHTML = `
+                    <img src="${app.logo}" alt="${app.name}" class="w-12 h-12 mx-auto mb-2 rounded" onerror="this.src='data:image/svg+xml,%3Csvg xmlns=\\'http://www.w3.org/2000/svg\\' width=\\'48\\' height=\\'48\\'%3E%3Crect fill=\\'%234b5563\\' width=\\'48\\' height=\\'48\\'/%3E%3C/svg%3E'">
+                    <p class="text-white text-sm font-semibold">${app.name}</p>
+                    <p class="text-gray-400 text-xs mt-1">${app.description}</p>
+                `;
+                appsGrid.appendChild(appCard);
+            });
+
+            document.getElementById('qpay-apps-section').classList.remove('hidden');
+        }
+    }
+
+    function showQPayError(message) {
+        document.getElementById('qpay-loading').classList.add('hidden');
+        document.getElementById('qpay-qr-section').classList.add('hidden');
+        document.getElementById('qpay-apps-section').classList.add('hidden');
+        document.getElementById('qpay-success').classList.add('hidden');
+        const errorDiv = document.getElementById('qpay-error');
+        errorDiv.classList.remove('hidden');
+        errorDiv.querySelector('p').textContent = message;
+        stopPaymentPolling();
+    }
+
+    function showQPaySuccess(credits) {
+        document.getElementById('qpay-loading').classList.add('hidden');
+        document.getElementById('qpay-qr-section').classList.add('hidden');
+        document.getElementById('qpay-apps-section').classList.add('hidden');
+        document.getElementById('qpay-error').classList.add('hidden');
+        document.getElementById('qpay-success').classList.remove('hidden');
+        document.getElementById('qpay-success-credits').textContent = `${credits} кредит дансанд нэмэгдлээ.`;
+        stopPaymentPolling();
+
+        // Reload account data and close modal after 2 seconds
+        setTimeout(() => {
+            loadAccountData();
+            closeQPayPaymentModal();
+        }, 2000);
+    }
+
+    // Payment status polling
+    function startPaymentPolling() {
+        if (!currentOrderId) return;
+
+        // Check immediately
+        checkPaymentStatus();
+
+        // Then check every 3 seconds
+        paymentPollingInterval = setInterval(() => {
+            checkPaymentStatus();
+        }, 3000);
+    }
+
+    function stopPaymentPolling() {
+        if (paymentPollingInterval) {
+            clearInterval(paymentPollingInterval);
+            paymentPollingInterval = null;
+        }
+    }
+
+    async function checkPaymentStatus() {
+        if (!currentOrderId) return;
+
+        try {
+            const response = await fetch(`/api/check-order-status/?order_id=${currentOrderId}`, {
+                headers: {
+                    'X-CSRFToken': getCookie('csrftoken'),
+                }
+            });
+
+            const data = await response.json();
+
+            if (response.ok && data.is_paid) {
+                // Payment successful
+                showQPaySuccess(data.credits);
+            }
+        } catch (error) {
+            console.error('Error checking payment status:', error);
+            // Don't show error, just continue polling
+        }
+    }
+
+    // Close QPay modal on background click
+    document.getElementById('qpay-payment-modal').addEventListener('click', function(e) {
+        if (e.target === this) {
+            closeQPayPaymentModal();
+        }
+    });
+
+    // Comparison modal function (make it accessible globally)
+    window.showComparison = function(originalImage, generatedImage, style) {
+        console.log('showComparison called with:', { originalImage, generatedImage, style });
+
+        if (!originalImage || !generatedImage) {
+            console.error('Missing image URLs');
+            alert('Зураг олдсонгүй');
+            return;
+        }
+
+        const modalId = 'comparison-modal-' + Date.now();
+        const modal = document.createElement('div');
+        modal.className = 'fixed inset-0 bg-gray-900 bg-opacity-75 z-50 flex items-center justify-center p-4';
+        modal.innerHTML = `
+            <div class="bg-gray-800 rounded-lg max-w-6xl w-full max-h-[90vh] overflow-auto">
+                <div class="p-6">
+                    <div class="flex justify-between items-center mb-6">
+                        <h3 class="text-xl font-semibold text-white">${style} Загварын харьцуулалт</h3>
+                        <button onclick="document.getElementById('${modalId}').remove()" class="text-gray-400 hover:text-white transition-colors">
+                            <svg class="w-6 h-6" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M6 18L18 6M6 6l12 12"></path>
+                            </svg>
+                        </button>
+                    </div>
+                    <div class="grid grid-cols-1 md:grid-cols-2 gap-6">
+                        <!-- Before Image (Left) -->
+                        <div class="space-y-2">
+                            <div class="flex items-center justify-between">
+                                <h4 class="text-lg font-medium text-white">Анхны</h4>
+                                <span class="text-sm text-gray-400 bg-gray-700 px-3 py-1 rounded-full">Before</span>
+                            </div>
+                            <div class="bg-gray-700 rounded-lg overflow-hidden border-2 border-gray-600 relative" style="height: 500px; display: flex; align-items: center; justify-content: center;">
+                                <div class="absolute top-2 left-2 bg-gray-900/75 text-white px-3 py-1 rounded-md text-sm font-semibold z-10">
+                                    Original
+                                </div>
+                                <img id="${modalId}-original-img" src="${originalImage}" alt="Анхны зураг" class="w-full h-full object-cover">
+                            </div>
+                        </div>
+                        <!-- After Image (Right) -->
+                        <div class="space-y-2">
+                            <div class="flex items-center justify-between">
+                                <h4 class="text-lg font-medium text-white">${style} Загвар</h4>
+                                <span class="text-sm text-gray-400 bg-primary-600 px-3 py-1 rounded-full">After</span>
+                            </div>
+                            <div class="bg-gray-700 rounded-lg overflow-hidden border-2 border-primary-500 relative" style="height: 500px; display: flex; align-items: center; justify-content: center;">
+                                <div class="absolute top-2 left-2 bg-gray-900/75 text-white px-3 py-1 rounded-md text-sm font-semibold z-10">
+                                    Generated
+                                </div>
+                                <img id="${modalId}-generated-img" src="${generatedImage}" alt="Үүсгэсэн зураг" class="w-full h-full object-cover">
+                                <!-- Watermark overlay -->
+                                <div class="absolute bottom-2 right-2 bg-black/60 text-white px-3 py-1.5 rounded-md text-xs font-medium z-10">
+                                    www.rehome.today
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                    <!-- Download buttons -->
+                    <div class="mt-6 flex justify-center gap-3">
+                        <button id="${modalId}-download-generated-btn" class="bg-primary-600 text-white px-6 py-2 rounded-lg hover:bg-primary-700 transition-colors font-semibold text-sm flex items-center gap-2">
+                            <svg class="w-5 h-5" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M4 16v1a3 3 0 003 3h10a3 3 0 003-3v-1m-4-4l-4 4m0 0l-4-4m4 4V4"></path>
+                            </svg>
+                            Generated Image татах
+                        </button>
+                        <button id="${modalId}-download-compared-btn" class="bg-gray-700 text-white px-6 py-2 rounded-lg hover:bg-gray-600 transition-colors font-semibold text-sm flex items-center gap-2">
+                            <svg class="w-5 h-5" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M4 16v1a3 3 0 003 3h10a3 3 0 003-3v-1m-4-4l-4 4m0 0l-4-4m4 4V4"></path>
+                            </svg>
+                            Харьцуулсан зураг татах
+                        </button>
+                    </div>
+                    <div class="mt-4 flex justify-center">
+                        <button onclick="document.getElementById('${modalId}').remove()" class="px-6 py-2 bg-gray-600 text-white rounded-lg hover:bg-gray-500 transition-colors font-medium">
+                            Хаах
+                        </button>
+                    </div>
+                </div>
+            </div>
+        `;
+        modal.id = modalId;
+
+        document.body.appendChild(modal);
+
+        // Add event listeners for download buttons
+        const downloadGeneratedBtn = document.getElementById(modalId + '-download-generated-btn');
+        const downloadComparedBtn = document.getElementById(modalId + '-download-compared-btn');
+
+        if (downloadGeneratedBtn) {
+            downloadGeneratedBtn.addEventListener('click', function() {
+                downloadModalGeneratedImage(modalId, generatedImage);
+            });
+        }
+
+        if (downloadComparedBtn) {
+            downloadComparedBtn.addEventListener('click', function() {
+                downloadModalComparedImage(modalId, originalImage, generatedImage);
+            });
+        }
+
+        // Close modal when clicking outside
+        modal.addEventListener('click', function(e) {
+            if (e.target === modal) {
+                modal.remove();
+            }
+        });
+
+        // Close modal on Escape key
+        const escapeHandler = function(e) {
+            if (e.key === 'Escape') {
+                modal.remove();
+                document.removeEventListener('keydown', escapeHandler);
+            }
+        };
+        document.addEventListener('keydown', escapeHandler);
+    };
+
+    // Download functions for comparison modal (make globally accessible)
+    window.downloadModalGeneratedImage = function(modalId, imageUrl) {
+        const img = new Image();
+        img.crossOrigin = 'anonymous';
+
+        img.onload = () => {
+            // Create canvas to add watermark
+            const canvas = document.createElement('canvas');
+            const ctx = canvas.getContext('2d');
+
+            canvas.width = img.width;
+            canvas.height = img.height;
+
+            // Draw the image
+            ctx.drawImage(img, 0, 0);
+
+            // Add watermark
+            const watermarkText = 'www.rehome.today';
+            const fontSize = Math.max(16, img.width / 40);
+            ctx.font = `${fontSize}px Arial`;
+            ctx.fillStyle = 'rgba(0, 0, 0, 0.6)';
+
+            // Measure text
+            const textMetrics = ctx.measureText(watermarkText);
+            const textWidth = textMetrics.width;
+            const textHeight = fontSize;
+            const padding = 10;
+
+            // Draw background
+            ctx.fillRect(
+                img.width - textWidth - padding * 2,
+                img.height - textHeight - padding * 2,
+                textWidth + padding * 2,
+                textHeight + padding * 2
+            );
+
+            // Draw text
+            ctx.fillStyle = 'white';
+            ctx.fillText(
+                watermarkText,
+                img.width - textWidth - padding,
+                img.height - padding
+            );
+
+            // Download
+            canvas.toBlob((blob) => {
+                const url = URL.createObjectURL(blob);
+                const a = document.createElement('a');
+                a.href = url;
+                a.download = 'rehome-generated-' + Date.now() + '.png';
+                document.body.appendChild(a);
+                a.click();
+                document.body.removeChild(a);
+                URL.revokeObjectURL(url);
+            }, 'image/png');
+        };
+
+        img.onerror = () => {
+            // Fallback: download without watermark if CORS issue
+            const a = document.createElement('a');
+            a.href = imageUrl;
+            a.download = 'rehome-generated-' + Date.now() + '.png';
+            document.body.appendChild(a);
+            a.click();
+            document.body.removeChild(a);
+        };
+
+        img.src = imageUrl;
+    };
+
+    window.downloadModalComparedImage = function(modalId, originalImageUrl, generatedImageUrl) {
+        const img1 = new Image();
+        const img2 = new Image();
+        img1.crossOrigin = 'anonymous';
+        img2.crossOrigin = 'anonymous';
+
+        let loadedCount = 0;
+        const onImageLoad = () => {
+            loadedCount++;
+            if (loadedCount === 2) {
+                // Both images loaded, create compared image
+                const canvas = document.createElement('canvas');
+                const ctx = canvas.getContext('2d');
+
+                // Calculate dimensions - use same height for both images
+                const maxHeight = Math.max(img1.height, img2.height);
+                const scale1 = maxHeight / img1.height;
+                const scale2 = maxHeight / img2.height;
+                const scaledWidth1 = img1.width * scale1;
+                const scaledWidth2 = img2.width * scale2;
+                const totalWidth = scaledWidth1 + scaledWidth2;
+
+                canvas.width = totalWidth;
+                canvas.height = maxHeight;
+
+                // Fill background
+                ctx.fillStyle = '#374151'; // gray-700
+                ctx.fillRect(0, 0, canvas.width, canvas.height);
+
+                // Draw original image (left)
+                ctx.drawImage(img1, 0, 0, scaledWidth1, maxHeight);
+
+                // Draw generated image (right)
+                ctx.drawImage(img2, scaledWidth1, 0, scaledWidth2, maxHeight);
+
+                // Add watermark to generated side
+                const watermarkText = 'www.rehome.today';
+                const fontSize = Math.max(16, maxHeight / 40);
+                ctx.font = `${fontSize}px Arial`;
+                ctx.fillStyle = 'rgba(0, 0, 0, 0.6)';
+
+                const textMetrics = ctx.measureText(watermarkText);
+                const textWidth = textMetrics.width;
+                const textHeight = fontSize;
+                const padding = 10;
+
+                // Draw background
+                ctx.fillRect(
+                    scaledWidth1 + scaledWidth2 - textWidth - padding * 2,
+                    maxHeight - textHeight - padding * 2,
+                    textWidth + padding * 2,
+                    textHeight + padding * 2
+                );
+
+                // Draw text
+                ctx.fillStyle = 'white';
+                ctx.fillText(
+                    watermarkText,
+                    scaledWidth1 + scaledWidth2 - textWidth - padding,
+                    maxHeight - padding
+                );
+
+                // Download
+                canvas.toBlob((blob) => {
+                    const url = URL.createObjectURL(blob);
+                    const a = document.createElement('a');
+                    a.href = url;
+                    a.download = 'rehome-compared-' + Date.now() + '.png';
+                    document.body.appendChild(a);
+                    a.click();
+                    document.body.removeChild(a);
+                    URL.revokeObjectURL(url);
+                }, 'image/png');
+            }
+        };
+
+        img1.onload = onImageLoad;
+        img2.onload = onImageLoad;
+        img1.onerror = () => {
+            alert('Анхны зураг ачаалж чадсангүй');
+        };
+        img2.onerror = () => {
+            alert('Үүсгэсэн зураг ачаалж чадсангүй');
+        };
+
+        img1.src = originalImageUrl;
+        img2.src = generatedImageUrl;
+    };
+
+    // Logout function
+    function logout() {
+        window.location.href = '/logout/';
+    }
+
+    // Get CSRF token
+    function getCookie(name) {
+        let cookieValue = null;
+        if (document.cookie && document.cookie !== '') {
+            const cookies = document.cookie.split(';');
+            for (let i = 0; i < cookies.length; i++) {
+                const cookie = cookies[i].trim();
+                if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
+                }
+            }
+        }
+        return cookieValue;
+    }
+
+    // Function to open account modal (for history link)
+    function openAccountModal() {
+        // For now, just redirect to profile page
+        window.location.href = '/app/profile/';
+    }
+});
@@ -0,0 +1,23 @@
+tailwind.config = {
+    theme: {
+        extend: {
+            fontFamily: {
+                'sans': ['Inter', 'system-ui', 'sans-serif'],
+            },
+            colors: {
+                'primary': {
+                    50: '#f3e8ff',
+                    100: '#e9d5ff',
+                    200: '#d8b4fe',
+                    300: '#c084fc',
+                    400: '#a855f7',
+                    500: '#9333ea',
+                    600: '#7e22ce',
+                    700: '#6b21a8',
+                    800: '#581c87',
+                    900: '#4c1d95',
+                }
+            }
+        }
+    }
+}